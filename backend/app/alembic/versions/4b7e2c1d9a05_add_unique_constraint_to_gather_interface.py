@@ -0,0 +1,60 @@
+"""add unique constraint to gather_interface
+
+Revision ID: 4b7e2c1d9a05
+Revises: 9ff5dae08b8c
+Create Date: 2024-10-28 10:12:41.527310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c1d9a05'
+down_revision = '9ff5dae08b8c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 1. 历史数据中 method 为空的记录统一为空字符串，避免 NULL 绕过去重和唯一约束，之后不再允许为空
+    op.execute("UPDATE gather_interface SET method = '' WHERE method IS NULL")
+    op.alter_column('gather_interface', 'method', existing_type=sa.VARCHAR(), nullable=False, server_default='')
+    # 2. 重复记录中只要有一条已实现自动化，保留下来的那条也标记为已实现
+    op.execute(
+        """
+        UPDATE gather_interface AS keep
+        SET is_active = TRUE
+        WHERE keep.is_active IS NOT TRUE
+          AND EXISTS (
+              SELECT 1 FROM gather_interface AS dup
+              WHERE dup.project_name_mapping_id = keep.project_name_mapping_id
+                AND dup.url = keep.url
+                AND dup.method = keep.method
+                AND dup.is_active IS TRUE
+          )
+        """
+    )
+    # 3. 删除重复记录，每组只保留 id 最小的一条
+    op.execute(
+        """
+        DELETE FROM gather_interface AS dup
+        USING gather_interface AS keep
+        WHERE dup.project_name_mapping_id = keep.project_name_mapping_id
+          AND dup.url = keep.url
+          AND dup.method = keep.method
+          AND dup.id > keep.id
+        """
+    )
+    # 4. 添加唯一约束，供批量写入的 ON CONFLICT 使用
+    op.create_unique_constraint(
+        'uq_gather_interface_project_url_method',
+        'gather_interface',
+        ['project_name_mapping_id', 'url', 'method']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_gather_interface_project_url_method', 'gather_interface', type_='unique')
+    op.alter_column('gather_interface', 'method', existing_type=sa.VARCHAR(), nullable=True, server_default=None)
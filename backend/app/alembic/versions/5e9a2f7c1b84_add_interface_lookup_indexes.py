@@ -0,0 +1,130 @@
+"""add interface lookup indexes
+
+Revision ID: 5e9a2f7c1b84
+Revises: 0b8e4d6f2a17
+Create Date: 2024-11-13 10:41:52.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9a2f7c1b84'
+down_revision = '0b8e4d6f2a17'
+branch_labels = None
+depends_on = None
+
+# (索引名, 表名, 列, 是否唯一)
+INDEXES = [
+    # get_or_create_project_id 按 eureka_name 查找项目
+    ('uq_project_name_mapping_eureka_name', 'project_name_mapping', ['eureka_name'], True),
+    # 覆盖率关联和模板前缀树按 upload_name 查找项目
+    ('ix_project_name_mapping_upload_name', 'project_name_mapping', ['upload_name'], False),
+    # 覆盖率关联按 (name, template_url, method) 查找上报记录
+    ('ix_upload_interface_name_template_url_method', 'upload_interface', ['name', 'template_url', 'method'], False),
+    # 同一条过滤规则只保留一份
+    ('uq_ignore_interface_match_type_uri', 'ignore_interface', ['match_type', 'uri'], True),
+]
+
+
+def upgrade():
+    # 1. 同名项目合并到最早创建的一条，project_merge: 重复项目 -> 保留项目
+    op.execute(
+        """
+        CREATE TEMP TABLE project_merge ON COMMIT DROP AS
+        SELECT id AS dup_id, keep_id
+        FROM (
+            SELECT id, first_value(id) OVER (PARTITION BY eureka_name ORDER BY created_at, id) AS keep_id
+            FROM project_name_mapping
+            WHERE eureka_name IS NOT NULL
+        ) AS ranked
+        WHERE id <> keep_id
+        """
+    )
+    # 2. 保留项目缺少的名称信息从重复项目中补齐
+    op.execute(
+        """
+        UPDATE project_name_mapping AS keep
+        SET upload_name = COALESCE(keep.upload_name, dup.upload_name),
+            name = COALESCE(keep.name, dup.name),
+            description = COALESCE(keep.description, dup.description)
+        FROM project_merge AS m
+        JOIN project_name_mapping AS dup ON dup.id = m.dup_id
+        WHERE keep.id = m.keep_id
+        """
+    )
+    # 3. 合并后同一 (项目, url, method) 的采集接口只保留一条，优先保留原本属于保留项目的记录，
+    #    组内只要有一条已实现自动化，保留下来的那条也标记为已实现
+    op.execute(
+        """
+        CREATE TEMP TABLE gather_merge ON COMMIT DROP AS
+        SELECT id,
+               row_number() OVER w AS rn,
+               bool_or(is_active IS TRUE) OVER (PARTITION BY target_id, url, method) AS any_active
+        FROM (
+            SELECT g.id, g.url, g.method, g.is_active, m.dup_id IS NOT NULL AS moved,
+                   COALESCE(m.keep_id, g.project_name_mapping_id) AS target_id
+            FROM gather_interface AS g
+            LEFT JOIN project_merge AS m ON m.dup_id = g.project_name_mapping_id
+            WHERE g.project_name_mapping_id IN (SELECT keep_id FROM project_merge UNION SELECT dup_id FROM project_merge)
+        ) AS g
+        WINDOW w AS (PARTITION BY target_id, url, method ORDER BY moved, id)
+        """
+    )
+    op.execute(
+        """
+        UPDATE gather_interface AS g
+        SET is_active = TRUE
+        FROM gather_merge AS gm
+        WHERE g.id = gm.id AND gm.rn = 1 AND gm.any_active AND g.is_active IS NOT TRUE
+        """
+    )
+    op.execute("DELETE FROM gather_interface AS g USING gather_merge AS gm WHERE g.id = gm.id AND gm.rn > 1")
+    op.execute(
+        """
+        UPDATE gather_interface AS g
+        SET project_name_mapping_id = m.keep_id
+        FROM project_merge AS m
+        WHERE g.project_name_mapping_id = m.dup_id
+        """
+    )
+    # 4. 重算保留项目的覆盖率汇总，重复项目的汇总和快照随项目级联删除
+    op.execute(
+        """
+        INSERT INTO project_coverage_summary (project_name_mapping_id, total, covered, updated_at)
+        SELECT k.keep_id,
+               count(g.id) FILTER (WHERE g.is_ignored IS FALSE),
+               count(g.id) FILTER (WHERE g.is_ignored IS FALSE AND g.is_active IS TRUE),
+               now()
+        FROM (SELECT DISTINCT keep_id FROM project_merge) AS k
+        LEFT JOIN gather_interface AS g ON g.project_name_mapping_id = k.keep_id
+        GROUP BY k.keep_id
+        ON CONFLICT (project_name_mapping_id) DO UPDATE
+        SET total = excluded.total, covered = excluded.covered, updated_at = excluded.updated_at
+        """
+    )
+    op.execute("DELETE FROM project_name_mapping WHERE id IN (SELECT dup_id FROM project_merge)")
+    # 5. 删除重复的过滤规则，每组只保留 id 最小的一条
+    op.execute(
+        """
+        DELETE FROM ignore_interface AS dup
+        USING ignore_interface AS keep
+        WHERE dup.match_type = keep.match_type
+          AND dup.uri = keep.uri
+          AND dup.id > keep.id
+        """
+    )
+    # 6. 并发建索引，不阻塞写入；CONCURRENTLY 不能在事务中执行，先提交上面的去重。
+    #    建索引失败会留下无效索引，重新执行迁移时先删除
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""add unique constraint to upload_interface
+
+Revision ID: 7d3f9e8a2c61
+Revises: 4b7e2c1d9a05
+Create Date: 2024-10-28 15:36:09.184522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f9e8a2c61'
+down_revision = '4b7e2c1d9a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 1. 历史数据中 method 为空的记录统一为空字符串，避免 NULL 绕过唯一约束
+    op.execute("UPDATE upload_interface SET method = '' WHERE method IS NULL")
+    # 2. 删除重复记录，每组只保留 id 最小的一条
+    op.execute(
+        """
+        DELETE FROM upload_interface AS dup
+        USING upload_interface AS keep
+        WHERE dup.name = keep.name
+          AND dup.url = keep.url
+          AND dup.method = keep.method
+          AND dup.id > keep.id
+        """
+    )
+    # 3. 添加唯一约束，供批量写入的 ON CONFLICT 使用
+    op.create_unique_constraint(
+        'uq_upload_interface_name_url_method',
+        'upload_interface',
+        ['name', 'url', 'method']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_upload_interface_name_url_method', 'upload_interface', type_='unique')
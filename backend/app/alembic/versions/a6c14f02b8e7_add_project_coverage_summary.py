@@ -0,0 +1,60 @@
+"""add project_coverage_summary and gather_interface.is_ignored
+
+Revision ID: a6c14f02b8e7
+Revises: 7d3f9e8a2c61
+Create Date: 2024-10-29 11:05:52.663018
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c14f02b8e7'
+down_revision = '7d3f9e8a2c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 1. 采集接口增加过滤标记，命中过滤规则的接口不计入覆盖率
+    op.add_column('gather_interface',
+        sa.Column('is_ignored', sa.Boolean(), server_default=sa.false(), nullable=False,
+                  comment='是否命中过滤规则，命中的接口不计入覆盖率')
+    )
+    op.execute(
+        """
+        UPDATE gather_interface SET is_ignored = TRUE
+        WHERE url IN (SELECT uri FROM ignore_interface)
+        """
+    )
+
+    # 2. 项目覆盖率汇总表
+    op.create_table('project_coverage_summary',
+    sa.Column('project_name_mapping_id', sa.Uuid(), nullable=False),
+    sa.Column('total', sa.Integer(), server_default='0', nullable=False, comment='采集接口总数（不含已过滤接口）'),
+    sa.Column('covered', sa.Integer(), server_default='0', nullable=False, comment='已实现自动化的接口数'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_name_mapping_id'], ['project_name_mapping.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_name_mapping_id')
+    )
+
+    # 3. 用现有数据初始化汇总表
+    op.execute(
+        """
+        INSERT INTO project_coverage_summary (project_name_mapping_id, total, covered, updated_at)
+        SELECT project_name_mapping_id,
+               count(*),
+               count(*) FILTER (WHERE is_active IS TRUE),
+               now()
+        FROM gather_interface
+        WHERE is_ignored IS FALSE
+        GROUP BY project_name_mapping_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('project_coverage_summary')
+    op.drop_column('gather_interface', 'is_ignored')
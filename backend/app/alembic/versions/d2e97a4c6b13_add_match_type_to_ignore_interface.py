@@ -0,0 +1,28 @@
+"""add match_type to ignore_interface
+
+Revision ID: d2e97a4c6b13
+Revises: c83b5d7e1f20
+Create Date: 2024-10-31 14:22:08.915377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e97a4c6b13'
+down_revision = 'c83b5d7e1f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已有规则都是完全匹配
+    op.add_column('ignore_interface',
+        sa.Column('match_type', sa.String(), server_default='exact', nullable=False, comment='匹配方式')
+    )
+
+
+def downgrade():
+    op.drop_column('ignore_interface', 'match_type')
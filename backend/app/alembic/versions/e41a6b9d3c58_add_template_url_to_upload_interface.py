@@ -0,0 +1,31 @@
+"""add template_url to upload_interface
+
+Revision ID: e41a6b9d3c58
+Revises: d2e97a4c6b13
+Create Date: 2024-11-01 16:48:33.620194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41a6b9d3c58'
+down_revision = 'd2e97a4c6b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('upload_interface',
+        sa.Column('template_url', sa.VARCHAR(), nullable=True,
+                  comment='归一化后的接口模板，未匹配到采集模板时与 url 相同')
+    )
+    # 历史数据先与 url 保持一致，之后采集到新模板时会重新归一化
+    op.execute("UPDATE upload_interface SET template_url = url")
+    op.alter_column('upload_interface', 'template_url', nullable=False)
+
+
+def downgrade():
+    op.drop_column('upload_interface', 'template_url')
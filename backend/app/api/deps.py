@@ -1,4 +1,4 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 import jwt
@@ -7,11 +7,14 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
-from app.models import TokenPayload, User
+from app.api.pagination import decode_cursor
+from app.core.db import async_engine, async_read_engine, engine
+from app.core.replica import use_replica
+from app.models import TokenPayload, TotalMode, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -23,22 +26,39 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    bind = async_read_engine if await use_replica() else async_engine
+    async with AsyncSession(bind) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+# 异步路由使用，数据库等待期间不占用线程池；复用同步的查询函数时通过 session.run_sync 调用
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+# 只读的异步会话：配置了副本且复制延迟在阈值内时连接副本，否则连接主库；读到的数据可能略旧
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def _decode_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+
+
+def _check_user(user: User | None) -> User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -46,15 +66,34 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
     return user
 
 
+def _check_superuser(user: User) -> User:
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    return user
+
+
+def get_current_user(session: SessionDep, token: TokenDep) -> User:
+    token_data = _decode_token(token)
+    return _check_user(session.get(User, token_data.sub))
+
+
+async def get_current_user_async(session: AsyncSessionDep, token: TokenDep) -> User:
+    token_data = _decode_token(token)
+    return _check_user(await session.get(User, token_data.sub))
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
+AsyncCurrentUser = Annotated[User, Depends(get_current_user_async)]
 
 
 def get_current_active_superuser(current_user: CurrentUser) -> User:
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=403, detail="The user doesn't have enough privileges"
-        )
-    return current_user
+    return _check_superuser(current_user)
+
+
+async def get_current_active_superuser_async(current_user: AsyncCurrentUser) -> User:
+    return _check_superuser(current_user)
 
 
 def get_current_user_with_role(required_role: str = None):
@@ -75,3 +114,21 @@ def pagination_params(
         size: int = Query(20, ge=1, le=100, description="Page size")
 ) -> tuple[int, int]:
     return page, size
+
+
+def total_mode_param(
+        total_mode: TotalMode | None = Query(None, description="总数统计方式：exact / estimated / cached")
+) -> TotalMode:
+    return total_mode or TotalMode(settings.PAGINATION_TOTAL_MODE)
+
+
+def cursor_params(
+        after: str | None = Query(None, description="上一页返回的 next_cursor，不传表示第一页"),
+        size: int = Query(20, ge=1, le=100, description="Page size")
+) -> tuple[list | None, int]:
+    if after is None:
+        return None, size
+    try:
+        return decode_cursor(after), size
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
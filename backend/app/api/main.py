@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
-from app.api.routes import items, login, roles, users, utils, tester, report, ignore, scheduler, trigger, projects
+from app.api.routes import items, login, roles, users, utils, tester, report, ignore, scheduler, trigger, projects, \
+    interfaces
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
@@ -14,3 +15,4 @@ api_router.include_router(ignore.router, prefix="/ignore", tags=["ignore"])
 api_router.include_router(scheduler.router, prefix="/scheduler", tags=["scheduler"])
 api_router.include_router(trigger.router, prefix="/trigger", tags=["trigger"])
 api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
+api_router.include_router(interfaces.router, prefix="/interfaces", tags=["interfaces"])
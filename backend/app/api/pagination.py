@@ -0,0 +1,164 @@
+# Created by xdd at 2024/11/11
+import base64
+import binascii
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Generic, TypeVar
+
+from fastapi import HTTPException
+from fastapi_pagination import Page
+from sqlalchemy import func, select, tuple_
+
+from app.core.config import settings
+from app.models import CursorPage, TotalMode
+
+# 游标（keyset）分页：按有索引的排序键取 "排序键 > 上一页最后一行" 的数据，
+# 不需要 OFFSET 和 COUNT(*)，翻到多深的页耗时都一样
+
+
+def encode_cursor(values: list) -> str:
+    """
+    将排序键的值编码为不透明的游标
+    """
+    payload = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    解析游标，格式不正确时抛出 ValueError
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"无效的游标: {cursor}")
+    return values
+
+
+def _to_json(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def keyset_paginate(session, statement, keys, after: list | None, size: int, transform=None) -> CursorPage:
+    """
+    对 statement 做游标分页
+
+    keys: 排序键列（升序，最后一列必须唯一，例如主键），需要有对应的索引；
+    after: decode_cursor 解析出的上一页游标值，None 表示第一页，与排序键不匹配时返回 400；
+    transform: 对每行结果的转换，默认返回查询出的对象本身。
+    多取一行判断是否还有下一页，返回的 next_cursor 为本页最后一行的排序键
+    """
+    if after is not None:
+        if len(after) != len(keys):
+            raise HTTPException(status_code=400, detail="游标与排序键不匹配")
+        try:
+            values = [_from_json(key, value) for key, value in zip(keys, after, strict=True)]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="游标与排序键不匹配")
+        statement = statement.where(tuple_(*keys) > tuple_(*values))
+    rows = session.execute(statement.order_by(*keys).limit(size + 1)).scalars().all()
+
+    has_more = len(rows) > size
+    rows = rows[:size]
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor([getattr(rows[-1], key.key) for key in keys])
+    return CursorPage(
+        data=[transform(row) for row in rows] if transform else rows,
+        size=size,
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
+
+
+# 分页总数：exact 每次 COUNT(*)；estimated 读取查询计划的估算行数；cached 精确统计后按 TTL 缓存
+
+T = TypeVar('T')
+
+# 缓存的总数条目上限，按最近使用淘汰
+TOTAL_CACHE_MAX_SIZE = 256
+
+_total_cache: OrderedDict[str, tuple[float, int]] = OrderedDict()
+_total_cache_lock = threading.Lock()
+
+
+class TotalPage(Page[T], Generic[T]):
+    """
+    fastapi_pagination 的 Page，增加 total_exact 表示 total 是否为精确值
+    """
+    total_exact: bool = True
+
+
+def _literal_sql(session, statement) -> str:
+    return str(statement.compile(dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+
+
+def exact_total(session, statement) -> int:
+    return session.execute(select(func.count()).select_from(statement.order_by(None).subquery())).scalar_one()
+
+
+def estimated_total(session, statement) -> int:
+    """
+    EXPLAIN 查询得到规划器估算的行数，不扫描数据
+    """
+    plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {_literal_sql(session, statement)}").scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def clear_total_cache() -> None:
+    with _total_cache_lock:
+        _total_cache.clear()
+
+
+def count_total(session, statement, mode: TotalMode) -> tuple[int, bool]:
+    """
+    按 mode 统计 statement（不含分页）的总行数，返回 (总数, 是否精确)
+    """
+    if mode == TotalMode.ESTIMATED:
+        estimated = estimated_total(session, statement)
+        # 估算值较小时精确统计的代价也很小，直接返回精确值
+        if estimated < settings.PAGINATION_ESTIMATE_EXACT_BELOW:
+            return exact_total(session, statement), True
+        return estimated, False
+
+    if mode == TotalMode.CACHED:
+        key = _literal_sql(session, statement)
+        now = time.monotonic()
+        with _total_cache_lock:
+            cached = _total_cache.get(key)
+            if cached is not None and cached[0] > now:
+                _total_cache.move_to_end(key)
+                return cached[1], False
+        total = exact_total(session, statement)
+        with _total_cache_lock:
+            _total_cache[key] = (now + settings.PAGINATION_TOTAL_CACHE_TTL_SECONDS, total)
+            _total_cache.move_to_end(key)
+            while len(_total_cache) > TOTAL_CACHE_MAX_SIZE:
+                _total_cache.popitem(last=False)
+        return total, True
+
+    return exact_total(session, statement), True
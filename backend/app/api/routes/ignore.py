@@ -1,11 +1,14 @@
 # Created by xdd at 2024/6/3
 
-from fastapi_pagination import Page
-from sqlalchemy import select
-from fastapi import APIRouter, HTTPException
+from sqlalchemy import literal, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from app.crud import update_entity
-from app.models import IgnoreCreate, IgnoreInterface, IgnoreOut, IgnoreUpdate
-from app.api.deps import SessionDep
+from app.models import IgnoreCreate, IgnoreInterface, IgnoreOut, IgnoreUpdate, CursorPage, TotalMode
+from app.api.deps import AsyncSessionDep, ReadSessionDep, SessionDep, cursor_params, total_mode_param
+from app.api.pagination import TotalPage, count_total, keyset_paginate
+from app.core.http_cache import notify_table_changed
+from app.service.gather_interface import apply_ignore_rule, revert_ignore_rule
+from app.service.ignore_matcher import invalidate_ignore_matcher, validate_rule
 from fastapi_pagination.ext.sqlalchemy import paginate
 
 from config.logging_config import setup_logger
@@ -14,34 +17,90 @@ router = APIRouter()
 logger = setup_logger()
 
 
+def _validate_rule(session, match_type, uri) -> None:
+    try:
+        validate_rule(match_type, uri, session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _ensure_unique_rule(session, match_type, uri, exclude_id=None):
+    statement = select(IgnoreInterface.id).where(IgnoreInterface.match_type == match_type,
+                                                 IgnoreInterface.uri == uri)
+    if exclude_id is not None:
+        statement = statement.where(IgnoreInterface.id != exclude_id)
+    if session.execute(statement).first():
+        raise HTTPException(status_code=409, detail="相同的过滤规则已存在")
+
+
 @router.post("/ignore/add", response_model=IgnoreInterface)
-def create_ignore_uri(ignore_uri: IgnoreCreate, session: SessionDep):
+def create_ignore_uri(ignore_uri: IgnoreCreate, session: SessionDep, background_tasks: BackgroundTasks):
     """
-    添加过滤信息
+    添加过滤信息，match_type 支持 exact / prefix / glob / regex
+
+    已有的采集接口由后台任务分批重新归类
     """
+    _validate_rule(session, ignore_uri.match_type, ignore_uri.uri)
+    _ensure_unique_rule(session, ignore_uri.match_type, ignore_uri.uri)
     ignore = IgnoreInterface.from_orm(ignore_uri)
     session.add(ignore)
+    notify_table_changed(session, IgnoreInterface.__tablename__)
     session.commit()
+    invalidate_ignore_matcher()
     session.refresh(ignore)
+    background_tasks.add_task(apply_ignore_rule, ignore.match_type, ignore.uri)
     return ignore
 
 
-@router.get("/ignores", response_model=Page[IgnoreOut])
-def get_ignores_page(session: SessionDep) -> Page[IgnoreOut]:
+@router.get("/ignores", response_model=TotalPage[IgnoreOut])
+async def get_ignores_page(session: AsyncSessionDep,
+                           total_mode: TotalMode = Depends(total_mode_param)) -> TotalPage[IgnoreOut]:
     """
-    分页模式获取过滤列表
+    分页模式获取过滤列表，total_mode 控制总数的统计方式
     """
-    # 直接在查询结果上使用 paginate，它将自动处理分页
-    pages = paginate(session, select(IgnoreInterface).order_by(IgnoreInterface.id))
+    statement = select(IgnoreInterface).order_by(IgnoreInterface.id)
+    total, total_exact = await session.run_sync(count_total, statement, total_mode)
+    # 总数已按 total_mode 统计，paginate 只负责取当前页
+    pages = await paginate(session, statement, count_query=select(literal(total)),
+                           additional_data={"total_exact": total_exact})
     return pages
 
 
+@router.get("/ignores/cursor", response_model=CursorPage[IgnoreOut])
+async def get_ignores_cursor(
+        session: ReadSessionDep,
+        cursor: tuple[list | None, int] = Depends(cursor_params)
+) -> CursorPage[IgnoreOut]:
+    """
+    游标分页获取过滤列表
+    """
+    after, size = cursor
+    return await session.run_sync(keyset_paginate, select(IgnoreInterface), [IgnoreInterface.id], after, size)
+
+
 @router.patch("/ignore/{ignore_id}", response_model=IgnoreOut)
-def update_ignore(ignore_id: int, ignore_update: IgnoreUpdate, session: SessionDep):
+def update_ignore(ignore_id: int, ignore_update: IgnoreUpdate, session: SessionDep,
+                  background_tasks: BackgroundTasks):
     """
     修改过滤信息
     """
-    return update_entity(ignore_id, ignore_update, session, IgnoreInterface)
+    ignore = session.get(IgnoreInterface, ignore_id)
+    if not ignore:
+        raise HTTPException(status_code=404, detail="IgnoreInterface not found")
+    old_rule = (ignore.match_type, ignore.uri)
+    _validate_rule(session, ignore_update.match_type or ignore.match_type, ignore_update.uri or ignore.uri)
+    _ensure_unique_rule(session, ignore_update.match_type or ignore.match_type, ignore_update.uri or ignore.uri,
+                        exclude_id=ignore_id)
+
+    ignore = update_entity(ignore_id, ignore_update, session, IgnoreInterface)
+    notify_table_changed(session, IgnoreInterface.__tablename__)
+    session.commit()
+    invalidate_ignore_matcher()
+    if (ignore.match_type, ignore.uri) != old_rule:
+        # 后台任务按添加顺序执行：先恢复旧规则命中的接口，再应用新规则
+        background_tasks.add_task(revert_ignore_rule, *old_rule)
+        background_tasks.add_task(apply_ignore_rule, ignore.match_type, ignore.uri)
+    return ignore
 
 
 @router.get("/ignores/{ignore_id}", response_model=IgnoreOut)
@@ -0,0 +1,89 @@
+# Created by xdd at 2024/11/11
+import uuid
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.api.deps import ReadSessionDep, cursor_params
+from app.api.pagination import keyset_paginate
+from app.core.db import read_engine
+from app.core.replica import use_replica
+from app.models import (
+    CursorPage,
+    ExportFormat,
+    GatherInterface,
+    GatherInterfacePublic,
+    UploadInterface,
+    UploadInterfacePublic,
+)
+from app.service.export import (
+    MEDIA_TYPES,
+    export_uncovered_interfaces,
+    uncovered_interfaces_query,
+)
+
+router = APIRouter()
+
+
+@router.get("/gather", response_model=CursorPage[GatherInterfacePublic])
+async def read_gather_interfaces(
+        session: ReadSessionDep,
+        project_id: uuid.UUID | None = None,
+        covered: bool | None = None,
+        include_ignored: bool = False,
+        cursor: tuple[list | None, int] = Depends(cursor_params)
+) -> CursorPage[GatherInterfacePublic]:
+    """
+    游标分页获取采集接口，可按项目、是否已覆盖过滤，默认不包含命中过滤规则的接口
+    """
+    after, size = cursor
+    statement = select(GatherInterface)
+    if project_id is not None:
+        statement = statement.where(GatherInterface.project_name_mapping_id == project_id)
+    if covered is not None:
+        statement = statement.where(GatherInterface.is_active.is_(True) if covered
+                                    else GatherInterface.is_active.is_not(True))
+    if not include_ignored:
+        statement = statement.where(GatherInterface.is_ignored.is_(False))
+    return await session.run_sync(keyset_paginate, statement, [GatherInterface.id], after, size)
+
+
+@router.get("/gather/export")
+async def export_gather_interfaces(
+        project_id: uuid.UUID | None = None,
+        method: str | None = None,
+        url_prefix: str | None = None,
+        include_ignored: bool = False,
+        format: ExportFormat = ExportFormat.CSV,
+        gzip: bool = False
+) -> StreamingResponse:
+    """
+    流式导出未覆盖的采集接口（CSV / NDJSON），可按项目、请求方法、URL 前缀过滤，gzip 为 True 时压缩输出
+    """
+    statement = uncovered_interfaces_query(project_id, method, url_prefix, include_ignored)
+    # 导出在响应流中逐批读取，不经过请求级的会话，按副本的复制延迟直接选择引擎
+    bind = read_engine if await use_replica() else None
+    filename = f"uncovered_interfaces.{format.value}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        media_type = "application/gzip"
+    return StreamingResponse(export_uncovered_interfaces(statement, format, gzip, bind), media_type=media_type,
+                             headers=headers)
+
+
+@router.get("/upload", response_model=CursorPage[UploadInterfacePublic])
+async def read_upload_interfaces(
+        session: ReadSessionDep,
+        name: str | None = None,
+        cursor: tuple[list | None, int] = Depends(cursor_params)
+) -> CursorPage[UploadInterfacePublic]:
+    """
+    游标分页获取自动化上报的接口，可按上报名称过滤
+    """
+    after, size = cursor
+    statement = select(UploadInterface)
+    if name is not None:
+        statement = statement.where(UploadInterface.name == name)
+    return await session.run_sync(keyset_paginate, statement, [UploadInterface.id], after, size)
@@ -3,20 +3,23 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import select, func
+from sqlmodel import select
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser, pagination_params
-from app.models import Item, ItemCreate, ItemUpdate, ItemPublic, PaginatedResponse
+from app.api.deps import AsyncCurrentUser, CurrentUser, ReadSessionDep, SessionDep, \
+    get_current_active_superuser, pagination_params, cursor_params, total_mode_param
+from app.api.pagination import count_total, keyset_paginate
+from app.models import Item, ItemCreate, ItemUpdate, ItemPublic, PaginatedResponse, CursorPage, TotalMode
 
 router = APIRouter()
 
 
 @router.get("/", response_model=PaginatedResponse[ItemPublic])
-def read_items(
-        session: SessionDep,
-        current_user: CurrentUser,
-        pagination: tuple[int, int] = Depends(pagination_params)
+async def read_items(
+        session: ReadSessionDep,
+        current_user: AsyncCurrentUser,
+        pagination: tuple[int, int] = Depends(pagination_params),
+        total_mode: TotalMode = Depends(total_mode_param)
 ) -> PaginatedResponse[ItemPublic]:
     """
     Retrieve items with pagination.
@@ -24,22 +27,38 @@ def read_items(
     page, size = pagination
     offset = (page - 1) * size
 
-    if current_user.is_superuser:
-        total = session.exec(select(func.count()).select_from(Item)).one()
-        items = session.exec(select(Item).offset(offset).limit(size)).all()
-    else:
-        total = session.exec(select(func.count(Item.id)).where(Item.owner_id == current_user.id)).one()
-        items = session.exec(select(Item).where(Item.owner_id == current_user.id).offset(offset).limit(size)).all()
+    statement = select(Item)
+    if not current_user.is_superuser:
+        statement = statement.where(Item.owner_id == current_user.id)
+    total, total_exact = await session.run_sync(count_total, statement, total_mode)
+    items = (await session.exec(statement.offset(offset).limit(size))).all()
 
     return PaginatedResponse(
         data=items,
         total=total,
+        total_exact=total_exact,
         page=page,
         size=size,
         pages=math.ceil(total / size)
     )
 
 
+@router.get("/cursor", response_model=CursorPage[ItemPublic])
+async def read_items_cursor(
+        session: ReadSessionDep,
+        current_user: AsyncCurrentUser,
+        cursor: tuple[list | None, int] = Depends(cursor_params)
+) -> CursorPage[ItemPublic]:
+    """
+    Retrieve items with cursor pagination.
+    """
+    after, size = cursor
+    statement = select(Item)
+    if not current_user.is_superuser:
+        statement = statement.where(Item.owner_id == current_user.id)
+    return await session.run_sync(keyset_paginate, statement, [Item.id], after, size)
+
+
 @router.post("/", response_model=ItemPublic)
 def create_item(
         *,
@@ -0,0 +1,15 @@
+# Created by xdd at 2024/11/7
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics() -> Response:
+    """
+    Prometheus 抓取接口
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -1,36 +1,89 @@
 # Created by xdd at 2024/6/17
-from fastapi_pagination import Page
-from sqlalchemy import select
-from fastapi import APIRouter, HTTPException
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import literal, select
+from fastapi import APIRouter, Depends, HTTPException
 
 from app.crud import update_entity
-from app.models import ProjectNameMappingPublic, ProjectNameMapping, ProjectNameMappingCreate, ProjectNameMappingUpdate
-from app.api.deps import SessionDep
+from app.models import ProjectNameMappingPublic, ProjectNameMapping, ProjectNameMappingCreate, ProjectNameMappingUpdate, \
+    ProjectCoveragePublic, ProjectCoverageHistory, CursorPage, TotalMode
+from app.api.deps import AsyncSessionDep, ReadSessionDep, SessionDep, cursor_params, total_mode_param
+from app.api.pagination import TotalPage, count_total, keyset_paginate
+from app.core.http_cache import notify_table_changed
+from app.service.coverage_summary import get_project_coverages, get_coverage_history
+from app.service.gather_interface import normalize_upload_templates
+from app.service.project_cache import notify_project_changed
 from fastapi_pagination.ext.sqlalchemy import paginate
 
 router = APIRouter()
 
 
-@router.get("/", response_model=Page[ProjectNameMappingPublic])
-def read_project_mappings(session: SessionDep) -> Page[ProjectNameMappingPublic]:
+@router.get("/", response_model=TotalPage[ProjectNameMappingPublic])
+async def read_project_mappings(
+        session: AsyncSessionDep,
+        total_mode: TotalMode = Depends(total_mode_param)
+) -> TotalPage[ProjectNameMappingPublic]:
     """
     Retrieve project name mappings.
     """
-    pages = paginate(session, select(ProjectNameMapping).order_by(ProjectNameMapping.id))
+    statement = select(ProjectNameMapping).order_by(ProjectNameMapping.id)
+    total, total_exact = await session.run_sync(count_total, statement, total_mode)
+    pages = await paginate(session, statement, count_query=select(literal(total)),
+                           additional_data={"total_exact": total_exact})
     return pages
 
 
+@router.get("/cursor", response_model=CursorPage[ProjectNameMappingPublic])
+async def read_project_mappings_cursor(
+        session: ReadSessionDep,
+        cursor: tuple[list | None, int] = Depends(cursor_params)
+) -> CursorPage[ProjectNameMappingPublic]:
+    """
+    游标分页获取项目映射
+    """
+    after, size = cursor
+    return await session.run_sync(keyset_paginate, select(ProjectNameMapping), [ProjectNameMapping.id], after, size)
+
+
 @router.post("/", response_model=ProjectNameMappingPublic)
 def create_project_mapping(mapping: ProjectNameMappingCreate, session: SessionDep):
     db_mapping = ProjectNameMapping.from_orm(mapping)
     session.add(db_mapping)
+    notify_project_changed(session, db_mapping.id)
+    notify_table_changed(session, ProjectNameMapping.__tablename__)
     session.commit()
     session.refresh(db_mapping)
     return db_mapping
 
 
+@router.get("/coverage", response_model=list[ProjectCoveragePublic])
+async def read_project_coverages(session: ReadSessionDep) -> list[ProjectCoveragePublic]:
+    """
+    获取每个项目的接口总数、已覆盖数和覆盖率
+    """
+    return await session.run_sync(get_project_coverages)
+
+
+@router.get("/coverage/history", response_model=list[ProjectCoverageHistory])
+async def read_project_coverage_history(
+        session: ReadSessionDep,
+        start: date | None = None,
+        end: date | None = None,
+        project_id: uuid.UUID | None = None,
+) -> list[ProjectCoverageHistory]:
+    """
+    获取覆盖率趋势，默认返回最近一年所有项目的每日数据
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=365)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be later than end")
+    return await session.run_sync(get_coverage_history, start, end, project_id)
+
+
 @router.get("/{mapping_id}", response_model=ProjectNameMappingPublic)
-def read_project_mapping(mapping_id: int, session: SessionDep):
+def read_project_mapping(mapping_id: uuid.UUID, session: SessionDep):
     mapping = session.get(ProjectNameMapping, mapping_id)
     if not mapping:
         raise HTTPException(status_code=404, detail="Project name mapping not found")
@@ -38,15 +91,28 @@ def read_project_mapping(mapping_id: int, session: SessionDep):
 
 
 @router.patch("/{mapping_id}", response_model=ProjectNameMappingPublic)
-def update_project_mapping(mapping_id: int, mapping_update: ProjectNameMappingUpdate, session: SessionDep):
-    return update_entity(mapping_id, mapping_update, session, ProjectNameMapping)
+def update_project_mapping(mapping_id: uuid.UUID, mapping_update: ProjectNameMappingUpdate, session: SessionDep):
+    existing = session.get(ProjectNameMapping, mapping_id)
+    old_upload_name = existing.upload_name if existing else None
+    mapping = update_entity(mapping_id, mapping_update, session, ProjectNameMapping)
+    # eureka_name / upload_name 可能已修改，通知各 worker 丢弃该项目的缓存
+    notify_project_changed(session, mapping_id)
+    notify_table_changed(session, ProjectNameMapping.__tablename__)
+    session.commit()
+    if mapping.upload_name and mapping.upload_name != old_upload_name:
+        # 新的上报名称下已有的上报记录还没有按该项目的采集模板归一化
+        normalize_upload_templates(session, {mapping_id})
+    session.refresh(mapping)
+    return mapping
 
 
 @router.delete("/{mapping_id}", response_model=ProjectNameMappingPublic)
-def delete_project_mapping(mapping_id: int, session: SessionDep):
+def delete_project_mapping(mapping_id: uuid.UUID, session: SessionDep):
     mapping = session.get(ProjectNameMapping, mapping_id)
     if not mapping:
         raise HTTPException(status_code=404, detail="Project name mapping not found")
     session.delete(mapping)
+    notify_project_changed(session, mapping_id)
+    notify_table_changed(session, ProjectNameMapping.__tablename__)
     session.commit()
     return mapping
@@ -13,9 +13,11 @@ router = APIRouter()
 def report_uris(data: ReportRUI, session: SessionDep) -> Message:
     """
     上报自动化内容接口
+
+    模板匹配和过滤规则匹配是 CPU 密集的同步逻辑，保持同步路由在线程池中执行，不占用事件循环
     """
-    data_json = data.json()
-    logger.info(f"{data_json}")
+    # 只记录概要信息，完整报文可能包含上万条接口
+    logger.info(f"收到上报: {[(item.name, len(item.url_list)) for item in data.data]}")
     upload_uris(data, session)
     return Message(message="upload successfully")
 
@@ -3,10 +3,13 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import select, func
+from sqlmodel import select
 
-from app.api.deps import SessionDep, get_current_active_superuser, pagination_params
-from app.models import Role, RoleCreate, RoleUpdate, RolePublic, PaginatedResponse
+from app.api.deps import AsyncSessionDep, ReadSessionDep, SessionDep, get_current_active_superuser, \
+    pagination_params, cursor_params, total_mode_param
+from app.api.pagination import count_total, keyset_paginate
+from app.core.http_cache import notify_table_changed
+from app.models import Role, RoleCreate, RoleUpdate, RolePublic, PaginatedResponse, CursorPage, TotalMode
 
 router = APIRouter()
 
@@ -15,31 +18,44 @@ router = APIRouter()
 def create_role(*, session: SessionDep, role_in: RoleCreate) -> Any:
     db_role = Role.from_orm(role_in)
     session.add(db_role)
+    notify_table_changed(session, Role.__tablename__)
     session.commit()
     session.refresh(db_role)
     return db_role
 
 
 @router.get("/", response_model=PaginatedResponse[RolePublic])
-def read_roles(
-        session: SessionDep,
-        pagination: tuple[int, int] = Depends(pagination_params)
+async def read_roles(
+        session: AsyncSessionDep,
+        pagination: tuple[int, int] = Depends(pagination_params),
+        total_mode: TotalMode = Depends(total_mode_param)
 ) -> PaginatedResponse[RolePublic]:
     page, size = pagination
     offset = (page - 1) * size
 
-    total = session.exec(select(func.count()).select_from(Role)).one()
-    roles = session.exec(select(Role).offset(offset).limit(size)).all()
+    statement = select(Role)
+    total, total_exact = await session.run_sync(count_total, statement, total_mode)
+    roles = (await session.exec(statement.offset(offset).limit(size))).all()
 
     return PaginatedResponse(
         data=roles,
         total=total,
+        total_exact=total_exact,
         page=page,
         size=size,
         pages=math.ceil(total / size)
     )
 
 
+@router.get("/cursor", response_model=CursorPage[RolePublic])
+async def read_roles_cursor(
+        session: ReadSessionDep,
+        cursor: tuple[list | None, int] = Depends(cursor_params)
+) -> CursorPage[RolePublic]:
+    after, size = cursor
+    return await session.run_sync(keyset_paginate, select(Role), [Role.id], after, size)
+
+
 @router.get("/{role_id}", response_model=RolePublic)
 def read_role(*, session: SessionDep, role_id: uuid.UUID) -> Any:
     role = session.get(Role, role_id)
@@ -57,6 +73,7 @@ def update_role(*, session: SessionDep, role_id: uuid.UUID, role_in: RoleUpdate)
     for key, value in role_data.items():
         setattr(db_role, key, value)
     session.add(db_role)
+    notify_table_changed(session, Role.__tablename__)
     session.commit()
     session.refresh(db_role)
     return db_role
@@ -68,5 +85,6 @@ def delete_role(*, session: SessionDep, role_id: uuid.UUID) -> Any:
     if not db_role:
         raise HTTPException(status_code=404, detail="Role not found")
     session.delete(db_role)
+    notify_table_changed(session, Role.__tablename__)
     session.commit()
     return {"ok": True}
@@ -1,5 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
+from app.api.deps import SessionDep
+from app.core.config import settings
+from app.models import JobRunPublic, JobRunStats, JobRunStatus
+from app.scheduler.job_run import get_job_run_stats, list_job_runs
+from app.scheduler.leader import leader_elector
 from app.scheduler.scheduler import scheduler
 
 router = APIRouter()
@@ -28,3 +33,36 @@ async def list_jobs():
     列出所有定时任务
     """
     return scheduler.list_jobs()
+
+
+@router.get("/leader")
+async def get_leader():
+    """
+    查看当前实例是否为定时任务 leader
+    """
+    return {
+        "election_enabled": settings.SCHEDULER_LEADER_ELECTION,
+        "identity": leader_elector.identity,
+        "is_leader": leader_elector.is_leader,
+    }
+
+
+@router.get("/runs", response_model=list[JobRunPublic])
+def read_job_runs(
+        session: SessionDep,
+        job_id: str | None = None,
+        status: JobRunStatus | None = None,
+        limit: int = Query(default=50, ge=1, le=500),
+) -> list[JobRunPublic]:
+    """
+    最近的定时任务执行记录，可按任务和状态过滤
+    """
+    return list_job_runs(session, job_id=job_id, status=status, limit=limit)
+
+
+@router.get("/runs/stats", response_model=list[JobRunStats])
+def read_job_run_stats(session: SessionDep, days: int = Query(default=7, ge=1, le=365)) -> list[JobRunStats]:
+    """
+    按任务统计最近 days 天的执行次数、失败次数和 p50/p95 耗时
+    """
+    return get_job_run_stats(session, days=days)
@@ -1,26 +1,46 @@
 # Created by xdd at 2024/6/19
 
-from fastapi import APIRouter
-from app.models import Message
-from app.service.gather_interface import query_prometheus, update_coverage
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from app.models import JobRunAccepted, JobRunPublic
+from app.scheduler.job_run import execute_run, get_job_run, start_or_join_run
+from app.service.gather_interface import query_prometheus, recompute_coverage
 from app.api.deps import SessionDep
 
 router = APIRouter()
 
 
-@router.get("/get_prometheus")
-def get_prometheus() -> Message:
+def _enqueue(job_id: str, func, background_tasks: BackgroundTasks) -> JobRunAccepted:
     """
-    触发查询Prometheus 内容
+    登记执行记录并放到后台执行；相同任务正在执行时合并到该次执行
     """
-    query_prometheus()
-    return Message(message="trigger successfully")
+    run_id, created = start_or_join_run(job_id)
+    if created:
+        background_tasks.add_task(execute_run, job_id, run_id, func)
+    return JobRunAccepted(run_id=run_id, job_id=job_id, coalesced=not created)
 
 
-@router.get("/update_coverage")
-def tigger_update_coverage(session: SessionDep) -> Message:
+@router.get("/get_prometheus", status_code=202, response_model=JobRunAccepted)
+def get_prometheus(background_tasks: BackgroundTasks) -> JobRunAccepted:
     """
-    手动更新自动化覆盖率
+    触发查询Prometheus 内容，立即返回执行ID，通过 /trigger/runs/{run_id} 查询进度
     """
-    update_coverage(session)
-    return Message(message="trigger successfully")
+    return _enqueue("query_prometheus", query_prometheus, background_tasks)
+
+
+@router.get("/update_coverage", status_code=202, response_model=JobRunAccepted)
+def tigger_update_coverage(background_tasks: BackgroundTasks) -> JobRunAccepted:
+    """
+    手动更新自动化覆盖率，并全量重算项目覆盖率汇总，立即返回执行ID
+    """
+    return _enqueue("update_coverage", recompute_coverage, background_tasks)
+
+
+@router.get("/runs/{run_id}", response_model=JobRunPublic)
+def read_trigger_run(run_id: int, session: SessionDep) -> JobRunPublic:
+    """
+    查询执行状态和进度计数
+    """
+    job_run = get_job_run(session, run_id)
+    if not job_run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return job_run
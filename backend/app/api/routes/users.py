@@ -3,15 +3,20 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
+    ReadSessionDep,
     SessionDep,
     get_current_active_superuser,
-    pagination_params
+    get_current_active_superuser_async,
+    pagination_params,
+    cursor_params,
+    total_mode_param
 )
+from app.api.pagination import count_total, keyset_paginate
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -25,7 +30,9 @@ from app.models import (
     UserUpdate,
     UserUpdateMe,
     Role,
-    PaginatedResponse
+    PaginatedResponse,
+    CursorPage,
+    TotalMode
 )
 from app.utils import generate_new_account_email, send_email
 
@@ -34,12 +41,13 @@ router = APIRouter()
 
 @router.get(
     "/",
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser_async)],
     response_model=PaginatedResponse[UserPublic],
 )
-def read_users(
-        session: SessionDep,
-        pagination: tuple[int, int] = Depends(pagination_params)
+async def read_users(
+        session: ReadSessionDep,
+        pagination: tuple[int, int] = Depends(pagination_params),
+        total_mode: TotalMode = Depends(total_mode_param)
 ) -> PaginatedResponse[UserPublic]:
     """
     Retrieve users with pagination.
@@ -47,18 +55,36 @@ def read_users(
     page, size = pagination
     offset = (page - 1) * size
 
-    total = session.exec(select(func.count()).select_from(User)).one()
-    users = session.exec(select(User).offset(offset).limit(size)).all()
+    statement = select(User)
+    total, total_exact = await session.run_sync(count_total, statement, total_mode)
+    users = (await session.exec(statement.offset(offset).limit(size))).all()
 
     return PaginatedResponse(
         data=users,
         total=total,
+        total_exact=total_exact,
         page=page,
         size=size,
         pages=math.ceil(total / size)
     )
 
 
+@router.get(
+    "/cursor",
+    dependencies=[Depends(get_current_active_superuser_async)],
+    response_model=CursorPage[UserPublic],
+)
+async def read_users_cursor(
+        session: ReadSessionDep,
+        cursor: tuple[list | None, int] = Depends(cursor_params)
+) -> CursorPage[UserPublic]:
+    """
+    Retrieve users with cursor pagination.
+    """
+    after, size = cursor
+    return await session.run_sync(keyset_paginate, select(User), [User.id], after, size)
+
+
 @router.post(
     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic
 )
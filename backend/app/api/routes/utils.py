@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.core.db import pool_stats
+from app.models import DBPoolStats, Message
 from app.utils import generate_test_email, send_email
 
 router = APIRouter()
@@ -29,3 +30,11 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/db-pool/", dependencies=[Depends(get_current_active_superuser)])
+def read_db_pool_stats() -> list[DBPoolStats]:
+    """
+    数据库连接池实时状态
+    """
+    return pool_stats()
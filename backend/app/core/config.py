@@ -66,6 +66,97 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # 只读副本：设置 POSTGRES_REPLICA_SERVER 后 GET 列表、报表和导出路由从副本读取，其余连接参数默认与主库相同。
+    # 复制延迟超过 REPLICA_MAX_LAG_SECONDS 或副本不可用时退回主库，延迟每 REPLICA_LAG_CHECK_SECONDS 检查一次
+    POSTGRES_REPLICA_SERVER: str | None = None
+    POSTGRES_REPLICA_PORT: int | None = None
+    POSTGRES_REPLICA_USER: str | None = None
+    POSTGRES_REPLICA_PASSWORD: str | None = None
+    POSTGRES_REPLICA_DB: str | None = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    REPLICA_CONNECT_TIMEOUT_SECONDS: int = 3
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_DATABASE_URI(self) -> PostgresDsn | None:
+        if not self.POSTGRES_REPLICA_SERVER:
+            return None
+        return MultiHostUrl.build(
+            scheme="postgresql+psycopg",
+            username=self.POSTGRES_REPLICA_USER or self.POSTGRES_USER,
+            password=self.POSTGRES_REPLICA_PASSWORD or self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_REPLICA_SERVER,
+            port=self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT,
+            path=self.POSTGRES_REPLICA_DB or self.POSTGRES_DB,
+        )
+
+    # Prometheus 采集配置
+    PROMETHEUS_URL: str = "http://itest-qtrack.jetmobo.com"
+    PROMETHEUS_CONNECT_TIMEOUT: float = 5.0
+    PROMETHEUS_READ_TIMEOUT: float = 60.0
+    PROMETHEUS_MAX_CONNECTIONS: int = 10
+    PROMETHEUS_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    PROMETHEUS_RETRY_ATTEMPTS: int = 3
+    PROMETHEUS_RETRY_BACKOFF_SECONDS: float = 1.0
+
+    # 定时任务选主：多个 worker/副本通过 PostgreSQL advisory lock 选出唯一执行定时任务的实例
+    SCHEDULER_LEADER_ELECTION: bool = True
+    SCHEDULER_LEADER_LOCK_KEY: int = 20241104
+    SCHEDULER_LEADER_HEARTBEAT_SECONDS: float = 10.0
+
+    # 定时任务执行器：同步的数据库密集型任务放到线程池，CPU 密集型任务放到进程池，不占用处理请求的事件循环
+    SCHEDULER_THREAD_POOL_SIZE: int = 4
+    SCHEDULER_PROCESS_POOL_SIZE: int = 2
+    SCHEDULER_MISFIRE_GRACE_SECONDS: int = 300
+
+    # SQL 语句计数：单个请求/定时任务的语句条数超过阈值，或同一语句重复执行达到次数（疑似 N+1）时输出警告
+    SQL_QUERY_WARN_THRESHOLD: int = 50
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 10
+
+    # 分页总数：默认统计方式（exact / estimated / cached），缓存有效期，以及估算值低于多少行时改为精确统计
+    PAGINATION_TOTAL_MODE: Literal["exact", "estimated", "cached"] = "exact"
+    PAGINATION_TOTAL_CACHE_TTL_SECONDS: float = 60.0
+    PAGINATION_ESTIMATE_EXACT_BELOW: int = 10000
+
+    # 数据库连接池：API 使用的同步、异步引擎各有一个池，连接回收时间（秒），借出前是否探活，
+    # 以及每个连接的语句超时（毫秒，0 表示不限制）
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+
+    # 定时任务和后台任务使用的独立连接池，长时间持有连接时不占用 API 的连接；关闭时与 API 共用同步引擎。
+    # 每个执行中的任务同时持有任务会话和写进度的会话两个连接，未设置连接数时按 2 × 线程池大小 + 1（job store）计算；
+    # 执行记录的心跳每分钟短暂借用一次连接，由 DB_JOB_MAX_OVERFLOW 兜底
+    DB_JOB_POOL_ENABLED: bool = True
+    DB_JOB_POOL_SIZE: int | None = None
+    DB_JOB_MAX_OVERFLOW: int = 2
+    DB_JOB_STATEMENT_TIMEOUT_MS: int = 0
+
+    @model_validator(mode="after")
+    def _set_default_job_pool_size(self) -> Self:
+        if self.DB_JOB_POOL_SIZE is None:
+            self.DB_JOB_POOL_SIZE = 2 * self.SCHEDULER_THREAD_POOL_SIZE + 1
+        return self
+
+    # 项目 id 缓存：按 eureka_name / upload_name 缓存项目 id 的条目上限和有效期（秒），
+    # 项目增删改后通过 PostgreSQL LISTEN/NOTIFY 通知所有 worker 失效
+    PROJECT_CACHE_MAX_SIZE: int = 10000
+    PROJECT_CACHE_TTL_SECONDS: float = 300.0
+
+    # 列表接口的响应缓存：条目上限和有效期（秒）；相关表写入后通过 LISTEN/NOTIFY 通知所有 worker 失效，
+    # 有效期只是收不到通知时的兜底
+    HTTP_CACHE_MAX_SIZE: int = 512
+    HTTP_CACHE_TTL_SECONDS: float = 300.0
+
+    # 上报路径归一化使用的模板前缀树缓存：按 upload_name 缓存的条目上限和有效期（秒）；
+    # 采集接口新增或项目修改后通过 LISTEN/NOTIFY 通知所有 worker 失效，有效期只是收不到通知时的兜底
+    TEMPLATE_CACHE_MAX_SIZE: int = 1000
+    TEMPLATE_CACHE_TTL_SECONDS: float = 300.0
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -1,10 +1,92 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
-from app.models import User, UserCreate, Role
+from app.core.metrics import instrument_pool, instrumented_pool_class
+from app.core.query_counter import install_query_counter
+from app.models import DBPoolStats, User, UserCreate, Role
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+# {连接池名称: (同步引擎, max_overflow)}，用于查询连接池状态
+_pools = {}
+
+
+def _engine_options(name: str, pool_size: int, max_overflow: int, statement_timeout_ms: int,
+                    pool_class=QueuePool, connect_timeout: int | None = None) -> dict:
+    connect_args = {}
+    if statement_timeout_ms:
+        # libpq 的 options 参数在建立连接时设置，对该连接上的所有会话生效
+        connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+    if connect_timeout:
+        connect_args["connect_timeout"] = connect_timeout
+    return {
+        "poolclass": instrumented_pool_class(name, pool_class),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+def _register(sync_engine, name: str, max_overflow: int) -> None:
+    instrument_pool(sync_engine, name)
+    install_query_counter(sync_engine)
+    _pools[name] = (sync_engine, max_overflow)
+
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **_engine_options(
+    "sync", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS))
+_register(engine, "sync", settings.DB_MAX_OVERFLOW)
+
+# 异步引擎（psycopg async），供高频路由使用，不占用 Starlette 的线程池；
+# 连接绑定在创建它的事件循环上，应用关闭时需要 dispose
+async_engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI), **_engine_options(
+    "async", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS,
+    AsyncAdaptedQueuePool))
+_register(async_engine.sync_engine, "async", settings.DB_MAX_OVERFLOW)
+
+# 定时任务、任务记录和后台任务使用的引擎，批量任务占满连接时不影响 API 请求
+if settings.DB_JOB_POOL_ENABLED:
+    job_engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **_engine_options(
+        "jobs", settings.DB_JOB_POOL_SIZE, settings.DB_JOB_MAX_OVERFLOW, settings.DB_JOB_STATEMENT_TIMEOUT_MS))
+    _register(job_engine, "jobs", settings.DB_JOB_MAX_OVERFLOW)
+else:
+    job_engine = engine
+
+# 只读副本，未配置时为 None；是否使用由 app.core.replica 按复制延迟决定。
+# 连接超时较短，副本不可用时尽快退回主库
+read_engine = None
+async_read_engine = None
+if settings.SQLALCHEMY_REPLICA_DATABASE_URI:
+    read_engine = create_engine(str(settings.SQLALCHEMY_REPLICA_DATABASE_URI), **_engine_options(
+        "replica", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS,
+        connect_timeout=settings.REPLICA_CONNECT_TIMEOUT_SECONDS))
+    _register(read_engine, "replica", settings.DB_MAX_OVERFLOW)
+    async_read_engine = create_async_engine(str(settings.SQLALCHEMY_REPLICA_DATABASE_URI), **_engine_options(
+        "replica_async", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS,
+        AsyncAdaptedQueuePool, connect_timeout=settings.REPLICA_CONNECT_TIMEOUT_SECONDS))
+    _register(async_read_engine.sync_engine, "replica_async", settings.DB_MAX_OVERFLOW)
+
+
+def pool_stats() -> list[DBPoolStats]:
+    """
+    各连接池的实时状态
+    """
+    stats = []
+    for name, (sync_engine, max_overflow) in _pools.items():
+        pool = sync_engine.pool
+        stats.append(DBPoolStats(
+            name=name,
+            size=pool.size(),
+            max_overflow=max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        ))
+    return stats
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -0,0 +1,175 @@
+# Created by xdd at 2024/11/16
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.notify import change_listener
+
+# 读多写少的列表接口的响应缓存：按 (路径, 查询参数) 缓存响应体和强 ETag。
+# 每张表有一个版本号，写入时递增；缓存条目记录生成时依赖表的版本号，版本变化后条目失效。
+# 请求带 If-None-Match 且与有效条目的 ETag 一致时直接返回 304，不进入路由，也不访问数据库
+
+NOTIFY_CHANNEL = "table_changed"
+
+_table_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+# 重放缓存时重新生成的响应头
+_REPLACED_HEADERS = {"content-length", "etag", "cache-control"}
+
+# {完整路径: 依赖的表名}
+_cached_paths: dict[str, tuple[str, ...]] = {}
+
+
+def table_versions(tables: tuple[str, ...]) -> tuple[int, ...]:
+    """
+    返回各表当前的版本号；查询过的表都会被记录，重新订阅通知时统一递增
+    """
+    with _versions_lock:
+        return tuple(_table_versions.setdefault(table, 0) for table in tables)
+
+
+def bump_table_version(*tables: str) -> None:
+    with _versions_lock:
+        for table in tables:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+def notify_table_changed(session, *tables: str) -> None:
+    """
+    表写入时在同一事务中调用，不提交：本进程立即递增版本号，
+    NOTIFY 在事务提交后送达所有 worker（包括本进程）再递增一次，
+    提交前被其他请求缓存的旧数据也随之失效；回滚时不会发出
+    """
+    bump_table_version(*tables)
+    for table in tables:
+        session.execute(select(func.pg_notify(NOTIFY_CHANNEL, table)))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    versions: tuple[int, ...]
+    expires_at: float
+    etag: str
+    body: bytes
+    # 路由响应的其他响应头（content-type 等），重放时原样返回
+    headers: tuple[tuple[str, str], ...]
+
+
+class ResponseCache:
+    """
+    {(路径, 查询参数): CachedResponse} 的 LRU 缓存，条目超过 ttl 秒或依赖表的版本号变化后失效
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, versions: tuple[int, ...]) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.versions != versions or entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: tuple, versions: tuple[int, ...], etag: str, body: bytes,
+            headers: tuple[tuple[str, str], ...] = ()) -> CachedResponse:
+        entry = CachedResponse(versions, time.monotonic() + self.ttl, etag, body, headers)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(settings.HTTP_CACHE_MAX_SIZE, settings.HTTP_CACHE_TTL_SECONDS)
+
+
+def cache_path(path: str, *tables: str) -> None:
+    """
+    对 path 的 GET 请求启用响应缓存，tables 为响应依赖的表；只用于不区分用户的接口
+
+    路由必须读主库（AsyncSessionDep）：副本落后时读到的旧数据会以写入后的新版本号缓存，
+    直到下一次写入或过期前一直返回 304
+    """
+    _cached_paths[path] = tables
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match 使用弱比较，忽略 W/ 前缀
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+
+async def cached_response(request: Request, call_next) -> Response:
+    """
+    在中间件中调用：未启用缓存的路径直接放行；
+    缓存未命中时执行路由并缓存 200 响应，命中时返回缓存的响应体或 304
+    """
+    tables = _cached_paths.get(request.url.path)
+    if request.method != "GET" or tables is None:
+        return await call_next(request)
+
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    # 先取版本号再查询，查询期间有写入时条目以旧版本号保存，下一次请求即失效
+    versions = table_versions(tables)
+    entry = response_cache.get(key, versions)
+    if entry is None:
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = tuple((name, value) for name, value in response.headers.items() if name not in _REPLACED_HEADERS)
+        entry = response_cache.set(key, versions, make_etag(body), body, headers)
+
+    # no-cache：客户端可以保存响应，但每次使用前都要带 If-None-Match 重新验证
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers={"ETag": entry.etag, "Cache-Control": "no-cache"})
+    response = Response(entry.body)
+    for name, value in entry.headers:
+        response.headers.append(name, value)
+    response.headers["ETag"] = entry.etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _on_notify(payload: str | None) -> None:
+    if not payload:
+        # 断线期间可能错过了通知，所有依赖表版本号的缓存（包括其他模块的）一并失效
+        with _versions_lock:
+            tables = list(_table_versions)
+        bump_table_version(*tables)
+        response_cache.clear()
+        return
+    bump_table_version(payload)
+
+
+change_listener.subscribe(NOTIFY_CHANNEL, _on_notify)
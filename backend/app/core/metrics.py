@@ -0,0 +1,138 @@
+# Created by xdd at 2024/11/7
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# 应用自身的 Prometheus 指标
+# gunicorn 多 worker 部署时设置 PROMETHEUS_MULTIPROC_DIR，/metrics 汇总所有 worker 的指标
+
+REQUEST_LATENCY = Histogram(
+    "qualitystar_http_request_duration_seconds",
+    "HTTP 请求耗时，route 为路由模板",
+    ["method", "route", "status"],
+)
+
+PHASE_DURATION = Histogram(
+    "qualitystar_phase_duration_seconds",
+    "采集和上报各阶段耗时",
+    ["operation", "phase"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+ROWS = Counter(
+    "qualitystar_rows_total",
+    "采集和上报处理的接口数，outcome 为 inserted / skipped（已存在）/ ignored（命中过滤规则）",
+    ["operation", "outcome"],
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "qualitystar_db_pool_checkout_wait_seconds",
+    "从连接池获取数据库连接的等待时间，pool 为连接池名称",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+DB_POOL_SIZE = Gauge(
+    "qualitystar_db_pool_size", "连接池大小", ["pool"], multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "qualitystar_db_pool_checked_out", "已借出的数据库连接数", ["pool"], multiprocess_mode="livesum",
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "qualitystar_db_pool_overflow", "超出 pool_size 的溢出连接数", ["pool"], multiprocess_mode="livesum",
+)
+
+DB_REPLICA_LAG = Gauge(
+    "qualitystar_db_replica_lag_seconds", "只读副本的复制延迟", multiprocess_mode="max",
+)
+
+SCHEDULER_JOB_LAG = Histogram(
+    "qualitystar_scheduler_job_lag_seconds",
+    "定时任务实际提交执行的时间与计划执行时间之差",
+    ["job_id"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+
+
+class observe_phase:
+    """
+    记录一个阶段的耗时：with observe_phase("upload_uris", "insert"): ...
+    """
+
+    def __init__(self, operation: str, phase: str):
+        self._histogram = PHASE_DURATION.labels(operation, phase)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+def count_rows(operation: str, inserted: int = 0, skipped: int = 0, ignored: int = 0) -> None:
+    for outcome, value in (("inserted", inserted), ("skipped", skipped), ("ignored", ignored)):
+        if value:
+            ROWS.labels(operation, outcome).inc(value)
+
+
+def instrumented_pool_class(name: str, base=QueuePool):
+    """
+    返回记录连接获取等待时间的连接池类，name 为指标中的 pool 标签；
+    异步引擎传入 AsyncAdaptedQueuePool
+    """
+    checkout_wait = DB_POOL_CHECKOUT_WAIT.labels(name)
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                checkout_wait.observe(time.perf_counter() - started)
+
+    return InstrumentedPool
+
+
+def instrument_pool(engine, name: str) -> None:
+    """
+    连接借出和归还时更新连接池状态指标，异步引擎传入 async_engine.sync_engine
+    """
+    size, checked_out, overflow = DB_POOL_SIZE.labels(name), DB_POOL_CHECKED_OUT.labels(name), \
+        DB_POOL_OVERFLOW.labels(name)
+
+    def update_pool_gauges(*_args):
+        # dispose() 后引擎会换用新的连接池，每次从引擎上取
+        pool = engine.pool
+        size.set(pool.size())
+        checked_out.set(pool.checkedout())
+        overflow.set(max(pool.overflow(), 0))
+
+    event.listen(engine.pool, "checkout", update_pool_gauges)
+    event.listen(engine.pool, "checkin", update_pool_gauges)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    生成 Prometheus 文本格式的指标，返回 (内容, Content-Type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
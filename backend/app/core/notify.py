@@ -0,0 +1,79 @@
+# Created by xdd at 2024/11/16
+import asyncio
+from collections.abc import Callable
+
+import psycopg
+
+from app.core.config import settings
+from config.logging_config import global_logger as logger
+
+# 通过 PostgreSQL LISTEN/NOTIFY 在 worker 之间广播数据变更，各缓存按频道订阅。
+# 每个 worker 只持有一个独立的监听连接，不占用连接池
+
+# 通知连接断开后的重连间隔
+LISTEN_RECONNECT_SECONDS = 5.0
+
+# 处理函数接收通知的 payload；payload 为 None 表示（重新）订阅成功，期间可能错过了通知，应丢弃全部缓存
+NotifyHandler = Callable[[str | None], None]
+
+
+class ChangeListener:
+    """
+    在事件循环中 LISTEN 已订阅的频道，按频道分发给处理函数；断线后自动重连
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, NotifyHandler] = {}
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, handler: NotifyHandler) -> None:
+        """
+        需要在 start 之前调用
+        """
+        self._handlers[channel] = handler
+
+    def start(self) -> None:
+        """
+        每个实例只能启动一次，重复启动会丢失前一个任务的引用，关闭时无法取消
+        """
+        if self._task is not None:
+            raise RuntimeError("变更通知监听已启动")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _dispatch(self, channel: str, payload: str | None) -> None:
+        try:
+            self._handlers[channel](payload)
+        except Exception as e:
+            logger.warning(f"处理 {channel} 通知失败: {e}")
+
+    async def _run(self) -> None:
+        conninfo = str(settings.SQLALCHEMY_DATABASE_URI).replace("postgresql+psycopg://", "postgresql://", 1)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as connection:
+                    for channel in self._handlers:
+                        await connection.execute(f"LISTEN {channel}")
+                    for channel in self._handlers:
+                        self._dispatch(channel, None)
+                    logger.info(f"已订阅变更通知: {', '.join(self._handlers)}")
+                    async for notify in connection.notifies():
+                        if notify.channel in self._handlers:
+                            self._dispatch(notify.channel, notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"变更通知连接断开: {e}，{LISTEN_RECONNECT_SECONDS} 秒后重连")
+                await asyncio.sleep(LISTEN_RECONNECT_SECONDS)
+
+
+change_listener = ChangeListener()
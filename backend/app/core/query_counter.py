@@ -0,0 +1,118 @@
+# Created by xdd at 2024/11/8
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from config.logging_config import global_logger as logger
+
+# SQL 语句计数：按请求 / 定时任务统计语句条数和数据库耗时，发现 N+1 查询
+
+
+class QueryStats:
+    """
+    一次请求或一次任务执行的 SQL 统计，statements 按语句文本计数，同一语句重复执行多次通常是 N+1
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[statement] += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        执行次数达到 threshold 的语句
+        """
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+# count_queries 开启的全局统计，不区分请求和线程
+_global_stats: list[QueryStats] = []
+
+
+@contextmanager
+def track_queries():
+    """
+    统计当前上下文（包括 asyncio.to_thread / 线程池中继承了上下文的代码）执行的 SQL
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def count_queries():
+    """
+    统计代码块执行期间所有线程执行的 SQL，用于测试和基准
+    """
+    stats = QueryStats()
+    _global_stats.append(stats)
+    try:
+        yield stats
+    finally:
+        _global_stats.remove(stats)
+
+
+def warn_if_excessive(stats: QueryStats, label: str) -> None:
+    """
+    语句条数超过阈值或同一语句重复执行过多时输出警告
+    """
+    if stats.count > settings.SQL_QUERY_WARN_THRESHOLD:
+        logger.warning(f"{label} 执行了 {stats.count} 条 SQL，数据库耗时 {stats.duration_ms:.1f}ms")
+    for statement, count in stats.repeated(settings.SQL_REPEATED_STATEMENT_THRESHOLD):
+        logger.warning(f"{label} 疑似 N+1 查询，同一语句执行了 {count} 次: {statement[:200]}")
+
+
+def server_timing(stats: QueryStats) -> str:
+    return f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries"'
+
+
+def install_query_counter(engine) -> None:
+    """
+    在 engine 上注册游标执行事件，记录每条语句的耗时
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, *_args):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, _cursor, statement, *_args):
+        _record(conn, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and exception_context.statement is not None:
+            _record(conn, exception_context.statement)
+
+
+def _record(conn, statement: str) -> None:
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    for global_stats in _global_stats:
+        global_stats.record(statement, duration)
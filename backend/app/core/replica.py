@@ -0,0 +1,80 @@
+# Created by xdd at 2024/11/14
+import time
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import async_read_engine
+from app.core.metrics import DB_REPLICA_LAG
+from config.logging_config import global_logger as logger
+
+# 在副本上执行：不在恢复模式（独立的数据库，例如本地用第二个库模拟副本）时延迟为 0；
+# WAL 接收进程正在 streaming 且已回放到接收位置，说明主库没有新的写入，延迟也为 0；
+# 否则（包括与主库断开、回放停在最后接收的位置）为距最后一次回放事务的秒数，断开越久延迟越大。
+# 连接副本的用户需要 pg_read_all_stats 权限才能读取 pg_stat_wal_receiver.status，
+# 没有权限时按断开处理，主库长时间无写入时副本会被判定为延迟
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+            AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReplicaMonitor:
+    """
+    按间隔检查副本的复制延迟，决定读请求是否使用副本
+
+    延迟超过 max_lag、无法得到延迟或副本不可用时返回 False，调用方退回主库
+    """
+
+    def __init__(self, engine, max_lag: float, interval: float):
+        self._engine = engine
+        self._max_lag = max_lag
+        self._interval = interval
+        self._usable = False
+        self._checked_at: float | None = None
+
+    async def measure_lag(self) -> float | None:
+        async with self._engine.connect() as connection:
+            lag = (await connection.execute(REPLICA_LAG_SQL)).scalar()
+        return None if lag is None else float(lag)
+
+    async def is_usable(self) -> bool:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self._interval:
+            return self._usable
+        # 先更新检查时间，检查期间到达的请求直接使用上一次的结果
+        self._checked_at = now
+        try:
+            lag = await self.measure_lag()
+            reason = f"复制延迟 {lag} 秒"
+        except Exception as e:
+            lag = None
+            reason = f"无法连接: {e}"
+        if lag is not None:
+            DB_REPLICA_LAG.set(lag)
+        usable = lag is not None and lag <= self._max_lag
+        if usable != self._usable:
+            if usable:
+                logger.info(f"只读副本恢复可用，{reason}")
+            else:
+                logger.warning(f"只读副本不可用（{reason}），读请求退回主库")
+        self._usable = usable
+        return usable
+
+
+replica_monitor = ReplicaMonitor(
+    async_read_engine, settings.REPLICA_MAX_LAG_SECONDS, settings.REPLICA_LAG_CHECK_SECONDS
+) if async_read_engine is not None else None
+
+
+async def use_replica() -> bool:
+    """
+    当前读请求是否可以使用副本，未配置副本时返回 False
+    """
+    return replica_monitor is not None and await replica_monitor.is_usable()
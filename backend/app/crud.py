@@ -1,8 +1,10 @@
+import asyncio
 import uuid
 from typing import Any, Type, TypeVar
 
 from fastapi import HTTPException
 from sqlmodel import Session, select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.security import get_password_hash, verify_password
 from app.models import Item, ItemCreate, User, UserCreate, UserUpdate, Role, RoleCreate, RoleUpdate
@@ -52,6 +54,21 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     return db_user
 
 
+async def get_user_by_email_async(*, session: AsyncSession, email: str) -> User | None:
+    statement = select(User).where(User.email == email)
+    return (await session.exec(statement)).first()
+
+
+async def authenticate_async(*, session: AsyncSession, email: str, password: str) -> User | None:
+    db_user = await get_user_by_email_async(session=session, email=email)
+    if not db_user:
+        return None
+    # bcrypt 校验是 CPU 密集操作，放到线程池中执行，避免阻塞事件循环
+    if not await asyncio.to_thread(verify_password, password, db_user.hashed_password):
+        return None
+    return db_user
+
+
 def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -> Item:
     db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
     session.add(db_item)
@@ -1,13 +1,25 @@
+import time
+
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.routing import APIRoute
 from fastapi_pagination import add_pagination
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.api.routes import metrics
 from app.core.config import settings
-from app.scheduler.scheduler import scheduler
+from app.core.db import async_engine, async_read_engine
+from app.core.http_cache import cache_path, cached_response
+from app.core.metrics import REQUEST_LATENCY
+from app.core.notify import change_listener
+from app.core.query_counter import server_timing, track_queries, warn_if_excessive
+from app.models import IgnoreInterface, ProjectNameMapping, Role
+from app.scheduler.leader import leader_elector
+from app.scheduler.scheduler import EXECUTOR_THREAD_POOL, scheduler
+from app.service.coverage_summary import take_coverage_snapshot
 from app.service.gather_interface import query_prometheus
+from app.service.prometheus import prometheus
 from config.logging_config import global_logger as logger
 
 
@@ -24,7 +36,53 @@ app = FastAPI(
     generate_unique_id_function=custom_generate_unique_id,
 )
 
+app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(metrics.router, tags=["metrics"])
+
+# 下面是非项目模板中的配置
+
+add_pagination(app)
+
+# 读多写少、不区分用户的列表接口，前端轮询时通过 If-None-Match 重新验证；这些路由读主库，不走只读副本
+cache_path(f"{settings.API_V1_STR}/projects/", ProjectNameMapping.__tablename__)
+cache_path(f"{settings.API_V1_STR}/ignore/ignores", IgnoreInterface.__tablename__)
+cache_path(f"{settings.API_V1_STR}/roles/", Role.__tablename__)
+
+
+# 响应缓存放在最内层，命中的请求同样计入耗时和 SQL 统计
+@app.middleware("http")
+async def serve_cached_response(request: Request, call_next):
+    return await cached_response(request, call_next)
+
+
+# 按路由模板记录请求耗时，未匹配到路由的请求归为 unmatched，避免标签基数随路径参数膨胀
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - started)
+
+
+# 统计每个请求执行的 SQL 条数和数据库耗时，通过 Server-Timing 响应头返回
+@app.middleware("http")
+async def count_sql_queries(request: Request, call_next):
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers.append("Server-Timing", server_timing(stats))
+    warn_if_excessive(stats, f"{request.method} {request.url.path}")
+    return response
+
+
 # Set all CORS enabled origins
+# 最后添加的中间件在最外层：CORS 包住响应缓存，缓存命中和 304 响应同样带上 CORS 头
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -36,11 +94,35 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# 下面是非项目模板中的配置
+# 共享的 Prometheus HTTP 客户端，随应用启动和关闭
+@app.on_event("startup")
+async def start_prometheus_client():
+    await prometheus.start()
+
+
+@app.on_event("shutdown")
+async def close_prometheus_client():
+    await prometheus.close()
+
+
+# 订阅数据变更通知，其他 worker 写入后失效本进程的项目 id 缓存和响应缓存
+@app.on_event("startup")
+async def start_change_listener():
+    change_listener.start()
+
+
+@app.on_event("shutdown")
+async def stop_change_listener():
+    await change_listener.stop()
 
-add_pagination(app)
+
+# 异步连接绑定在当前事件循环上，关闭时释放，避免被其他事件循环复用
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
 
 
 # 定时任务
@@ -50,5 +132,20 @@ async def start_scheduler():
     # domain_scheduler.add_job(daily_task, 'cron', hour=10, minute=30)
     # domain_scheduler.add_job(recurring_task, 'interval', minutes=10)
     # domain_scheduler.add_job(my_task, 'interval', minutes=1)
-    scheduler.add_job(query_prometheus, 'interval', hours=1)
+    # 任务持久化在数据库 job store 中，每个 worker 都启动调度器，但只有选主成功的实例处理任务
+    scheduler.start(paused=settings.SCHEDULER_LEADER_ELECTION)
+    scheduler.add_job(query_prometheus, 'interval', leader_only=True, hours=1)
+    # 快照是同步的数据库任务，放到线程池执行器中，不占用事件循环
+    scheduler.add_job(take_coverage_snapshot, 'cron', leader_only=True, executor=EXECUTOR_THREAD_POOL,
+                      hour=23, minute=50)
+    if settings.SCHEDULER_LEADER_ELECTION:
+        leader_elector.add_listener(scheduler.on_leader_change)
+        leader_elector.start()
     logger.info(f"定时任务列表：{scheduler.list_jobs()}")
+
+
+@app.on_event("shutdown")
+async def stop_leader_elector():
+    # 关闭持锁连接，其他实例在下一次心跳时接管
+    leader_elector.stop()
+    scheduler.shutdown()
@@ -1,11 +1,13 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 from pydantic import EmailStr
 from sqlmodel import Field, Relationship, SQLModel
 from typing import Generic, List, TypeVar, Optional
-from sqlalchemy import Column, DateTime, VARCHAR, Boolean, String, Integer
+from sqlalchemy import Column, Date, DateTime, VARCHAR, Boolean, Float, Index, String, Integer, Text, UniqueConstraint, \
+    false
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 # Shared properties
@@ -142,12 +144,50 @@ class NewPassword(SQLModel):
 T = TypeVar('T')
 
 
+class TotalMode(str, Enum):
+    # 精确 COUNT(*)
+    EXACT = "exact"
+    # 查询计划估算的行数，较小时退回精确统计
+    ESTIMATED = "estimated"
+    # 精确统计后在进程内缓存一段时间
+    CACHED = "cached"
+
+
+class DBPoolStats(SQLModel):
+    name: str
+    size: int
+    max_overflow: int
+    # 池中空闲的连接数
+    checked_in: int
+    # 已借出的连接数，达到 size + max_overflow 时新的请求需要等待
+    checked_out: int
+    overflow: int
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    # 每行一个 JSON 对象
+    NDJSON = "ndjson"
+
+
 class PaginatedResponse(SQLModel, Generic[T]):
     data: List[T]
     total: int
     page: int
     size: int
     pages: int
+    # total 为估算值或缓存值时为 False
+    total_exact: bool = True
+
+
+class CursorPage(SQLModel, Generic[T]):
+    """
+    游标分页的响应，next_cursor 作为下一页请求的 after 参数，最后一页为 None
+    """
+    data: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    has_more: bool
 
 
 class URIItem(SQLModel):
@@ -167,6 +207,17 @@ class ReportRUI(SQLModel):
     data: list[DataURIItems]
 
 
+class IgnoreMatchType(str, Enum):
+    # 完全相同
+    EXACT = "exact"
+    # 前缀匹配
+    PREFIX = "prefix"
+    # 通配符，* 匹配任意字符，? 匹配单个字符
+    GLOB = "glob"
+    # 正则表达式，整串匹配
+    REGEX = "regex"
+
+
 class IgnoreUriBase(SQLModel):
     uri: str
     description: str
@@ -174,7 +225,13 @@ class IgnoreUriBase(SQLModel):
 
 class IgnoreInterface(IgnoreUriBase, table=True):
     __tablename__ = "ignore_interface"
+    __table_args__ = (
+        Index("uq_ignore_interface_match_type_uri", "match_type", "uri", unique=True),
+    )
     id: int | None = Field(default=None, primary_key=True)
+    match_type: IgnoreMatchType = Field(default=IgnoreMatchType.EXACT,
+                                        sa_column=Column(String, nullable=False, server_default="exact",
+                                                         comment="匹配方式"))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
 
@@ -186,16 +243,19 @@ class IgnoreList(SQLModel):
 class IgnoreCreate(SQLModel):
     uri: str
     description: str
+    match_type: IgnoreMatchType = IgnoreMatchType.EXACT
 
 
 class IgnoreUpdate(SQLModel):
     uri: str | None = None
     description: str | None = None
+    match_type: IgnoreMatchType | None = None
 
 
 class IgnoreOut(SQLModel):
     uri: str
     description: str
+    match_type: IgnoreMatchType
     id: int
     created_at: datetime
     updated_at: datetime
@@ -212,6 +272,10 @@ class ActionEnum(str, Enum):
 
 class ProjectNameMapping(SQLModel, table=True):
     __tablename__ = "project_name_mapping"
+    __table_args__ = (
+        Index("uq_project_name_mapping_eureka_name", "eureka_name", unique=True),
+        Index("ix_project_name_mapping_upload_name", "upload_name"),
+    )
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, description="主键")
     upload_name: str = Field(sa_column=Column(String, comment="上传名称"))
     eureka_name: str = Field(sa_column=Column(String, comment="Eureka 名称"))
@@ -268,26 +332,183 @@ class TransactionLog(SQLModel, table=True):
     batch_id: str = Field(default_factory=lambda: str(uuid.uuid4()), sa_column=Column(String, comment="批次号"))
 
 
+GATHER_INTERFACE_UNIQUE_CONSTRAINT = "uq_gather_interface_project_url_method"
+
+
 class GatherInterface(URIItem, table=True):
     __tablename__ = "gather_interface"
+    __table_args__ = (
+        UniqueConstraint("project_name_mapping_id", "url", "method", name=GATHER_INTERFACE_UNIQUE_CONSTRAINT),
+    )
     id: int = Field(default=None, primary_key=True, description="主键")
     url: str = Field(sa_column=Column(VARCHAR(), comment="接口路径"))
     project_name_mapping_id: uuid.UUID = Field(default=None, foreign_key="project_name_mapping.id",
                                          description="项目名称映射ID")
-    method: str = Field(sa_column=Column(VARCHAR(), comment="请求方法"))
+    method: str = Field(default="", sa_column=Column(VARCHAR(), nullable=False, server_default="", comment="请求方法"))
     description: str = Field(sa_column=Column(VARCHAR(), comment="接口描述"))
     is_active: bool = Field(default=False, sa_column=Column(Boolean(), comment="是否已实现自动化"))
+    is_ignored: bool = Field(default=False, sa_column=Column(Boolean(), nullable=False, server_default=false(),
+                                                             comment="是否命中过滤规则，命中的接口不计入覆盖率"))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
     project_name_mapping: ProjectNameMapping = Relationship(back_populates="gather_interfaces")
 
 
+class GatherInterfacePublic(SQLModel):
+    id: int
+    project_name_mapping_id: uuid.UUID
+    url: str
+    method: Optional[str]
+    description: Optional[str]
+    is_active: Optional[bool]
+    is_ignored: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+class ProjectCoverageSummary(SQLModel, table=True):
+    """
+    按项目汇总的覆盖率统计，由各写入路径按增量维护
+    """
+    __tablename__ = "project_coverage_summary"
+    project_name_mapping_id: uuid.UUID = Field(foreign_key="project_name_mapping.id", primary_key=True,
+                                               ondelete="CASCADE", description="项目名称映射ID")
+    total: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0",
+                                                   comment="采集接口总数（不含已过滤接口）"))
+    covered: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0",
+                                                     comment="已实现自动化的接口数"))
+    updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
+
+
+COVERAGE_SNAPSHOT_UNIQUE_CONSTRAINT = "uq_project_coverage_snapshot_project_date"
+
+
+class ProjectCoverageSnapshot(SQLModel, table=True):
+    """
+    项目覆盖率的每日快照，(项目, 日期) 唯一，同一天多次快照以最后一次为准
+    """
+    __tablename__ = "project_coverage_snapshot"
+    __table_args__ = (
+        UniqueConstraint("project_name_mapping_id", "snapshot_date", name=COVERAGE_SNAPSHOT_UNIQUE_CONSTRAINT),
+    )
+    id: int = Field(default=None, primary_key=True, description="主键")
+    project_name_mapping_id: uuid.UUID = Field(foreign_key="project_name_mapping.id", ondelete="CASCADE",
+                                               description="项目名称映射ID")
+    snapshot_date: date = Field(sa_column=Column(Date, nullable=False, comment="快照日期"))
+    total: int = Field(sa_column=Column(Integer, nullable=False, comment="采集接口总数（不含已过滤接口）"))
+    covered: int = Field(sa_column=Column(Integer, nullable=False, comment="已实现自动化的接口数"))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ProjectCoveragePublic(SQLModel):
+    project_name_mapping_id: uuid.UUID
+    name: Optional[str]
+    eureka_name: Optional[str]
+    upload_name: Optional[str]
+    total: int
+    covered: int
+    coverage: float
+
+
+class CoveragePoint(SQLModel):
+    snapshot_date: date
+    total: int
+    covered: int
+
+
+class ProjectCoverageHistory(SQLModel):
+    project_name_mapping_id: uuid.UUID
+    points: list[CoveragePoint]
+
+
+UPLOAD_INTERFACE_UNIQUE_CONSTRAINT = "uq_upload_interface_name_url_method"
+
+
 class UploadInterface(SQLModel, table=True):
     __tablename__ = "upload_interface"
+    __table_args__ = (
+        UniqueConstraint("name", "url", "method", name=UPLOAD_INTERFACE_UNIQUE_CONSTRAINT),
+        Index("ix_upload_interface_name_template_url_method", "name", "template_url", "method"),
+    )
     id: int = Field(default=None, primary_key=True, description="主键")
     url: str = Field(sa_column=Column(VARCHAR(), comment="接口路径"))
+    template_url: str = Field(sa_column=Column(VARCHAR(), nullable=False,
+                                               comment="归一化后的接口模板，未匹配到采集模板时与 url 相同"))
     name: str = Field(default=None, description="自动化脚步定义名称")
     method: str = Field(sa_column=Column(VARCHAR(), comment="请求方法"))
     description: str = Field(sa_column=Column(VARCHAR(), comment="接口描述"))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
+
+
+class UploadInterfacePublic(SQLModel):
+    id: int
+    name: str
+    url: str
+    template_url: str
+    method: Optional[str]
+    description: Optional[str]
+    created_at: datetime
+
+
+class JobRunStatus(str, Enum):
+    # 执行中
+    RUNNING = "running"
+    # 执行成功
+    SUCCESS = "success"
+    # 执行失败
+    FAILED = "failed"
+
+
+class JobRun(SQLModel, table=True):
+    """
+    定时任务的执行记录，每次执行一行
+    """
+    __tablename__ = "job_run"
+    __table_args__ = (
+        Index("ix_job_run_job_id_started_at", "job_id", "started_at"),
+    )
+    id: int = Field(default=None, primary_key=True, description="主键")
+    job_id: str = Field(sa_column=Column(String, nullable=False, comment="定时任务ID"))
+    status: JobRunStatus = Field(default=JobRunStatus.RUNNING,
+                                 sa_column=Column(String, nullable=False, comment="执行状态"))
+    worker: str | None = Field(default=None, sa_column=Column(String, comment="执行实例"))
+    started_at: datetime = Field(default_factory=datetime.utcnow,
+                                 sa_column=Column(DateTime(), nullable=False, comment="开始时间"))
+    finished_at: datetime | None = Field(default=None, sa_column=Column(DateTime(), comment="结束时间"))
+    duration_ms: float | None = Field(default=None, sa_column=Column(Float, comment="耗时（毫秒）"))
+    rows_processed: int | None = Field(default=None, sa_column=Column(Integer, comment="处理的行数"))
+    error: str | None = Field(default=None, sa_column=Column(Text, comment="异常信息"))
+    progress: dict | None = Field(default=None, sa_column=Column(JSONB, comment="进度计数器"))
+    heartbeat_at: datetime | None = Field(default=None, sa_column=Column(DateTime(), comment="最近一次心跳时间"))
+
+
+class JobRunPublic(SQLModel):
+    id: int
+    job_id: str
+    status: JobRunStatus
+    worker: Optional[str]
+    started_at: datetime
+    finished_at: Optional[datetime]
+    duration_ms: Optional[float]
+    rows_processed: Optional[int]
+    error: Optional[str]
+    progress: Optional[dict]
+    heartbeat_at: Optional[datetime]
+
+
+class JobRunAccepted(SQLModel):
+    run_id: int
+    job_id: str
+    # 已有相同任务在执行时合并到该次执行，不重复启动
+    coalesced: bool
+
+
+class JobRunStats(SQLModel):
+    job_id: str
+    runs: int
+    failures: int
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+    max_ms: Optional[float]
+    last_started_at: Optional[datetime]
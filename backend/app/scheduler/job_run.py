@@ -0,0 +1,293 @@
+# Created by xdd at 2024/11/5
+import asyncio
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from apscheduler.util import ref_to_obj
+from sqlalchemy import func, select, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import job_engine
+from app.core.query_counter import QueryStats, track_queries, warn_if_excessive
+from app.models import JobRun, JobRunPublic, JobRunStats, JobRunStatus
+from app.scheduler.leader import leader_elector
+from config.logging_config import global_logger as logger
+
+# 定时任务执行记录：持久化的任务只保存 run_job 的引用和参数，由 run_job 负责选主判断和记录执行历史
+
+# 异常信息最多保留的字符数
+ERROR_MAX_LENGTH = 4000
+# 执行中的任务每隔该时长写一次心跳
+RUNNING_HEARTBEAT_SECONDS = 60
+# 超过该时长没有心跳的执行中记录视为执行实例已中断，下一次执行前标记为失败
+RUNNING_STALE_SECONDS = 5 * RUNNING_HEARTBEAT_SECONDS
+
+
+def start_or_join_run(job_id: str) -> tuple[int, bool]:
+    """
+    登记一次执行（手动触发或定时调度），返回 (run_id, 是否新建)
+
+    同一任务已有执行中的记录时（包括其他 worker 发起的）直接返回该记录，不新建；
+    超过 RUNNING_STALE_SECONDS 没有心跳的执行中记录先标记为失败（abandoned），不再合并到它上面。
+    检查和插入在同一事务中持有按任务ID加的 advisory xact lock，多个 worker 并发触发时只会新建一条
+    """
+    with Session(job_engine) as session:
+        session.execute(select(func.pg_advisory_xact_lock(func.hashtext(job_id))))
+        now = datetime.utcnow()
+        abandoned = session.execute(
+            update(JobRun)
+            .where(JobRun.job_id == job_id)
+            .where(JobRun.status == JobRunStatus.RUNNING)
+            .where(func.coalesce(JobRun.heartbeat_at, JobRun.started_at)
+                   < now - timedelta(seconds=RUNNING_STALE_SECONDS))
+            .values(status=JobRunStatus.FAILED, finished_at=now,
+                    error=f"abandoned: 超过 {RUNNING_STALE_SECONDS} 秒没有心跳，执行实例可能已中断")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if abandoned:
+            logger.warning(f"定时任务 {job_id} 有 {abandoned} 条执行中的记录已失去心跳，标记为失败")
+        run_id = session.execute(
+            select(JobRun.id)
+            .where(JobRun.job_id == job_id)
+            .where(JobRun.status == JobRunStatus.RUNNING)
+            .order_by(JobRun.started_at.desc())
+            .limit(1)
+        ).scalar()
+        if run_id is not None:
+            session.commit()
+            return run_id, False
+        job_run = JobRun(job_id=job_id, worker=leader_elector.identity, progress={}, heartbeat_at=now)
+        session.add(job_run)
+        session.commit()
+        return job_run.id, True
+
+
+class RunHeartbeat:
+    """
+    在后台线程中每隔 RUNNING_HEARTBEAT_SECONDS 更新 job_run.heartbeat_at，任务结束（退出上下文）时停止
+
+    执行实例崩溃后心跳中断，下一次执行据此判断记录已失效
+    """
+
+    def __init__(self, run_id: int):
+        self.run_id = run_id
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-run-heartbeat-{run_id}", daemon=True)
+
+    def __enter__(self) -> "RunHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        # 不等待线程退出，避免在事件循环中阻塞；结束后迟到的一次心跳不影响执行状态
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(RUNNING_HEARTBEAT_SECONDS):
+            try:
+                with Session(job_engine) as session:
+                    session.execute(
+                        update(JobRun).where(JobRun.id == self.run_id).values(heartbeat_at=datetime.utcnow())
+                    )
+                    session.commit()
+            except Exception as e:
+                logger.warning(f"执行记录 {self.run_id} 写入心跳失败: {e}")
+
+
+class RunProgress:
+    """
+    执行进度计数器，任务调用 progress(name=value) 更新计数，每次更新写入 job_run.progress 供轮询
+
+    任务在线程池中执行，计数更新加锁，写库使用独立的短事务
+    """
+
+    def __init__(self, run_id: int):
+        self.run_id = run_id
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, **counters) -> None:
+        with self._lock:
+            self.counters.update(counters)
+            snapshot = dict(self.counters)
+        with Session(job_engine) as session:
+            session.execute(update(JobRun).where(JobRun.id == self.run_id).values(progress=snapshot))
+            session.commit()
+
+
+def finish_run(run_id: int, duration_ms: float, rows_processed: int | None = None, error: str | None = None):
+    with Session(job_engine) as session:
+        job_run = session.get(JobRun, run_id)
+        job_run.status = JobRunStatus.FAILED if error else JobRunStatus.SUCCESS
+        job_run.finished_at = datetime.utcnow()
+        job_run.duration_ms = round(duration_ms, 3)
+        job_run.rows_processed = rows_processed
+        job_run.error = error[-ERROR_MAX_LENGTH:] if error else None
+        session.commit()
+
+
+def _rows_processed(result) -> int | None:
+    """
+    任务返回整数时视为处理的行数
+    """
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return None
+
+
+def _should_skip(job_id: str, leader_only: bool) -> bool:
+    if leader_only and settings.SCHEDULER_LEADER_ELECTION and not leader_elector.is_leader:
+        logger.info(f"[{leader_elector.identity}] 非 leader，跳过定时任务 {job_id}")
+        return True
+    return False
+
+
+def _log_in_flight(job_id: str, run_id: int) -> None:
+    logger.info(f"定时任务 {job_id} 已有执行中的记录 {run_id}（手动触发或其他 worker），跳过本次调度")
+
+
+def _finish(job_id: str, run_id: int, started: float, stats: QueryStats, result=None,
+            error: str | None = None) -> None:
+    """
+    error 为异常堆栈，需在 except 块中获取后传入（_finish 可能在其他线程中执行）
+    """
+    duration_ms = (time.perf_counter() - started) * 1000
+    queries = f"{stats.count} 条 SQL，数据库耗时 {stats.duration_ms:.0f}ms"
+    warn_if_excessive(stats, f"定时任务 {job_id}")
+    if error:
+        logger.error(f"定时任务 {job_id} 执行失败，耗时 {duration_ms:.0f}ms，{queries}\n{error}")
+        finish_run(run_id, duration_ms, None, error)
+        return
+    rows_processed = _rows_processed(result)
+    logger.info(f"定时任务 {job_id} 执行完成，耗时 {duration_ms:.0f}ms，处理 {rows_processed} 行，{queries}")
+    finish_run(run_id, duration_ms, rows_processed)
+
+
+async def run_job(job_id: str, func_ref: str, leader_only: bool = False):
+    """
+    asyncio 执行器的任务入口
+
+    func_ref 是 module:function 形式的文本引用，保证任务可以序列化到数据库 job store；
+    leader_only=True 且开启选主时，非 leader 实例直接跳过且不记录执行历史；
+    同一任务已有执行中的记录（例如手动触发）时跳过本次调度。
+    """
+    if _should_skip(job_id, leader_only):
+        return None
+
+    target = ref_to_obj(func_ref)
+    run_id, created = await asyncio.to_thread(start_or_join_run, job_id)
+    if not created:
+        _log_in_flight(job_id, run_id)
+        return None
+    started = time.perf_counter()
+    try:
+        with track_queries() as stats, RunHeartbeat(run_id):
+            if asyncio.iscoroutinefunction(target):
+                result = await target()
+            else:
+                # 同步任务放到线程池中执行，避免阻塞事件循环
+                result = await asyncio.to_thread(target)
+    except Exception:
+        await asyncio.to_thread(_finish, job_id, run_id, started, stats, None,
+                                traceback.format_exc())
+        raise
+    await asyncio.to_thread(_finish, job_id, run_id, started, stats, result)
+    return result
+
+
+def run_job_sync(job_id: str, func_ref: str, leader_only: bool = False):
+    """
+    线程池 / 进程池执行器的任务入口，在执行器的工作线程或子进程中同步执行任务
+    """
+    if _should_skip(job_id, leader_only):
+        return None
+
+    target = ref_to_obj(func_ref)
+    run_id, created = start_or_join_run(job_id)
+    if not created:
+        _log_in_flight(job_id, run_id)
+        return None
+    started = time.perf_counter()
+    try:
+        with track_queries() as stats, RunHeartbeat(run_id):
+            result = target()
+    except Exception:
+        _finish(job_id, run_id, started, stats, None, traceback.format_exc())
+        raise
+    _finish(job_id, run_id, started, stats, result)
+    return result
+
+
+async def execute_run(job_id: str, run_id: int, func) -> None:
+    """
+    执行 start_or_join_run 登记的手动触发任务，由 BackgroundTasks 在响应返回后调用
+
+    func 需要接受 progress 参数；异常已记录到 job_run，不再向上抛出
+    """
+    progress = RunProgress(run_id)
+    started = time.perf_counter()
+    try:
+        with track_queries() as stats, RunHeartbeat(run_id):
+            if asyncio.iscoroutinefunction(func):
+                result = await func(progress=progress)
+            else:
+                result = await asyncio.to_thread(func, progress=progress)
+    except Exception:
+        await asyncio.to_thread(_finish, job_id, run_id, started, stats, None,
+                                traceback.format_exc())
+        return
+    await asyncio.to_thread(_finish, job_id, run_id, started, stats, result)
+
+
+def get_job_run(session, run_id: int) -> JobRunPublic | None:
+    job_run = session.get(JobRun, run_id)
+    return JobRunPublic.model_validate(job_run) if job_run else None
+
+
+def list_job_runs(session, job_id: str | None = None, status: JobRunStatus | None = None,
+                  limit: int = 50) -> list[JobRunPublic]:
+    """
+    最近的执行记录，按开始时间倒序
+    """
+    statement = select(JobRun).order_by(JobRun.started_at.desc()).limit(limit)
+    if job_id is not None:
+        statement = statement.where(JobRun.job_id == job_id)
+    if status is not None:
+        statement = statement.where(JobRun.status == status)
+    return [JobRunPublic.model_validate(job_run) for job_run in session.execute(statement).scalars().all()]
+
+
+def get_job_run_stats(session, days: int = 7) -> list[JobRunStats]:
+    """
+    按任务统计最近 days 天的执行次数、失败次数和耗时分位数，分位数只统计已结束的执行
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    statement = (
+        select(
+            JobRun.job_id,
+            func.count(),
+            func.count().filter(JobRun.status == JobRunStatus.FAILED),
+            func.percentile_cont(0.5).within_group(JobRun.duration_ms),
+            func.percentile_cont(0.95).within_group(JobRun.duration_ms),
+            func.max(JobRun.duration_ms),
+            func.max(JobRun.started_at),
+        )
+        .where(JobRun.started_at >= since)
+        .group_by(JobRun.job_id)
+        .order_by(JobRun.job_id)
+    )
+    return [
+        JobRunStats(
+            job_id=job_id,
+            runs=runs,
+            failures=failures,
+            p50_ms=p50_ms,
+            p95_ms=p95_ms,
+            max_ms=max_ms,
+            last_started_at=last_started_at,
+        )
+        for job_id, runs, failures, p50_ms, p95_ms, max_ms, last_started_at in session.execute(statement).all()
+    ]
@@ -0,0 +1,117 @@
+# Created by xdd at 2024/11/4
+import os
+import socket
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from config.logging_config import global_logger as logger
+
+
+class LeaderElector:
+    """
+    基于 PostgreSQL 会话级 advisory lock 的选主
+
+    每个 worker 启动一个心跳线程，按固定间隔尝试 pg_try_advisory_lock，拿到锁的 worker 成为 leader。
+    锁随数据库连接存在：leader 进程退出或连接断开时锁自动释放，其他 worker 在下一次心跳时接管。
+    leader 每次心跳在持锁连接上执行 SELECT 1 续约，连接异常时立即放弃 leader 身份。
+    """
+
+    def __init__(self, lock_key: int, heartbeat_seconds: float):
+        self.lock_key = lock_key
+        self.heartbeat_seconds = heartbeat_seconds
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        self._engine = None
+        self._connection = None
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._is_leader = False
+        self._listeners = []
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def add_listener(self, callback) -> None:
+        """
+        注册 leader 身份变化的回调，参数为是否成为 leader，在心跳线程中调用
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, is_leader: bool) -> None:
+        for callback in self._listeners:
+            try:
+                callback(is_leader)
+            except Exception as e:
+                logger.error(f"[{self.identity}] leader 身份变化回调异常: {e}")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.heartbeat_seconds)
+            self._thread = None
+        self._release()
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"[{self.identity}] 选主心跳异常: {e}")
+                self._release()
+            self._stop_event.wait(self.heartbeat_seconds)
+
+    def heartbeat(self) -> None:
+        """
+        leader 续约，非 leader 尝试抢锁
+        """
+        if self._is_leader:
+            self._connection.execute(text("SELECT 1"))
+            # 与抢锁一样提交，避免持锁连接在两次心跳之间停留在 idle in transaction
+            self._connection.commit()
+            return
+
+        if self._engine is None:
+            # 持锁连接独占一个数据库连接，不占用应用连接池
+            self._engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+        if self._connection is None:
+            self._connection = self._engine.connect()
+        acquired = self._connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+        ).scalar()
+        # 会话级 advisory lock 不随事务结束释放，提交只是为了不让连接停留在事务中
+        self._connection.commit()
+        if acquired:
+            self._is_leader = True
+            logger.info(f"[{self.identity}] 成为定时任务 leader")
+            self._notify(True)
+
+    def _release(self) -> None:
+        was_leader = self._is_leader
+        self._is_leader = False
+        if self._connection is not None:
+            try:
+                # 关闭连接即释放会话级 advisory lock
+                self._connection.close()
+            except Exception as e:
+                logger.warning(f"[{self.identity}] 关闭选主连接失败: {e}")
+            self._connection = None
+        if was_leader:
+            logger.info(f"[{self.identity}] 放弃定时任务 leader")
+            self._notify(False)
+
+
+leader_elector = LeaderElector(settings.SCHEDULER_LEADER_LOCK_KEY, settings.SCHEDULER_LEADER_HEARTBEAT_SECONDS)
+
@@ -1,16 +1,44 @@
-from datetime import datetime, timedelta
+import asyncio
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+from apscheduler.events import EVENT_JOB_SUBMITTED
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.jobstores.base import JobLookupError
+from apscheduler.util import obj_to_ref
 from config.logging_config import setup_logger
+from app.core.config import settings
+from app.core.db import job_engine
+from app.core.metrics import SCHEDULER_JOB_LAG
+from app.scheduler.job_run import run_job, run_job_sync
 import pytz
 
 logger = setup_logger()
 
 shanghai_tz = pytz.timezone('Asia/Shanghai')
 
+# APScheduler 持久化任务的表，由 SQLAlchemyJobStore 自行创建，不在 Alembic 管理范围内
+JOBSTORE_TABLE = "apscheduler_jobs"
+
+# 执行器：asyncio 在事件循环中执行协程任务，threadpool / processpool 执行同步任务
+EXECUTOR_ASYNCIO = "default"
+EXECUTOR_THREAD_POOL = "threadpool"
+EXECUTOR_PROCESS_POOL = "processpool"
+
+
+def observe_job_lag(event):
+    """
+    任务提交到执行器时记录与计划执行时间的差值，反映调度器积压和事件循环阻塞
+    """
+    now = datetime.now(timezone.utc)
+    for scheduled_run_time in event.scheduled_run_times:
+        SCHEDULER_JOB_LAG.labels(event.job_id).observe(max((now - scheduled_run_time).total_seconds(), 0))
+
 
 class TaskScheduler:
     _instance = None
@@ -18,11 +46,70 @@ class TaskScheduler:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(TaskScheduler, cls).__new__(cls)
-            cls._instance.scheduler = AsyncIOScheduler(timezone=shanghai_tz)
-            cls._instance.scheduler.start()
+            cls._instance.scheduler = AsyncIOScheduler(
+                timezone=shanghai_tz,
+                # 任务持久化到数据库，重启后保留下次执行时间，错过的执行合并为一次补跑
+                jobstores={'default': SQLAlchemyJobStore(engine=job_engine, tablename=JOBSTORE_TABLE)},
+                executors={
+                    EXECUTOR_ASYNCIO: AsyncIOExecutor(),
+                    EXECUTOR_THREAD_POOL: ThreadPoolExecutor(settings.SCHEDULER_THREAD_POOL_SIZE),
+                    # spawn 启动的子进程重新创建数据库连接池，不继承父进程的连接
+                    EXECUTOR_PROCESS_POOL: ProcessPoolExecutor(
+                        settings.SCHEDULER_PROCESS_POOL_SIZE,
+                        pool_kwargs={'mp_context': multiprocessing.get_context('spawn')},
+                    ),
+                },
+                # 同一任务同时只执行一个实例，错过的多次执行合并为一次补跑
+                job_defaults={
+                    'coalesce': True,
+                    'max_instances': 1,
+                    'misfire_grace_time': settings.SCHEDULER_MISFIRE_GRACE_SECONDS,
+                },
+            )
+            cls._instance.scheduler.add_listener(observe_job_lag, EVENT_JOB_SUBMITTED)
         return cls._instance
 
-    def add_job(self, func, trigger_type, **trigger_args):
+    def start(self, paused=False):
+        """
+        在应用启动时调用（需要运行中的事件循环）；开启选主时非 leader 实例以暂停状态启动，不处理 job store 中的任务
+        """
+        if not self.scheduler.running:
+            self.scheduler.start(paused=paused)
+
+    def shutdown(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def on_leader_change(self, is_leader):
+        """
+        leader 身份变化时恢复或暂停调度，同一时刻只有 leader 读写 job store 中的下次执行时间
+        """
+        if not self.scheduler.running:
+            return
+        if is_leader:
+            self.scheduler.resume()
+            logger.info("成为 leader，恢复定时任务调度")
+        else:
+            self.scheduler.pause()
+            logger.info("失去 leader，暂停定时任务调度")
+
+    def add_job(self, func, trigger_type, leader_only=False, job_id=None, executor=EXECUTOR_ASYNCIO,
+                max_instances=None, coalesce=None, misfire_grace_time=None, jitter=None, **trigger_args):
+        """
+        添加定时任务，func 必须是模块级函数，任务以 run_job + 函数引用的形式保存到 job store
+
+        job_id 默认为函数名；job store 中已有相同任务且触发器未变化时保留原任务及其下次执行时间，
+        只更新执行选项，否则覆盖。leader_only=True 时任务只在选主成功的实例上执行，多 worker/多副本部署时避免重复执行。
+
+        executor: asyncio（默认，协程任务）、threadpool 或 processpool（同步任务）；
+        max_instances / coalesce / misfire_grace_time 不传时使用调度器默认值；
+        jitter: interval / cron 触发器每次执行随机延后的最大秒数，避免多个任务同时触发
+        """
+        if executor not in (EXECUTOR_ASYNCIO, EXECUTOR_THREAD_POOL, EXECUTOR_PROCESS_POOL):
+            raise ValueError(f"Unsupported executor provided: {executor}")
+        if executor != EXECUTOR_ASYNCIO and asyncio.iscoroutinefunction(func):
+            raise ValueError(f"协程任务只能使用 asyncio 执行器: {func.__name__}")
+
         if 'trigger' in trigger_args:
             # 如果传递了触发器实例，直接使用它
             trigger = trigger_args['trigger']
@@ -35,14 +122,46 @@ class TaskScheduler:
             }
             trigger_class = trigger_classes.get(trigger_type)
             if not trigger_class:
-                raise ValueError("Unsupported trigger type provided: {}".format(trigger_type))
+                raise ValueError(f"Unsupported trigger type provided: {trigger_type}")
+            if jitter is not None:
+                if trigger_class is DateTrigger:
+                    raise ValueError("jitter is not supported by date trigger")
+                trigger_args['jitter'] = jitter
             trigger = trigger_class(**trigger_args)
 
+        job_id = job_id or func.__name__
+        # 进程池子进程中没有选主状态，由父进程中调度器的暂停/恢复保证只在 leader 上执行
+        args = [job_id, obj_to_ref(func), leader_only and executor != EXECUTOR_PROCESS_POOL]
+        runner = run_job if executor == EXECUTOR_ASYNCIO else run_job_sync
+        options = {'executor': executor}
+        for name, value in (('max_instances', max_instances), ('coalesce', coalesce),
+                            ('misfire_grace_time', misfire_grace_time)):
+            if value is not None:
+                options[name] = value
+
+        existing = self.scheduler.get_job(job_id) if self.scheduler.running else None
+        if existing is not None and self._same_schedule(existing, runner, trigger, args):
+            changes = {name: value for name, value in options.items() if getattr(existing, name) != value}
+            if changes:
+                existing = self.scheduler.modify_job(job_id, **changes)
+            logger.info(f"定时任务 {job_id} 已存在，保留下次执行时间 {existing.next_run_time}")
+            return existing
+
         try:
-            return self.scheduler.add_job(func, trigger)
+            return self.scheduler.add_job(runner, trigger, args=args, id=job_id, name=func.__name__,
+                                          replace_existing=True, **options)
         except OverflowError:
             logger.error(f"由于日期值超出范围而无法添加定时调度任务: {func} {trigger}")
 
+    @staticmethod
+    def _same_schedule(job, runner, trigger, args):
+        return (
+            job.func is runner
+            and list(job.args) == args
+            and str(job.trigger) == str(trigger)
+            and getattr(job.trigger, 'jitter', None) == getattr(trigger, 'jitter', None)
+        )
+
     def list_jobs(self):
         """
         Returns a list of all scheduled jobs with detailed information about each job.
@@ -54,7 +173,11 @@ class TaskScheduler:
                 'job_id': job.id,
                 'name': job.name,
                 'next_run_time': str(job.next_run_time),
-                'trigger': str(job.trigger)
+                'trigger': str(job.trigger),
+                'executor': job.executor,
+                'max_instances': job.max_instances,
+                'coalesce': job.coalesce,
+                'misfire_grace_time': job.misfire_grace_time,
             }
             jobs_info.append(job_details)
         return jobs_info
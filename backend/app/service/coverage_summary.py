@@ -0,0 +1,192 @@
+# Created by xdd at 2024/10/29
+from collections import Counter
+from datetime import date, datetime
+from itertools import groupby
+
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session
+
+from app.core.db import job_engine
+from app.models import (
+    COVERAGE_SNAPSHOT_UNIQUE_CONSTRAINT,
+    CoveragePoint,
+    GatherInterface,
+    ProjectCoverageHistory,
+    ProjectCoveragePublic,
+    ProjectCoverageSnapshot,
+    ProjectCoverageSummary,
+    ProjectNameMapping,
+)
+from config.logging_config import global_logger as logger
+
+# 维护 project_coverage_summary 表：写入路径只提交增量，不重新统计 gather_interface
+
+
+def apply_coverage_deltas(session, total_deltas=None, covered_deltas=None):
+    """
+    将每个项目的 total / covered 增量累加到汇总表中
+
+    total_deltas / covered_deltas: {project_name_mapping_id: 增量}，可以为负数。
+    所有项目合并为一条 INSERT ... ON CONFLICT DO UPDATE，不提交事务，由调用方与数据变更一起提交
+    """
+    total_deltas = total_deltas or {}
+    covered_deltas = covered_deltas or {}
+    values = [
+        {
+            "project_name_mapping_id": project_id,
+            "total": total_deltas.get(project_id, 0),
+            "covered": covered_deltas.get(project_id, 0),
+        }
+        for project_id in set(total_deltas) | set(covered_deltas)
+        if total_deltas.get(project_id, 0) or covered_deltas.get(project_id, 0)
+    ]
+    if not values:
+        return
+
+    statement = pg_insert(ProjectCoverageSummary).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ProjectCoverageSummary.project_name_mapping_id],
+        set_={
+            "total": ProjectCoverageSummary.total + statement.excluded.total,
+            "covered": ProjectCoverageSummary.covered + statement.excluded.covered,
+            "updated_at": datetime.utcnow(),
+        },
+    )
+    session.execute(statement)
+
+
+def apply_row_deltas(session, rows, sign=1):
+    """
+    根据受影响的 (project_name_mapping_id, is_active) 行计算增量并写入汇总表
+
+    sign=1 表示这些行加入统计，sign=-1 表示从统计中移除
+    """
+    total_deltas = Counter()
+    covered_deltas = Counter()
+    for project_id, is_active in rows:
+        total_deltas[project_id] += sign
+        if is_active:
+            covered_deltas[project_id] += sign
+    apply_coverage_deltas(session, total_deltas, covered_deltas)
+
+
+def refresh_coverage_summary(session):
+    """
+    按 gather_interface 全量重算汇总表，用于手动修复，不提交事务
+    """
+    session.execute(update(ProjectCoverageSummary).values(total=0, covered=0, updated_at=datetime.utcnow()))
+    counts = (
+        select(
+            GatherInterface.project_name_mapping_id,
+            func.count(),
+            func.count().filter(GatherInterface.is_active.is_(True)),
+        )
+        .where(GatherInterface.is_ignored.is_(False))
+        .group_by(GatherInterface.project_name_mapping_id)
+    )
+    statement = pg_insert(ProjectCoverageSummary).from_select(
+        ["project_name_mapping_id", "total", "covered"], counts
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[ProjectCoverageSummary.project_name_mapping_id],
+        set_={
+            "total": statement.excluded.total,
+            "covered": statement.excluded.covered,
+            "updated_at": datetime.utcnow(),
+        },
+    )
+    session.execute(statement)
+    logger.info("已全量重算项目覆盖率汇总表")
+
+
+def get_project_coverages(session) -> list[ProjectCoveragePublic]:
+    """
+    读取每个项目的覆盖率，只扫描项目表和汇总表
+    """
+    statement = (
+        select(
+            ProjectNameMapping.id,
+            ProjectNameMapping.name,
+            ProjectNameMapping.eureka_name,
+            ProjectNameMapping.upload_name,
+            func.coalesce(ProjectCoverageSummary.total, 0),
+            func.coalesce(ProjectCoverageSummary.covered, 0),
+        )
+        .outerjoin(ProjectCoverageSummary,
+                   ProjectCoverageSummary.project_name_mapping_id == ProjectNameMapping.id)
+        .order_by(ProjectNameMapping.name)
+    )
+    return [
+        ProjectCoveragePublic(
+            project_name_mapping_id=project_id,
+            name=name,
+            eureka_name=eureka_name,
+            upload_name=upload_name,
+            total=total,
+            covered=covered,
+            coverage=round(covered / total, 4) if total else 0.0,
+        )
+        for project_id, name, eureka_name, upload_name, total, covered in session.execute(statement).all()
+    ]
+
+
+def take_coverage_snapshot(snapshot_date: date | None = None):
+    """
+    将汇总表当前的数据写入每日快照表，供定时任务调用
+
+    一条 INSERT ... SELECT 完成，同一天重复执行时覆盖当天的快照
+    """
+    snapshot_date = snapshot_date or date.today()
+    with Session(job_engine) as session:
+        rows = select(
+            ProjectCoverageSummary.project_name_mapping_id,
+            literal(snapshot_date),
+            ProjectCoverageSummary.total,
+            ProjectCoverageSummary.covered,
+        )
+        statement = pg_insert(ProjectCoverageSnapshot).from_select(
+            ["project_name_mapping_id", "snapshot_date", "total", "covered"], rows
+        )
+        statement = statement.on_conflict_do_update(
+            constraint=COVERAGE_SNAPSHOT_UNIQUE_CONSTRAINT,
+            set_={
+                "total": statement.excluded.total,
+                "covered": statement.excluded.covered,
+                "created_at": datetime.utcnow(),
+            },
+        )
+        count = session.execute(statement).rowcount
+        session.commit()
+    logger.info(f"已写入 {snapshot_date} 的覆盖率快照，共 {count} 个项目")
+    return count
+
+
+def get_coverage_history(session, start: date, end: date, project_id=None) -> list[ProjectCoverageHistory]:
+    """
+    查询时间范围内的覆盖率快照，所有项目一次查询返回，按 (项目, 日期) 索引顺序读取
+    """
+    statement = (
+        select(
+            ProjectCoverageSnapshot.project_name_mapping_id,
+            ProjectCoverageSnapshot.snapshot_date,
+            ProjectCoverageSnapshot.total,
+            ProjectCoverageSnapshot.covered,
+        )
+        .where(ProjectCoverageSnapshot.snapshot_date >= start)
+        .where(ProjectCoverageSnapshot.snapshot_date <= end)
+        .order_by(ProjectCoverageSnapshot.project_name_mapping_id, ProjectCoverageSnapshot.snapshot_date)
+    )
+    if project_id is not None:
+        statement = statement.where(ProjectCoverageSnapshot.project_name_mapping_id == project_id)
+
+    return [
+        ProjectCoverageHistory(
+            project_name_mapping_id=project_name_mapping_id,
+            points=[
+                CoveragePoint(snapshot_date=snapshot_date, total=total, covered=covered)
+                for _, snapshot_date, total, covered in rows
+            ],
+        )
+        for project_name_mapping_id, rows in groupby(session.execute(statement).all(), key=lambda row: row[0])
+    ]
@@ -0,0 +1,121 @@
+# Created by xdd at 2024/11/12
+import csv
+import io
+import json
+import uuid
+import zlib
+from collections.abc import Iterator
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import ExportFormat, GatherInterface, ProjectNameMapping
+from config.logging_config import global_logger as logger
+
+# 流式导出未覆盖接口：服务端游标按批取数，每批编码后立即写出，内存占用与导出行数无关
+
+# 每批从游标取出的行数，也是每次写出的行数
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = ("id", "project", "url", "method", "description", "created_at", "updated_at")
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def uncovered_interfaces_query(project_id: uuid.UUID | None = None, method: str | None = None,
+                               url_prefix: str | None = None, include_ignored: bool = False):
+    """
+    未覆盖接口的查询，只选需要导出的列，不加载 ORM 对象
+    """
+    statement = (
+        select(
+            GatherInterface.id,
+            ProjectNameMapping.eureka_name.label("project"),
+            GatherInterface.url,
+            GatherInterface.method,
+            GatherInterface.description,
+            GatherInterface.created_at,
+            GatherInterface.updated_at,
+        )
+        .join(ProjectNameMapping, GatherInterface.project_name_mapping_id == ProjectNameMapping.id)
+        .where(GatherInterface.is_active.is_not(True))
+        .order_by(GatherInterface.project_name_mapping_id, GatherInterface.id)
+    )
+    if project_id is not None:
+        statement = statement.where(GatherInterface.project_name_mapping_id == project_id)
+    if method is not None:
+        statement = statement.where(GatherInterface.method == method.upper())
+    if url_prefix:
+        statement = statement.where(GatherInterface.url.startswith(url_prefix, autoescape=True))
+    if not include_ignored:
+        statement = statement.where(GatherInterface.is_ignored.is_(False))
+    return statement
+
+
+def _iter_batches(statement, bind) -> Iterator[list]:
+    """
+    yield_per 在 psycopg 上使用服务端命名游标，每次只从数据库取一批
+    """
+    with Session(bind) as session:
+        result = session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        rows = 0
+        for partition in result.partitions():
+            rows += len(partition)
+            yield partition
+        logger.info(f"导出未覆盖接口 {rows} 条")
+
+
+def _encode_csv(batches: Iterator[list]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(
+            [row.id, row.project, row.url, row.method, row.description,
+             row.created_at.isoformat(), row.updated_at.isoformat()]
+            for row in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # 没有数据时也要写出表头
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_ndjson(batches: Iterator[list]) -> Iterator[str]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row, strict=True)), ensure_ascii=False, default=_json_default) + "\n"
+            for row in batch
+        )
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_uncovered_interfaces(statement, export_format: ExportFormat, compress: bool = False,
+                                bind=None) -> Iterator[bytes]:
+    """
+    按格式编码查询结果，compress 为 True 时输出 gzip 流；bind 为执行查询的引擎，默认主库
+    """
+    encode = _encode_csv if export_format == ExportFormat.CSV else _encode_ndjson
+    chunks = (text.encode("utf-8") for text in encode(_iter_batches(statement, bind or engine)))
+    return _gzip(chunks) if compress else chunks
@@ -1,123 +1,286 @@
 # Created by xdd at 2024/6/5
+import asyncio
 import uuid
-from typing import Dict, Set
-import requests
-from app.models import IgnoreInterface, ReportRUI, GatherInterface, TransactionLog, ActionEnum, ProjectNameMapping, \
-    UploadInterface
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Set, Tuple
+from app.models import ReportRUI, GatherInterface, TransactionLog, ActionEnum, ProjectNameMapping, \
+    UploadInterface, GATHER_INTERFACE_UNIQUE_CONSTRAINT, UPLOAD_INTERFACE_UNIQUE_CONSTRAINT
 from config.logging_config import global_logger as logger
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
-from app.core.db import engine
+from app.core.db import job_engine
+from app.core.http_cache import notify_table_changed
+from app.core.metrics import count_rows, observe_phase
+from app.service.coverage_summary import apply_coverage_deltas, apply_row_deltas, refresh_coverage_summary
+from app.service.ignore_matcher import get_ignore_matcher, rule_condition
+from app.service.uri_template import is_template, load_template_tries
+from app.service.project_cache import EUREKA_NAME, UPLOAD_NAME, project_cache
+from app.service.prometheus import prometheus
 
 # 采集 Actuator + Prometheus 中的数据，保存到数据库中
 
-SessionLocal = sessionmaker(bind=engine)
+SessionLocal = sessionmaker(bind=job_engine)
 
-# 内存缓存
-project_mapping_cache = {}
+# 批量写入时每条 INSERT 语句携带的行数
+BULK_CHUNK_SIZE = 1000
 
+def _no_progress(**_counters):
+    pass
 
-def get_or_create_project_name(session, application_name):
+
+def get_or_create_project_id(session, application_name) -> uuid.UUID:
     """
-    查询或创建 ProjectNameMapping 实例
+    按 eureka_name 查询或创建项目，返回项目 id
     """
-    if application_name in project_mapping_cache:
-        return project_mapping_cache[application_name]
-
-    project_name_mapping = session.execute(
-        select(ProjectNameMapping).where(ProjectNameMapping.eureka_name == application_name)
-    ).scalar()
-
-    if not project_name_mapping:
-        project_name_mapping = ProjectNameMapping(eureka_name=application_name)
-        session.add(project_name_mapping)
+    project_id = project_cache.get(EUREKA_NAME, application_name)
+    if project_id is not None:
+        return project_id
+
+    statement = select(ProjectNameMapping.id).where(ProjectNameMapping.eureka_name == application_name)
+    project_id = session.execute(statement).scalar()
+
+    if project_id is None:
+        # eureka_name 有唯一索引，多个进程同时创建同一项目时只有一条插入成功，其余直接查询已有记录
+        now = datetime.utcnow()
+        inserted = session.execute(
+            pg_insert(ProjectNameMapping)
+            .values(id=uuid.uuid4(), eureka_name=application_name, created_at=now, updated_at=now)
+            .on_conflict_do_nothing(index_elements=[ProjectNameMapping.eureka_name])
+            .returning(ProjectNameMapping.id)
+        ).scalar()
+        if inserted is not None:
+            notify_table_changed(session, ProjectNameMapping.__tablename__)
         session.commit()
-        logger.info(f"Added new ProjectNameMapping for {application_name}")
+        if inserted is not None:
+            logger.info(f"Added new ProjectNameMapping for {application_name}")
+        project_id = session.execute(statement).scalar_one()
 
-    project_mapping_cache[application_name] = project_name_mapping
-    return project_name_mapping
+    project_cache.set(EUREKA_NAME, application_name, project_id)
+    return project_id
 
 
-def query_prometheus(query_param="http_server_requests_seconds_count"):
+def get_project_ids_by_upload_names(session, upload_names) -> dict[str, uuid.UUID]:
+    """
+    返回 {upload_name: 项目 id}，只包含已关联项目的名称，缓存未命中的名称一次查询
     """
-    从 Prometheus 查询微服务的接口信息并保存到 GatherInterface 表中
+    project_ids = {}
+    missing = []
+    for name in upload_names:
+        project_id = project_cache.get(UPLOAD_NAME, name)
+        if project_id is None:
+            missing.append(name)
+        else:
+            project_ids[name] = project_id
+    if missing:
+        for name, project_id in session.execute(
+            select(ProjectNameMapping.upload_name, ProjectNameMapping.id)
+            .where(ProjectNameMapping.upload_name.in_(missing))
+        ).all():
+            project_cache.set(UPLOAD_NAME, name, project_id)
+            project_ids[name] = project_id
+    return project_ids
+
+
+async def query_prometheus(query_param="http_server_requests_seconds_count", progress=None):
+    """
+    从 Prometheus 查询微服务的接口信息并保存到 GatherInterface 表中，返回新增的接口数
+
+    progress: 可选的进度回调，按阶段上报计数，手动触发时用于轮询进度
     """
-    prometheus_url = "http://itest-qtrack.jetmobo.com"
-    url = f"{prometheus_url}/api/v1/query?query={query_param}"
-    logger.info(f"url: {url}")
-    response = requests.get(url)
-    response.raise_for_status()  # 检查请求是否成功
-    data = response.json()
+    with observe_phase("query_prometheus", "fetch"):
+        results = await prometheus.query(query_param)
+    # 入库是同步的数据库操作，放到线程池中执行，避免阻塞事件循环
+    return await asyncio.to_thread(save_gather_interfaces, results, progress)
 
-    results = data.get('data', {}).get('result', [])
 
+def save_gather_interfaces(results, progress=None):
+    """
+    将 Prometheus 查询结果中新出现的接口保存到 GatherInterface 表中，返回新增的接口数
+    """
+    progress = progress or _no_progress
+    progress(series=len(results))
     with SessionLocal() as session:
-        new_entries = []
-        entries_count_by_name = {}
         batch_id = str(uuid.uuid4())  # 生成批次号
-
-        for result in results:
-            metric = result.get('metric', {})
-            application_name = str(metric.get('application', '')).lower()
-            uri = metric.get('uri', '')
-            if uri.startswith('/api'):
-                project_name_mapping = get_or_create_project_name(session, application_name)
-
-                if not check_if_gather_interface_exists(session, project_name_mapping.id, uri,
-                                                        metric.get('method', '')):
-                    gather_interface = GatherInterface(
-                        url=uri,
-                        project_name_mapping_id=project_name_mapping.id,
-                        method=metric.get('method', ''),
-                        is_active=False  # 默认设置为未实现自动化
-                    )
-                    new_entries.append(gather_interface)
-                    if application_name in entries_count_by_name:
-                        entries_count_by_name[application_name] += 1
-                    else:
-                        entries_count_by_name[application_name] = 1
-
-        if new_entries:
-            session.bulk_save_objects(new_entries)
-            session.commit()
-            logger.info(f"已将 {len(new_entries)} 条记录保存到 GatherInterface。")
+        ignore_matcher = get_ignore_matcher(session)
+        # (project_name_mapping_id, url, method) -> application_name，同一接口的多条序列只保留一份
+        entries: Dict[Tuple[uuid.UUID, str, str], str] = {}
+        ignored_uris: Set[str] = set()
+
+        with observe_phase("query_prometheus", "match"):
+            for result in results:
+                metric = result.get('metric', {})
+                application_name = str(metric.get('application', '')).lower()
+                uri = metric.get('uri', '')
+                if uri.startswith('/api'):
+                    # 命中过滤规则的接口（actuator、健康检查、内部接口等）不入库
+                    if uri in ignored_uris or ignore_matcher.match(uri):
+                        ignored_uris.add(uri)
+                        continue
+                    project_id = get_or_create_project_id(session, application_name)
+                    entries[(project_id, uri, metric.get('method', ''))] = application_name
+
+        if ignored_uris:
+            logger.info(f"过滤规则命中 {len(ignored_uris)} 个接口，已跳过。")
+        with observe_phase("query_prometheus", "insert"):
+            inserted_rows = bulk_insert_gather_interfaces(session, list(entries))
+        count_rows("query_prometheus", inserted=len(inserted_rows), skipped=len(entries) - len(inserted_rows),
+                   ignored=len(ignored_uris))
+        progress(interfaces=len(entries), ignored=len(ignored_uris), inserted=len(inserted_rows))
+
+        if inserted_rows:
+            logger.info(f"收到 {len(entries)} 个接口，已将 {len(inserted_rows)} 条新记录保存到 GatherInterface。")
+
+            # 新增的接口计入项目覆盖率汇总
+            apply_coverage_deltas(session, total_deltas=Counter(
+                project_name_mapping_id for project_name_mapping_id, _, _ in inserted_rows
+            ))
+
+            # 按 RETURNING 返回的行统计每个系统新增的数量
+            entries_count_by_name = Counter(entries[tuple(row)] for row in inserted_rows)
 
             # 记录流水信息
-            for name, count in entries_count_by_name.items():
-                details = f"系统：{name}，新增 {count} 条新记录。"
-                transaction_log = TransactionLog(
+            session.add_all([
+                TransactionLog(
                     action=ActionEnum.QUERY,
                     name=name,
                     count=count,
                     batch_id=batch_id,
-                    details=details
+                    details=f"系统：{name}，新增 {count} 条新记录。"
                 )
-                session.add(transaction_log)
-            session.commit()  # 确保流水日志也被保存
+                for name, count in entries_count_by_name.items()
+            ])
+            # 新增的接口可能是模板，各 worker 缓存的模板前缀树需要重新加载
+            notify_table_changed(session, GatherInterface.__tablename__)
+            session.commit()  # 新记录、汇总增量和流水日志在同一事务中提交
+
+            # 新采集到的模板接口可能覆盖已有的具体路径上报记录，先重新归一化
+            with observe_phase("query_prometheus", "normalize"):
+                normalize_upload_templates(session, {
+                    project_name_mapping_id for project_name_mapping_id, url, _ in inserted_rows if is_template(url)
+                })
+            # 新采集到的接口可能已有对应的上报记录，增量更新它们的覆盖状态
+            with observe_phase("query_prometheus", "coverage"):
+                covered = update_coverage(session, gather_keys=[tuple(row) for row in inserted_rows])
+            progress(covered=covered)
         else:
-            logger.info("没有要保存的新数据。")
+            session.commit()
+            logger.info(f"收到 {len(entries)} 个接口，没有要保存的新数据。")
+        return len(inserted_rows)
 
 
-def check_if_gather_interface_exists(session, project_name_mapping_id, url, method):
+def bulk_insert_on_conflict_do_nothing(session, model, constraint, values, returning):
     """
-    检查指定的 GatherInterface 是否已存在于数据库中
+    分批执行 INSERT ... ON CONFLICT ON CONSTRAINT ... DO NOTHING ... RETURNING
+
+    每 BULK_CHUNK_SIZE 行一条语句，已存在的记录由唯一约束跳过，返回真正新增的行；
+    语句条数只与数据量/批大小有关，与表中已有数据量无关。调用方负责提交事务
     """
-    # 构建查询语句，检查具有相同 project_name_mapping_id, url, 和 method 的记录是否存在
-    exists = session.execute(
-        select(GatherInterface).where(
-            GatherInterface.project_name_mapping_id == project_name_mapping_id,
-            GatherInterface.url == url,
-            GatherInterface.method == method
+    inserted_rows = []
+    for start in range(0, len(values), BULK_CHUNK_SIZE):
+        statement = (
+            pg_insert(model)
+            .values(values[start:start + BULK_CHUNK_SIZE])
+            .on_conflict_do_nothing(constraint=constraint)
+            .returning(*returning)
         )
-    ).first() is not None
-    return exists
+        inserted_rows.extend(session.execute(statement).all())
+    return inserted_rows
 
 
-def get_ignore_list(session):
-    statement = select(IgnoreInterface.uri)
-    ignore_list = session.execute(statement).scalars().all()
-    logger.info(f"len: {len(ignore_list)}, data: {ignore_list}")
-    return ignore_list
+def bulk_insert_gather_interfaces(session, keys):
+    """
+    按 (project_name_mapping_id, url, method) 批量写入 GatherInterface，返回新增的键
+    """
+    return bulk_insert_on_conflict_do_nothing(
+        session,
+        GatherInterface,
+        GATHER_INTERFACE_UNIQUE_CONSTRAINT,
+        [
+            {
+                "project_name_mapping_id": project_name_mapping_id,
+                "url": url,
+                "method": method,
+                "is_active": False,  # 默认设置为未实现自动化
+            }
+            for project_name_mapping_id, url, method in keys
+        ],
+        (GatherInterface.project_name_mapping_id, GatherInterface.url, GatherInterface.method),
+    )
+
+
+def bulk_insert_upload_interfaces(session, entries, template_urls=None):
+    """
+    按 (name, url, method) 批量写入 UploadInterface，返回新增的键
+
+    entries: {(name, url, method): description}
+    template_urls: {(name, url): 归一化后的模板}，缺省时模板与 url 相同
+    """
+    template_urls = template_urls or {}
+    return bulk_insert_on_conflict_do_nothing(
+        session,
+        UploadInterface,
+        UPLOAD_INTERFACE_UNIQUE_CONSTRAINT,
+        [
+            {
+                "name": name,
+                "url": url,
+                "method": method,
+                "description": description,
+                "template_url": template_urls.get((name, url), url),
+            }
+            for (name, url, method), description in entries.items()
+        ],
+        (UploadInterface.name, UploadInterface.url, UploadInterface.method),
+    )
+
+
+def match_upload_templates(session, entries):
+    """
+    将上报的具体路径匹配到对应项目的采集模板，返回 {(name, url): template}，只包含匹配成功的路径
+    """
+    tries = load_template_tries(session, {name for name, _, _ in entries})
+    template_urls = {}
+    for name, url, _ in entries:
+        trie = tries.get(name)
+        template = trie.match(url) if trie else None
+        if template is not None:
+            template_urls[(name, url)] = template
+    return template_urls
+
+
+def normalize_upload_templates(session, project_ids):
+    """
+    项目新增模板接口后，把该项目尚未归一化（template_url 与 url 相同）的上报记录重新匹配模板
+    """
+    if not project_ids:
+        return 0
+    upload_names = session.execute(
+        select(ProjectNameMapping.upload_name)
+        .where(ProjectNameMapping.id.in_(list(project_ids)))
+        .where(ProjectNameMapping.upload_name.is_not(None))
+    ).scalars().all()
+    tries = load_template_tries(session, set(upload_names))
+    if not tries:
+        return 0
+
+    candidates = session.execute(
+        select(UploadInterface.id, UploadInterface.name, UploadInterface.url)
+        .where(UploadInterface.name.in_(list(tries)))
+        .where(UploadInterface.template_url == UploadInterface.url)
+    ).all()
+    changes = []
+    for upload_id, name, url in candidates:
+        template = tries[name].match(url)
+        if template is not None and template != url:
+            changes.append({"id": upload_id, "template_url": template})
+    for start in range(0, len(changes), BULK_CHUNK_SIZE):
+        # 按主键的 ORM 批量更新，以 executemany 方式执行
+        session.execute(update(UploadInterface), changes[start:start + BULK_CHUNK_SIZE])
+    session.commit()
+    logger.info(f"重新归一化 {len(changes)} 条上报记录的接口模板")
+    return len(changes)
 
 
 def get_project_mapping_list():
@@ -130,45 +293,38 @@ def get_project_mapping_list():
 
 
 def upload_uris(data: ReportRUI, session):
-    ignore_list = get_ignore_list(session)
-    new_entries = []
-    received_count = 0
-    new_entries_count_by_name: Dict[str, int] = {}
-    seen_urls: Set[str] = set()
-
-    for data_uri_item in data.data:
-        for uri_item in data_uri_item.url_list:
-            if uri_item.url in seen_urls:
-                continue
-
-            seen_urls.add(uri_item.url)
-            received_count += 1
-
-            if uri_item.url not in ignore_list:
-                existing_entry = session.execute(
-                    select(UploadInterface)
-                    .where(UploadInterface.url == uri_item.url)
-                    .where(UploadInterface.name == data_uri_item.name)
-                ).scalars().first()
-
-                if not existing_entry:
-                    new_entry = UploadInterface(
-                        url=uri_item.url,
-                        name=data_uri_item.name,
-                        method=uri_item.method,
-                        description=uri_item.description,
-                        is_active=True
-                    )
-                    new_entries.append(new_entry)
-                    if data_uri_item.name in new_entries_count_by_name:
-                        new_entries_count_by_name[data_uri_item.name] += 1
-                    else:
-                        new_entries_count_by_name[data_uri_item.name] = 1
-
-    if new_entries:
-        session.bulk_save_objects(new_entries)
-        session.commit()
-        logger.info(f"已收到 {received_count} 条记录，新增 {len(new_entries)} 条记录保存到数据库。")
+    ignore_matcher = get_ignore_matcher(session)
+    # (name, url, method) -> description，同一批次内重复上报的接口只保留一份
+    entries: Dict[Tuple[str, str, str], str | None] = {}
+    seen_keys: Set[Tuple[str, str, str]] = set()
+
+    with observe_phase("upload_uris", "match"):
+        for data_uri_item in data.data:
+            for uri_item in data_uri_item.url_list:
+                if not uri_item.url:
+                    continue
+                key = (data_uri_item.name, uri_item.url, uri_item.method or '')
+                if key in seen_keys:
+                    continue
+
+                seen_keys.add(key)
+                if not ignore_matcher.match(uri_item.url):
+                    entries[key] = uri_item.description
+
+    received_count = len(seen_keys)
+    # 没有关联项目的上报名称不需要匹配模板，也不会影响覆盖率
+    mapped_names = set(get_project_ids_by_upload_names(session, {name for name, _, _ in entries}))
+    mapped_keys = [key for key in entries if key[0] in mapped_names]
+    with observe_phase("upload_uris", "normalize"):
+        template_urls = match_upload_templates(session, mapped_keys)
+    with observe_phase("upload_uris", "insert"):
+        inserted_rows = bulk_insert_upload_interfaces(session, entries, template_urls)
+    count_rows("upload_uris", inserted=len(inserted_rows), skipped=len(entries) - len(inserted_rows),
+               ignored=received_count - len(entries))
+    new_entries_count_by_name = Counter(name for name, _, _ in inserted_rows)
+
+    if inserted_rows:
+        logger.info(f"已收到 {received_count} 条记录，新增 {len(inserted_rows)} 条记录保存到数据库。")
         for name, count in new_entries_count_by_name.items():
             logger.info(f"系统：{name}，新增 {count} 条新记录。")
     else:
@@ -176,41 +332,163 @@ def upload_uris(data: ReportRUI, session):
 
     # 记录流水信息
     batch_id = str(uuid.uuid4())  # 生成批次号
-    for name, count in new_entries_count_by_name.items():
-        details = f"系统：{name}，新增 {count} 条新记录。"
-        transaction_log = TransactionLog(
+    session.add_all([
+        TransactionLog(
             action=ActionEnum.UPLOAD,
             name=name,
             count=count,
             batch_id=batch_id,
-            details=details
+            details=f"系统：{name}，新增 {count} 条新记录。"
         )
-        session.add(transaction_log)
+        for name, count in new_entries_count_by_name.items()
+    ])
 
     session.commit()
-    update_coverage(session)
-
-
-def update_coverage(session):
-    # 查询所有的 UploadInterface 条目
-    upload_interfaces = session.execute(select(UploadInterface)).scalars().all()
-
-    # 遍历 UploadInterface 条目
-    for upload in upload_interfaces:
-        # 使用 ProjectNameMapping 表来找到对应的 GatherInterface 条目
-        # 这假设 `upload.name` 与 `ProjectNameMapping.upload_name` 相关联
-        gather_interfaces = session.execute(
-            select(GatherInterface).join(ProjectNameMapping)
-            .where(ProjectNameMapping.upload_name == upload.name)
-            .where(GatherInterface.url == upload.url)
-            .where(GatherInterface.method == upload.method)
-        ).scalars().all()
-
-        # 如果找到对应的 GatherInterface 条目，更新它们的 is_active 字段
-        for gather_interface in gather_interfaces:
-            logger.info(f"gather_interface: {gather_interface}")
-            gather_interface.is_active = True
-            session.add(gather_interface)
+    # 增量模式：只处理本批次上报的接口
+    if mapped_keys:
+        with observe_phase("upload_uris", "coverage"):
+            update_coverage(session, upload_keys=mapped_keys)
+
+
+def update_coverage(session, upload_keys=None, gather_keys=None):
+    """
+    根据上报记录更新 GatherInterface 的自动化覆盖状态
 
+    上报记录按归一化后的 template_url 与采集接口关联。
+    默认全量重算，只执行一条 UPDATE gather_interface ... FROM upload_interface, project_name_mapping；
+    传入 upload_keys [(name, url, method)] 或 gather_keys [(project_name_mapping_id, url, method)]
+    时为增量模式，只处理本批次涉及的接口，每 BULK_CHUNK_SIZE 个键一条语句。
+    新覆盖的接口按项目累加到覆盖率汇总表，返回被标记为已覆盖的记录数
+    """
+    # 这假设 `upload.name` 与 `ProjectNameMapping.upload_name` 相关联
+    statement = (
+        update(GatherInterface)
+        .where(GatherInterface.project_name_mapping_id == ProjectNameMapping.id)
+        .where(ProjectNameMapping.upload_name == UploadInterface.name)
+        .where(GatherInterface.url == UploadInterface.template_url)
+        .where(GatherInterface.method == UploadInterface.method)
+        .where(GatherInterface.is_active.is_not(True))
+        .values(is_active=True, updated_at=datetime.utcnow())
+        .returning(GatherInterface.project_name_mapping_id, GatherInterface.is_ignored)
+        .execution_options(synchronize_session=False)
+    )
+
+    if upload_keys is None and gather_keys is None:
+        updated_rows = session.execute(statement).all()
+    else:
+        filters = []
+        if upload_keys:
+            upload_keys = list(upload_keys)
+            filters.extend(
+                tuple_(UploadInterface.name, UploadInterface.url, UploadInterface.method)
+                .in_(upload_keys[start:start + BULK_CHUNK_SIZE])
+                for start in range(0, len(upload_keys), BULK_CHUNK_SIZE)
+            )
+        if gather_keys:
+            gather_keys = list(gather_keys)
+            filters.extend(
+                tuple_(GatherInterface.project_name_mapping_id, GatherInterface.url, GatherInterface.method)
+                .in_(gather_keys[start:start + BULK_CHUNK_SIZE])
+                for start in range(0, len(gather_keys), BULK_CHUNK_SIZE)
+            )
+        updated_rows = [row for condition in filters for row in session.execute(statement.where(condition)).all()]
+
+    apply_coverage_deltas(session, covered_deltas=Counter(
+        project_name_mapping_id for project_name_mapping_id, is_ignored in updated_rows if not is_ignored
+    ))
     # 提交所有更改
     session.commit()
+    logger.info(f"更新自动化覆盖状态，新增覆盖 {len(updated_rows)} 条接口。")
+    return len(updated_rows)
+
+
+def recompute_coverage(progress=None):
+    """
+    全量重算自动化覆盖状态和项目覆盖率汇总表，返回新增覆盖的接口数
+    """
+    progress = progress or _no_progress
+    with SessionLocal() as session:
+        covered = update_coverage(session)
+        progress(covered=covered)
+        refresh_coverage_summary(session)
+        session.commit()
+        progress(summary_refreshed=1)
+    return covered
+
+
+def apply_ignore_rule(match_type, pattern):
+    """
+    新增过滤规则后的后台任务：将命中的已有采集接口标记为已过滤，并从覆盖率汇总中扣除
+
+    按主键分批处理，每批单独提交，避免长时间锁住 gather_interface
+    """
+    ignored_count = 0
+    last_id = 0
+    with SessionLocal() as session:
+        while True:
+            ids = session.execute(
+                select(GatherInterface.id)
+                .where(GatherInterface.id > last_id)
+                .where(GatherInterface.is_ignored.is_(False))
+                .where(rule_condition(GatherInterface.url, match_type, pattern))
+                .order_by(GatherInterface.id)
+                .limit(BULK_CHUNK_SIZE)
+            ).scalars().all()
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            ignored_rows = session.execute(
+                update(GatherInterface)
+                .where(GatherInterface.id.in_(ids))
+                .where(GatherInterface.is_ignored.is_(False))
+                .values(is_ignored=True)
+                .returning(GatherInterface.project_name_mapping_id, GatherInterface.is_active)
+                .execution_options(synchronize_session=False)
+            ).all()
+            apply_row_deltas(session, ignored_rows, sign=-1)
+            session.commit()
+            ignored_count += len(ignored_rows)
+    logger.info(f"过滤规则 {match_type}:{pattern} 命中 {ignored_count} 条已有采集接口")
+    return ignored_count
+
+
+def revert_ignore_rule(match_type, pattern):
+    """
+    过滤规则修改后的后台任务：原规则命中且不再被当前任何规则命中的采集接口恢复计入覆盖率汇总
+
+    与 apply_ignore_rule 一样按主键分批处理，每批单独提交
+    """
+    restored_count = 0
+    last_id = 0
+    with SessionLocal() as session:
+        matcher = get_ignore_matcher(session)
+        while True:
+            candidates = session.execute(
+                select(GatherInterface.id, GatherInterface.url)
+                .where(GatherInterface.id > last_id)
+                .where(GatherInterface.is_ignored.is_(True))
+                .where(rule_condition(GatherInterface.url, match_type, pattern))
+                .order_by(GatherInterface.id)
+                .limit(BULK_CHUNK_SIZE)
+            ).all()
+            if not candidates:
+                break
+            last_id = candidates[-1][0]
+
+            restore_ids = [gather_id for gather_id, url in candidates if not matcher.match(url)]
+            if not restore_ids:
+                continue
+            restored_rows = session.execute(
+                update(GatherInterface)
+                .where(GatherInterface.id.in_(restore_ids))
+                .where(GatherInterface.is_ignored.is_(True))
+                .values(is_ignored=False)
+                .returning(GatherInterface.project_name_mapping_id, GatherInterface.is_active)
+                .execution_options(synchronize_session=False)
+            ).all()
+            apply_row_deltas(session, restored_rows, sign=1)
+            session.commit()
+            restored_count += len(restored_rows)
+    logger.info(f"过滤规则 {match_type}:{pattern} 已失效，恢复 {restored_count} 条采集接口")
+    return restored_count
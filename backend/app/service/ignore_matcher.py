@@ -0,0 +1,181 @@
+# Created by xdd at 2024/10/31
+import re
+import threading
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.exc import DBAPIError
+
+from app.models import IgnoreInterface, IgnoreMatchType
+from config.logging_config import global_logger as logger
+
+# 过滤规则匹配器：所有规则编译成一个匹配器，进程内缓存，规则表变化时才重建
+
+_TERMINAL = object()
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    将 glob 转换为正则，* 匹配任意字符（包括 /），? 匹配单个字符；
+    生成的正则同时兼容 Python re 和 PostgreSQL ~ 运算符
+    """
+    parts = []
+    for char in pattern:
+        if char == '*':
+            parts.append('.*')
+        elif char == '?':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+def rule_regex(match_type: str, pattern: str) -> str | None:
+    """
+    glob / regex 规则对应的正则（整串匹配），exact / prefix 规则返回 None
+    """
+    if match_type == IgnoreMatchType.GLOB:
+        return glob_to_regex(pattern)
+    if match_type == IgnoreMatchType.REGEX:
+        return pattern
+    return None
+
+
+def validate_rule(match_type: str, pattern: str, session=None) -> None:
+    """
+    校验规则，失败时抛出 ValueError
+
+    正则需要同时能被 Python re（匹配器）和 PostgreSQL（rule_condition 批量生效）编译，
+    传入 session 时在 savepoint 中用 PostgreSQL 再编译一次，例如 (?P<name>...) 只有 Python 支持；
+    空的 prefix 规则会匹配所有接口，不允许添加
+    """
+    if match_type == IgnoreMatchType.PREFIX and not pattern:
+        raise ValueError("prefix 规则不能为空")
+    regex = rule_regex(match_type, pattern)
+    if regex is None:
+        return
+    try:
+        re.compile(regex)
+    except re.error as e:
+        raise ValueError(f"无效的正则表达式: {pattern}, {e}")
+    if session is not None:
+        try:
+            with session.begin_nested():
+                session.execute(select(literal("").regexp_match(_anchored(regex))))
+        except DBAPIError as e:
+            raise ValueError(f"PostgreSQL 不支持该正则表达式: {pattern}, {e.orig}")
+
+
+def _anchored(regex: str) -> str:
+    return f"^(?:{regex})$"
+
+
+def rule_condition(column, match_type: str, pattern: str):
+    """
+    生成与规则等价的 SQL 条件，用于对已有数据批量生效
+    """
+    if match_type == IgnoreMatchType.PREFIX:
+        return column.startswith(pattern, autoescape=True)
+    regex = rule_regex(match_type, pattern)
+    if regex is not None:
+        return column.regexp_match(_anchored(regex))
+    return column == pattern
+
+
+class IgnoreMatcher:
+    """
+    编译后的过滤规则匹配器
+
+    exact 规则放在 set 中，prefix 规则放在字符前缀树中，glob / regex 规则合并成一个正则，
+    每个 URI 只需一次哈希查找、一次沿 URI 的前缀树遍历和一次正则匹配。
+    合并后捕获组会重新编号，\\1 这类反向引用会指向其他规则的组，(?i) 这类全局标志也不能出现在中间，
+    带捕获组或全局标志的规则单独编译，逐条匹配。
+    """
+
+    def __init__(self, rules):
+        self._exact = set()
+        self._prefix_trie = {}
+        self._prefix_count = 0
+        regexes = []
+        self._standalone: list[re.Pattern] = []
+        for match_type, pattern in rules:
+            if match_type == IgnoreMatchType.PREFIX:
+                self._add_prefix(pattern)
+            elif match_type in (IgnoreMatchType.GLOB, IgnoreMatchType.REGEX):
+                regex = rule_regex(match_type, pattern)
+                compiled = re.compile(regex)
+                if compiled.groups or compiled.flags & ~re.UNICODE:
+                    self._standalone.append(compiled)
+                else:
+                    regexes.append(regex)
+            else:
+                self._exact.add(pattern)
+        self._regex = re.compile("|".join(f"(?:{regex})" for regex in regexes)) if regexes else None
+        self.rule_count = len(self._exact) + len(regexes) + len(self._standalone) + self._prefix_count
+
+    def _add_prefix(self, prefix: str) -> None:
+        node = self._prefix_trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = True
+        self._prefix_count += 1
+
+    def _match_prefix(self, uri: str) -> bool:
+        node = self._prefix_trie
+        if _TERMINAL in node:
+            return True
+        for char in uri:
+            node = node.get(char)
+            if node is None:
+                return False
+            if _TERMINAL in node:
+                return True
+        return False
+
+    def match(self, uri: str | None) -> bool:
+        if not uri:
+            return False
+        if uri in self._exact:
+            return True
+        if self._prefix_trie and self._match_prefix(uri):
+            return True
+        if self._regex is not None and self._regex.fullmatch(uri) is not None:
+            return True
+        return any(compiled.fullmatch(uri) is not None for compiled in self._standalone)
+
+
+_cache_lock = threading.Lock()
+_cached_matcher: IgnoreMatcher | None = None
+_cached_fingerprint = None
+
+
+def invalidate_ignore_matcher() -> None:
+    """
+    /ignore 增删改后调用，下次使用时重建匹配器
+    """
+    global _cached_matcher, _cached_fingerprint
+    with _cache_lock:
+        _cached_matcher = None
+        _cached_fingerprint = None
+
+
+def get_ignore_matcher(session) -> IgnoreMatcher:
+    """
+    获取进程内缓存的匹配器
+
+    只查询规则表的行数和最大更新时间作为指纹，指纹变化（包括其他 worker 修改了规则）才重新加载并编译
+    """
+    global _cached_matcher, _cached_fingerprint
+    fingerprint = tuple(session.execute(
+        select(func.count(), func.max(IgnoreInterface.updated_at))
+    ).one())
+    with _cache_lock:
+        if _cached_matcher is not None and _cached_fingerprint == fingerprint:
+            return _cached_matcher
+
+    rules = session.execute(select(IgnoreInterface.match_type, IgnoreInterface.uri)).all()
+    matcher = IgnoreMatcher(rules)
+    logger.info(f"已编译过滤规则匹配器，共 {matcher.rule_count} 条规则")
+    with _cache_lock:
+        _cached_matcher = matcher
+        _cached_fingerprint = fingerprint
+    return matcher
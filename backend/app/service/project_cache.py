@@ -0,0 +1,91 @@
+# Created by xdd at 2024/11/15
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.notify import change_listener
+from config.logging_config import global_logger as logger
+
+# 按 eureka_name / upload_name 缓存项目 id，只保存 id，不持有 ORM 对象。
+# 项目增删改后本进程立即失效，并通过 NOTIFY 通知其他 worker；收不到通知的进程（例如进程池中的任务）依靠 TTL 过期
+
+EUREKA_NAME = "eureka_name"
+UPLOAD_NAME = "upload_name"
+
+NOTIFY_CHANNEL = "project_mapping_changed"
+
+
+class ProjectIdCache:
+    """
+    {(名称类型, 名称): 项目 id} 的 LRU 缓存，条目超过 ttl 秒后失效，不缓存不存在的名称
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[float, uuid.UUID]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, name: str) -> uuid.UUID | None:
+        key = (kind, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, kind: str, name: str, project_id: uuid.UUID) -> None:
+        key = (kind, name)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, project_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, project_id: uuid.UUID | None = None) -> None:
+        """
+        删除该项目的所有条目（名称可能已被修改，按 id 匹配），project_id 为 None 时清空
+        """
+        with self._lock:
+            if project_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key, (_, value) in self._entries.items() if value == project_id]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+project_cache = ProjectIdCache(settings.PROJECT_CACHE_MAX_SIZE, settings.PROJECT_CACHE_TTL_SECONDS)
+
+
+def notify_project_changed(session, project_id: uuid.UUID) -> None:
+    """
+    项目增删改时在同一事务中调用，不提交：本进程立即失效，
+    NOTIFY 在事务提交后送达所有 worker（包括本进程），回滚时不会发出
+    """
+    project_cache.invalidate(project_id)
+    session.execute(select(func.pg_notify(NOTIFY_CHANNEL, str(project_id))))
+
+
+def _on_notify(payload: str | None) -> None:
+    if not payload:
+        project_cache.invalidate()
+        return
+    try:
+        project_cache.invalidate(uuid.UUID(payload))
+    except ValueError:
+        logger.warning(f"无法解析项目变更通知: {payload}")
+        project_cache.invalidate()
+
+
+change_listener.subscribe(NOTIFY_CHANNEL, _on_notify)
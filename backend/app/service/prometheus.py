@@ -0,0 +1,89 @@
+# Created by xdd at 2024/10/28
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.core.config import settings
+from config.logging_config import global_logger as logger
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """
+    网络异常和 5xx 响应才重试，4xx 说明查询本身有问题，重试没有意义
+    """
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return False
+
+
+class PrometheusClient:
+    """
+    共享的异步 Prometheus 客户端
+
+    底层 httpx.AsyncClient 在应用启动时创建、关闭时释放，复用 keep-alive 连接池，
+    所有请求都带连接/读取超时，并对可恢复的错误做有限次数的指数退避重试。
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self, transport: httpx.AsyncBaseTransport | None = None, base_url: str | None = None) -> None:
+        if self._client is None:
+            base_url = base_url or settings.PROMETHEUS_URL
+            self._client = httpx.AsyncClient(
+                base_url=base_url,
+                transport=transport,
+                timeout=httpx.Timeout(
+                    settings.PROMETHEUS_READ_TIMEOUT,
+                    connect=settings.PROMETHEUS_CONNECT_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.PROMETHEUS_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.PROMETHEUS_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+            logger.info(f"Prometheus 客户端已创建: {base_url}")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Prometheus 客户端已关闭")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("PrometheusClient 尚未启动，请先调用 start()")
+        return self._client
+
+    async def query(self, query_param: str) -> list[dict]:
+        """
+        执行 instant query，返回 data.result 列表
+        """
+        if self._client is None:
+            # 脚本或测试中未经过应用启动流程时按需创建
+            await self.start()
+
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(settings.PROMETHEUS_RETRY_ATTEMPTS),
+            wait=wait_exponential(multiplier=settings.PROMETHEUS_RETRY_BACKOFF_SECONDS),
+            retry=retry_if_exception(_is_retryable),
+            reraise=True,
+        ):
+            with attempt:
+                attempt_number = attempt.retry_state.attempt_number
+                logger.info(f"查询 Prometheus: query={query_param}, 第 {attempt_number} 次尝试")
+                response = await self.client.get("/api/v1/query", params={"query": query_param})
+                response.raise_for_status()
+
+        data = response.json()
+        return data.get('data', {}).get('result', [])
+
+
+prometheus = PrometheusClient()
@@ -0,0 +1,164 @@
+# Created by xdd at 2024/11/1
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.http_cache import table_versions
+from app.models import GatherInterface, ProjectNameMapping
+
+# URI 模板匹配：Prometheus 采集到的是 Spring 模板（/api/user/{id}），
+# 自动化上报的是具体路径（/api/user/42），按路径段构建前缀树把具体路径归一到模板
+
+# 前缀树依赖的表：采集接口新增或项目的 upload_name 修改后，缓存的前缀树失效
+TRIE_TABLES = (GatherInterface.__tablename__, ProjectNameMapping.__tablename__)
+
+
+def split_path(path: str) -> list[str]:
+    """
+    去掉查询串和首尾的 /，按 / 切分为路径段
+    """
+    return path.split('?', 1)[0].strip('/').split('/')
+
+
+def is_template(path: str) -> bool:
+    return '{' in path or '**' in path
+
+
+class _Node:
+    __slots__ = ("children", "param", "catch_all", "template")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.param: _Node | None = None
+        self.catch_all: str | None = None
+        self.template: str | None = None
+
+
+class UriTemplateTrie:
+    """
+    按路径段构建的模板前缀树
+
+    固定段走哈希子节点，{xxx} 段（包括 {id:\\d+} 这类带约束的写法）走参数子节点，
+    ** 或 {*xxx} 匹配剩余所有段。匹配时固定段优先于参数段，复杂度为 O(路径段数)。
+    """
+
+    def __init__(self, templates=()):
+        self._root = _Node()
+        self.size = 0
+        for template in templates:
+            self.add(template)
+
+    def add(self, template: str) -> None:
+        node = self._root
+        for segment in split_path(template):
+            if segment == '**' or segment.startswith('{*'):
+                node.catch_all = template
+                self.size += 1
+                return
+            if segment.startswith('{') and segment.endswith('}'):
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        if node.template is None:
+            self.size += 1
+        node.template = template
+
+    def match(self, path: str) -> str | None:
+        """
+        返回与具体路径匹配的模板，没有匹配时返回 None
+        """
+        return self._match(self._root, split_path(path), 0)
+
+    def _match(self, node: _Node, segments: list[str], index: int) -> str | None:
+        if index == len(segments):
+            return node.template or node.catch_all
+        child = node.children.get(segments[index])
+        if child is not None:
+            template = self._match(child, segments, index + 1)
+            if template is not None:
+                return template
+        if node.param is not None and segments[index]:
+            template = self._match(node.param, segments, index + 1)
+            if template is not None:
+                return template
+        return node.catch_all
+
+
+class TemplateTrieCache:
+    """
+    {upload_name: 模板前缀树} 的 LRU 缓存，条目超过 ttl 秒或依赖表的版本号变化后失效；
+    没有采集接口的名称缓存为空树。前缀树构建后只读，可以在线程间共享
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[tuple[int, ...], float, UriTemplateTrie]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, upload_name: str, versions: tuple[int, ...]) -> UriTemplateTrie | None:
+        with self._lock:
+            entry = self._entries.get(upload_name)
+            if entry is None:
+                return None
+            if entry[0] != versions or entry[1] <= time.monotonic():
+                del self._entries[upload_name]
+                return None
+            self._entries.move_to_end(upload_name)
+            return entry[2]
+
+    def set(self, upload_name: str, versions: tuple[int, ...], trie: UriTemplateTrie) -> None:
+        with self._lock:
+            self._entries[upload_name] = (versions, time.monotonic() + self.ttl, trie)
+            self._entries.move_to_end(upload_name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+template_trie_cache = TemplateTrieCache(settings.TEMPLATE_CACHE_MAX_SIZE, settings.TEMPLATE_CACHE_TTL_SECONDS)
+
+
+def load_template_tries(session, upload_names) -> dict[str, UriTemplateTrie]:
+    """
+    按上报名称取对应项目的模板前缀树 {upload_name: 模板前缀树}，不包含没有采集接口的名称；
+    未命中缓存的名称用一次查询加载采集接口并构建
+    """
+    tries: dict[str, UriTemplateTrie] = {}
+    # 先取版本号再查询，查询期间有写入时条目以旧版本号保存，下一次调用即失效
+    versions = table_versions(TRIE_TABLES)
+    missing = []
+    for upload_name in upload_names:
+        trie = template_trie_cache.get(upload_name, versions)
+        if trie is None:
+            missing.append(upload_name)
+        elif trie.size:
+            tries[upload_name] = trie
+    if not missing:
+        return tries
+
+    loaded = {upload_name: UriTemplateTrie() for upload_name in missing}
+    rows = session.execute(
+        select(ProjectNameMapping.upload_name, GatherInterface.url)
+        .join(GatherInterface, GatherInterface.project_name_mapping_id == ProjectNameMapping.id)
+        .where(ProjectNameMapping.upload_name.in_(missing))
+        .distinct()
+    ).all()
+    for upload_name, url in rows:
+        loaded[upload_name].add(url)
+    for upload_name, trie in loaded.items():
+        template_trie_cache.set(upload_name, versions, trie)
+        if trie.size:
+            tries[upload_name] = trie
+    return tries
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.api.pagination import count_total, keyset_paginate
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models import (
+    CursorPage,
+    GatherInterface,
+    GatherInterfacePublic,
+    IgnoreInterface,
+    IgnoreOut,
+    ProjectNameMapping,
+    ProjectNameMappingPublic,
+    Role,
+    RolePublic,
+    TotalMode,
+    UploadInterface,
+    UploadInterfacePublic,
+    User,
+    UserPublic,
+)
+from app.tests.utils.utils import random_lower_string
+
+# 迁移到 AsyncSessionDep 的路由与同步会话上执行同样查询的结果必须一致
+
+CURSOR_ROUTES = {
+    "/roles/cursor": (select(Role), [Role.id], RolePublic),
+    "/users/cursor": (select(User), [User.id], UserPublic),
+    "/projects/cursor": (select(ProjectNameMapping), [ProjectNameMapping.id], ProjectNameMappingPublic),
+    "/ignore/ignores/cursor": (select(IgnoreInterface), [IgnoreInterface.id], IgnoreOut),
+    "/interfaces/gather": (
+        select(GatherInterface).where(GatherInterface.is_ignored.is_(False)), [GatherInterface.id],
+        GatherInterfacePublic,
+    ),
+    "/interfaces/upload": (select(UploadInterface), [UploadInterface.id], UploadInterfacePublic),
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def rows(db: Session) -> None:
+    for _ in range(3):
+        db.add(Role(name=random_lower_string(), description="parity"))
+        db.add(IgnoreInterface(uri=f"/api/{random_lower_string()}", description="parity"))
+    db.commit()
+
+
+@pytest.mark.parametrize("path", CURSOR_ROUTES)
+def test_cursor_routes_match_sync_session(client: TestClient, db: Session, superuser_token_headers: dict[str, str],
+                                          path: str) -> None:
+    statement, keys, model = CURSOR_ROUTES[path]
+    page = keyset_paginate(db, statement, keys, None, 2)
+    expected = CursorPage[model](data=[model.model_validate(row) for row in page.data], size=page.size,
+                                 next_cursor=page.next_cursor, has_more=page.has_more)
+
+    response = client.get(f"{settings.API_V1_STR}{path}", params={"size": 2}, headers=superuser_token_headers)
+    assert response.status_code == 200
+    assert response.json() == jsonable_encoder(expected)
+
+
+@pytest.mark.parametrize("path, model", [("/roles/", Role), ("/users/", User)])
+def test_offset_routes_match_sync_session(client: TestClient, db: Session, superuser_token_headers: dict[str, str],
+                                          path: str, model) -> None:
+    total, _ = count_total(db, select(model), TotalMode.EXACT)
+    ids = {str(row.id) for row in db.exec(select(model)).all()}
+
+    response = client.get(f"{settings.API_V1_STR}{path}", params={"size": 100}, headers=superuser_token_headers)
+    assert response.status_code == 200
+    page = response.json()
+    assert page["total"] == total
+    assert {row["id"] for row in page["data"]} == ids
+
+
+@pytest.mark.parametrize("path, model", [("/projects/", ProjectNameMapping), ("/ignore/ignores", IgnoreInterface)])
+def test_paginated_routes_match_sync_session(client: TestClient, db: Session, path: str, model) -> None:
+    total, _ = count_total(db, select(model), TotalMode.EXACT)
+    first = db.exec(select(model).order_by(model.id).limit(1)).one()
+
+    page = client.get(f"{settings.API_V1_STR}{path}", params={"size": 1}).json()
+    assert page["total"] == total
+    assert page["items"][0]["description"] == first.description
+
+
+def test_authenticate_matches_sync_session(db: Session) -> None:
+    async def authenticate(password: str):
+        try:
+            async with AsyncSession(async_engine) as session:
+                return await crud.authenticate_async(session=session, email=settings.FIRST_SUPERUSER,
+                                                     password=password)
+        finally:
+            # 连接绑定在 asyncio.run 的事件循环上，结束前释放
+            await async_engine.dispose()
+
+    user = asyncio.run(authenticate(settings.FIRST_SUPERUSER_PASSWORD))
+    expected = crud.authenticate(session=db, email=settings.FIRST_SUPERUSER,
+                                 password=settings.FIRST_SUPERUSER_PASSWORD)
+    assert user is not None and user.id == expected.id
+    assert asyncio.run(authenticate("incorrect-password")) is None
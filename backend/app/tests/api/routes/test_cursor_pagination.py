@@ -0,0 +1,60 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import IgnoreInterface, ProjectNameMapping
+from app.service.gather_interface import save_gather_interfaces
+from app.tests.utils.utils import random_lower_string
+
+
+def _walk(client: TestClient, path: str, headers: dict | None = None, **params) -> list[dict]:
+    rows = []
+    after = None
+    while True:
+        response = client.get(path, params={**params, **({"after": after} if after else {})}, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        rows.extend(page["data"])
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return rows
+        after = page["next_cursor"]
+
+
+def test_cursor_pagination_visits_every_row_once(client: TestClient, db: Session) -> None:
+    for _ in range(5):
+        db.add(IgnoreInterface(uri=f"/api/{random_lower_string()}", description="cursor"))
+    db.commit()
+
+    rows = _walk(client, f"{settings.API_V1_STR}/ignore/ignores/cursor", size=2)
+    ids = [row["id"] for row in rows]
+    assert ids == sorted(set(ids))
+
+    total = client.get(f"{settings.API_V1_STR}/ignore/ignores", params={"size": 1}).json()["total"]
+    assert len(ids) == total
+
+
+def test_gather_interfaces_cursor_filters_by_project(client: TestClient, db: Session) -> None:
+    application = random_lower_string()
+    save_gather_interfaces([
+        {"metric": {"application": application, "uri": f"/api/{i}", "method": "GET"}} for i in range(5)
+    ])
+    mapping = db.query(ProjectNameMapping).filter(ProjectNameMapping.eureka_name == application).one()
+
+    rows = _walk(client, f"{settings.API_V1_STR}/interfaces/gather", project_id=str(mapping.id), size=2)
+    assert sorted(row["url"] for row in rows) == [f"/api/{i}" for i in range(5)]
+
+    rows = _walk(client, f"{settings.API_V1_STR}/interfaces/gather", project_id=str(mapping.id), covered=True)
+    assert rows == []
+
+
+def test_users_cursor(client: TestClient, superuser_token_headers: dict[str, str]) -> None:
+    rows = _walk(client, f"{settings.API_V1_STR}/users/cursor", headers=superuser_token_headers, size=1)
+    assert settings.FIRST_SUPERUSER in [row["email"] for row in rows]
+
+
+def test_invalid_cursor_returns_400(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/roles/cursor", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+    response = client.get(f"{settings.API_V1_STR}/roles/cursor", params={"after": "WzEsMl0"})  # [1,2]
+    assert response.status_code == 400
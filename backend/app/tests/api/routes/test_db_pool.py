@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import Settings, settings
+from app.core.db import job_engine
+
+
+def test_db_pool_stats(client: TestClient, superuser_token_headers: dict[str, str]) -> None:
+    response = client.get(f"{settings.API_V1_STR}/utils/db-pool/", headers=superuser_token_headers)
+    assert response.status_code == 200
+    pools = {pool["name"]: pool for pool in response.json()}
+    assert {"sync", "async"} <= set(pools)
+    assert ("jobs" in pools) == settings.DB_JOB_POOL_ENABLED
+    assert pools["sync"]["size"] == settings.DB_POOL_SIZE
+    assert pools["sync"]["max_overflow"] == settings.DB_MAX_OVERFLOW
+
+
+def test_db_pool_stats_requires_superuser(client: TestClient, normal_user_token_headers: dict[str, str]) -> None:
+    response = client.get(f"{settings.API_V1_STR}/utils/db-pool/", headers=normal_user_token_headers)
+    assert response.status_code == 403
+
+
+def test_job_pool_fits_concurrent_jobs() -> None:
+    # 每个任务两个连接（任务会话 + 进度写入），外加 job store 一个
+    assert Settings(SCHEDULER_THREAD_POOL_SIZE=6, DB_JOB_POOL_SIZE=None).DB_JOB_POOL_SIZE == 13
+    assert Settings(SCHEDULER_THREAD_POOL_SIZE=6, DB_JOB_POOL_SIZE=3).DB_JOB_POOL_SIZE == 3
+
+
+def _statement_timeout(session: Session) -> int:
+    return int(session.execute(text("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")).scalar())
+
+
+def test_statement_timeout_per_pool(db: Session) -> None:
+    assert _statement_timeout(db) == settings.DB_STATEMENT_TIMEOUT_MS
+    with Session(job_engine) as session:
+        expected = settings.DB_JOB_STATEMENT_TIMEOUT_MS if settings.DB_JOB_POOL_ENABLED \
+            else settings.DB_STATEMENT_TIMEOUT_MS
+        assert _statement_timeout(session) == expected
@@ -0,0 +1,53 @@
+import csv
+import gzip
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import ProjectNameMapping
+from app.service.gather_interface import save_gather_interfaces
+from app.tests.utils.utils import random_lower_string
+
+
+def _project(db: Session) -> ProjectNameMapping:
+    application = random_lower_string()
+    save_gather_interfaces([
+        {"metric": {"application": application, "uri": f"/api/{prefix}/{i}", "method": method}}
+        for prefix in ("orders", "users") for i in range(3) for method in ("GET", "POST")
+    ])
+    return db.query(ProjectNameMapping).filter(ProjectNameMapping.eureka_name == application).one()
+
+
+def test_export_csv_filters(client: TestClient, db: Session) -> None:
+    mapping = _project(db)
+    response = client.get(f"{settings.API_V1_STR}/interfaces/gather/export", params={
+        "project_id": str(mapping.id), "method": "get", "url_prefix": "/api/orders",
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert sorted(row["url"] for row in rows) == [f"/api/orders/{i}" for i in range(3)]
+    assert {row["method"] for row in rows} == {"GET"}
+    assert {row["project"] for row in rows} == {mapping.eureka_name}
+
+
+def test_export_ndjson_gzip(client: TestClient, db: Session) -> None:
+    mapping = _project(db)
+    response = client.get(f"{settings.API_V1_STR}/interfaces/gather/export", params={
+        "project_id": str(mapping.id), "format": "ndjson", "gzip": True,
+    })
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('.ndjson.gz"')
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert len(lines) == 12
+    assert all(json.loads(line)["project"] == mapping.eureka_name for line in lines)
+
+
+def test_export_empty_csv_has_header(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/interfaces/gather/export",
+                          params={"url_prefix": f"/{random_lower_string()}"})
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["id,project,url,method,description,created_at,updated_at"]
@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.tests.utils.utils import random_lower_string
+
+
+def test_not_modified_skips_database(client: TestClient) -> None:
+    path = f"{settings.API_V1_STR}/roles/"
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    second = client.get(path, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+    assert 'desc="0 queries"' in second.headers["Server-Timing"]
+
+    # 不带 If-None-Match 时返回缓存的响应体
+    third = client.get(path)
+    assert third.status_code == 200
+    assert third.json() == first.json()
+    assert 'desc="0 queries"' in third.headers["Server-Timing"]
+
+
+def test_query_params_are_cached_separately(client: TestClient) -> None:
+    path = f"{settings.API_V1_STR}/ignore/ignores"
+    etag = client.get(path, params={"size": 1}).headers["ETag"]
+    response = client.get(path, params={"size": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_write_changes_etag(client: TestClient) -> None:
+    path = f"{settings.API_V1_STR}/ignore/ignores"
+    etag = client.get(path, params={"size": 100}).headers["ETag"]
+    assert client.get(path, params={"size": 100}, headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.post(
+        f"{settings.API_V1_STR}/ignore/ignore/add",
+        json={"uri": f"/api/{random_lower_string()}", "description": "etag"},
+    )
+    assert response.status_code == 200
+
+    response = client.get(path, params={"size": 100}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.skipif(not settings.BACKEND_CORS_ORIGINS, reason="未配置 BACKEND_CORS_ORIGINS")
+def test_cors_headers_on_miss_and_hit(client: TestClient) -> None:
+    path = f"{settings.API_V1_STR}/projects/"
+    origin = str(settings.BACKEND_CORS_ORIGINS[0]).strip("/")
+
+    miss = client.get(path, headers={"Origin": origin})
+    hit = client.get(path, headers={"Origin": origin})
+    not_modified = client.get(path, headers={"Origin": origin, "If-None-Match": miss.headers["ETag"]})
+    assert (miss.status_code, hit.status_code, not_modified.status_code) == (200, 200, 304)
+    for response in (miss, hit, not_modified):
+        assert response.headers["Access-Control-Allow-Origin"] == origin
+        assert response.headers["Access-Control-Allow-Credentials"] == "true"
+        assert "Origin" in response.headers["Vary"]
+
+
+def test_etag_matches() -> None:
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.tests.utils.utils import random_lower_string
+
+
+def test_metrics_exposes_request_and_upload_metrics(client: TestClient) -> None:
+    data = {"data": [{"name": random_lower_string(), "base_url": "",
+                      "url_list": [{"url": "/api/a", "method": "GET"}, {"url": "/api/a", "method": "GET"}]}]}
+    assert client.post(f"{settings.API_V1_STR}/report", json=data).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert f'route="{settings.API_V1_STR}/report"' in text
+    assert 'qualitystar_phase_duration_seconds_count{operation="upload_uris",phase="insert"}' in text
+    assert 'qualitystar_rows_total{operation="upload_uris",outcome="inserted"}' in text
+    assert "qualitystar_db_pool_checkout_wait_seconds_count" in text
+    assert "qualitystar_db_pool_checked_out" in text
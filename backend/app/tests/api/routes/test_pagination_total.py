@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.pagination import clear_total_cache
+from app.core.config import settings
+from app.core.http_cache import notify_table_changed
+from app.models import IgnoreInterface
+from app.tests.utils.utils import random_lower_string
+
+
+def test_exact_total_by_default(client: TestClient, superuser_token_headers: dict[str, str]) -> None:
+    response = client.get(f"{settings.API_V1_STR}/roles/", headers=superuser_token_headers)
+    assert response.status_code == 200
+    assert response.json()["total_exact"] is True
+
+
+def test_cached_total_is_reused_until_ttl(client: TestClient, db: Session) -> None:
+    clear_total_cache()
+    path = f"{settings.API_V1_STR}/ignore/ignores"
+    first = client.get(path, params={"total_mode": "cached", "size": 1}).json()
+    assert first["total_exact"] is True
+
+    db.add(IgnoreInterface(uri=f"/api/{random_lower_string()}", description="total"))
+    notify_table_changed(db, IgnoreInterface.__tablename__)
+    db.commit()
+
+    # 缓存命中时不重新统计，total 可能已过期，标记为不精确
+    second = client.get(path, params={"total_mode": "cached", "size": 1}).json()
+    assert second["total"] == first["total"]
+    assert second["total_exact"] is False
+
+    exact = client.get(path, params={"total_mode": "exact", "size": 1}).json()
+    assert exact["total"] == first["total"] + 1
+    clear_total_cache()
+
+
+def test_estimated_total_falls_back_to_exact_for_small_tables(
+        client: TestClient, superuser_token_headers: dict[str, str]) -> None:
+    path = f"{settings.API_V1_STR}/users/"
+    estimated = client.get(path, params={"total_mode": "estimated"}, headers=superuser_token_headers).json()
+    exact = client.get(path, params={"total_mode": "exact"}, headers=superuser_token_headers).json()
+    assert estimated["total_exact"] is True
+    assert estimated["total"] == exact["total"]
+
+
+def test_invalid_total_mode(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/projects/", params={"total_mode": "guess"})
+    assert response.status_code == 422
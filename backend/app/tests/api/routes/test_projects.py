@@ -0,0 +1,91 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import GatherInterface, ProjectNameMapping, UploadInterface
+from app.service.coverage_summary import take_coverage_snapshot
+from app.service.gather_interface import save_gather_interfaces
+from app.tests.utils.utils import random_lower_string
+
+
+def _get_coverage(client: TestClient, project_id) -> dict:
+    response = client.get(f"{settings.API_V1_STR}/projects/coverage")
+    assert response.status_code == 200
+    return next(item for item in response.json() if item["project_name_mapping_id"] == str(project_id))
+
+
+def test_project_coverage_follows_ingest_upload_and_ignore(client: TestClient, db: Session) -> None:
+    application = random_lower_string()
+    upload_name = random_lower_string()
+    ignored_url = f"/api/{random_lower_string()}"
+    save_gather_interfaces([
+        {"metric": {"application": application, "uri": "/api/a", "method": "GET"}},
+        {"metric": {"application": application, "uri": "/api/b", "method": "GET"}},
+        {"metric": {"application": application, "uri": ignored_url, "method": "GET"}},
+    ])
+    mapping = db.query(ProjectNameMapping).filter(ProjectNameMapping.eureka_name == application).one()
+    mapping.upload_name = upload_name
+    db.add(mapping)
+    db.commit()
+
+    coverage = _get_coverage(client, mapping.id)
+    assert (coverage["total"], coverage["covered"]) == (3, 0)
+
+    data = {"data": [{"name": upload_name, "base_url": "", "url_list": [{"url": "/api/a", "method": "GET"}]}]}
+    assert client.post(f"{settings.API_V1_STR}/report", json=data).status_code == 200
+    coverage = _get_coverage(client, mapping.id)
+    assert (coverage["total"], coverage["covered"]) == (3, 1)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/ignore/ignore/add", json={"uri": ignored_url, "description": "test"}
+    )
+    assert response.status_code == 200
+    coverage = _get_coverage(client, mapping.id)
+    assert (coverage["total"], coverage["covered"]) == (2, 1)
+    assert coverage["coverage"] == 0.5
+
+    ignored = db.query(GatherInterface).filter(GatherInterface.url == ignored_url).one()
+    assert ignored.is_ignored is True
+
+
+def test_project_coverage_history(client: TestClient, db: Session) -> None:
+    application = random_lower_string()
+    save_gather_interfaces([{"metric": {"application": application, "uri": "/api/a", "method": "GET"}}])
+    mapping = db.query(ProjectNameMapping).filter(ProjectNameMapping.eureka_name == application).one()
+
+    take_coverage_snapshot(date(2024, 1, 1))
+    take_coverage_snapshot(date(2024, 1, 2))
+    take_coverage_snapshot(date(2024, 1, 2))  # 同一天重复执行只保留一条
+
+    response = client.get(
+        f"{settings.API_V1_STR}/projects/coverage/history",
+        params={"start": "2024-01-01", "end": "2024-12-31", "project_id": str(mapping.id)},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert len(content) == 1
+    assert content[0]["project_name_mapping_id"] == str(mapping.id)
+    assert content[0]["points"] == [
+        {"snapshot_date": "2024-01-01", "total": 1, "covered": 0},
+        {"snapshot_date": "2024-01-02", "total": 1, "covered": 0},
+    ]
+
+
+def test_update_upload_name_normalizes_existing_uploads(client: TestClient, db: Session) -> None:
+    application = random_lower_string()
+    upload_name = random_lower_string()
+    save_gather_interfaces([{"metric": {"application": application, "uri": "/api/user/{id}", "method": "GET"}}])
+    mapping = db.query(ProjectNameMapping).filter(ProjectNameMapping.eureka_name == application).one()
+
+    # 设置上报名称之前上报的记录无法匹配模板
+    data = {"data": [{"name": upload_name, "base_url": "", "url_list": [{"url": "/api/user/42", "method": "GET"}]}]}
+    assert client.post(f"{settings.API_V1_STR}/report", json=data).status_code == 200
+    upload = db.query(UploadInterface).filter(UploadInterface.name == upload_name).one()
+    assert upload.template_url == "/api/user/42"
+
+    response = client.patch(f"{settings.API_V1_STR}/projects/{mapping.id}", json={"upload_name": upload_name})
+    assert response.status_code == 200
+    db.refresh(upload)
+    assert upload.template_url == "/api/user/{id}"
@@ -0,0 +1,118 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.models import (
+    GatherInterface,
+    IgnoreInterface,
+    ProjectNameMapping,
+    UploadInterface,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+def test_report_uris_is_idempotent(client: TestClient, db: Session) -> None:
+    name = random_lower_string()
+    ignored_url = f"/api/{random_lower_string()}/ignored"
+    db.add(IgnoreInterface(uri=ignored_url, description="test"))
+    db.commit()
+
+    data = {
+        "data": [
+            {
+                "name": name,
+                "base_url": "http://localhost",
+                "url_list": [
+                    {"url": "/api/user", "method": "GET"},
+                    {"url": "/api/user", "method": "GET"},
+                    {"url": "/api/user", "method": "POST"},
+                    {"url": ignored_url, "method": "GET"},
+                ],
+            }
+        ]
+    }
+    for _ in range(2):
+        response = client.post(f"{settings.API_V1_STR}/report", json=data)
+        assert response.status_code == 200
+        assert response.json() == {"message": "upload successfully"}
+
+    total = db.exec(
+        select(func.count()).select_from(UploadInterface).where(UploadInterface.name == name)
+    ).one()
+    assert total == 2
+
+
+def test_report_uris_updates_coverage(client: TestClient, db: Session) -> None:
+    name = random_lower_string()
+    mapping = ProjectNameMapping(
+        upload_name=name, eureka_name=random_lower_string(), name=name, description=""
+    )
+    db.add(mapping)
+    db.commit()
+    covered = GatherInterface(
+        url="/api/order", method="GET", project_name_mapping_id=mapping.id, is_active=False
+    )
+    uncovered = GatherInterface(
+        url="/api/order", method="DELETE", project_name_mapping_id=mapping.id, is_active=False
+    )
+    db.add_all([covered, uncovered])
+    db.commit()
+
+    data = {
+        "data": [
+            {
+                "name": name,
+                "base_url": "http://localhost",
+                "url_list": [{"url": "/api/order", "method": "GET"}],
+            }
+        ]
+    }
+    response = client.post(f"{settings.API_V1_STR}/report", json=data)
+    assert response.status_code == 200
+
+    db.refresh(covered)
+    db.refresh(uncovered)
+    assert covered.is_active is True
+    assert uncovered.is_active is False
+
+
+def test_report_uris_matches_uri_templates(client: TestClient, db: Session) -> None:
+    name = random_lower_string()
+    mapping = ProjectNameMapping(
+        upload_name=name, eureka_name=random_lower_string(), name=name, description=""
+    )
+    db.add(mapping)
+    db.commit()
+    template = GatherInterface(
+        url="/api/user/{id}", method="GET", project_name_mapping_id=mapping.id, is_active=False
+    )
+    db.add(template)
+    db.commit()
+
+    data = {
+        "data": [
+            {
+                "name": name,
+                "base_url": "http://localhost",
+                "url_list": [{"url": "/api/user/42", "method": "GET"}],
+            }
+        ]
+    }
+    response = client.post(f"{settings.API_V1_STR}/report", json=data)
+    assert response.status_code == 200
+
+    upload = db.exec(select(UploadInterface).where(UploadInterface.name == name)).one()
+    assert upload.url == "/api/user/42"
+    assert upload.template_url == "/api/user/{id}"
+    db.refresh(template)
+    assert template.is_active is True
+
+
+def test_report_query_count_does_not_grow_with_payload(client: TestClient, assert_max_queries) -> None:
+    for size in (10, 500):
+        data = {"data": [{"name": random_lower_string(), "base_url": "",
+                          "url_list": [{"url": f"/api/{i}", "method": "GET"} for i in range(size)]}]}
+        with assert_max_queries(15):
+            response = client.post(f"{settings.API_V1_STR}/report", json=data)
+        assert response.status_code == 200
+        assert response.headers["Server-Timing"].startswith("db;dur=")
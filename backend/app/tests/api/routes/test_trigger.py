@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete
+
+from app.core.config import settings
+from app.models import JobRun, JobRunStatus
+
+
+def test_trigger_update_coverage_returns_run_id(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/trigger/update_coverage")
+    assert response.status_code == 202
+    accepted = response.json()
+    assert accepted["job_id"] == "update_coverage"
+
+    # TestClient 在返回响应前执行完后台任务
+    response = client.get(f"{settings.API_V1_STR}/trigger/runs/{accepted['run_id']}")
+    assert response.status_code == 200
+    run = response.json()
+    assert run["status"] == JobRunStatus.SUCCESS
+    assert run["progress"]["summary_refreshed"] == 1
+    assert "covered" in run["progress"]
+
+
+def test_concurrent_trigger_is_coalesced(client: TestClient, db: Session) -> None:
+    running = JobRun(job_id="update_coverage", status=JobRunStatus.RUNNING, progress={})
+    db.add(running)
+    db.commit()
+    try:
+        response = client.get(f"{settings.API_V1_STR}/trigger/update_coverage")
+        assert response.status_code == 202
+        assert response.json() == {"run_id": running.id, "job_id": "update_coverage", "coalesced": True}
+    finally:
+        db.execute(delete(JobRun).where(JobRun.id == running.id))
+        db.commit()
+
+
+def test_read_unknown_run(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/trigger/runs/0")
+    assert response.status_code == 404
@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import time
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from app.core.query_counter import count_queries
+from app.models import (
+    GatherInterface,
+    ProjectNameMapping,
+    TransactionLog,
+    UploadInterface,
+)
+from app.tests.benchmarks.data import SCALES, SyntheticDataset
+
+# 基准测试默认不运行，设置 BENCHMARK=1 开启：
+#   BENCHMARK=1 pytest app/tests/benchmarks
+# BENCHMARK_SCALES: 逗号分隔的规模，默认 small,medium，可选 large
+# BENCHMARK_RESULTS: 结果 JSON 输出路径，默认 benchmark-results.json
+# BENCHMARK_BASELINE: 基线 JSON（上一次的结果文件），提供时逐项比较
+# BENCHMARK_REGRESSION_THRESHOLD: 允许的耗时增长比例，默认 0.2，超过即失败
+
+ENABLED = os.environ.get("BENCHMARK") == "1"
+SCALE_NAMES = [name.strip() for name in os.environ.get("BENCHMARK_SCALES", "small,medium").split(",") if name.strip()]
+RESULTS_PATH = Path(os.environ.get("BENCHMARK_RESULTS", "benchmark-results.json"))
+BASELINE_PATH = os.environ.get("BENCHMARK_BASELINE")
+REGRESSION_THRESHOLD = float(os.environ.get("BENCHMARK_REGRESSION_THRESHOLD", "0.2"))
+
+
+def pytest_collection_modifyitems(items):
+    if ENABLED:
+        return
+    skip = pytest.mark.skip(reason="基准测试需要设置 BENCHMARK=1")
+    for item in items:
+        if "benchmarks" in item.path.parts:
+            item.add_marker(skip)
+
+
+class BenchmarkRecorder:
+    """
+    记录每项基准的耗时和 SQL 条数，结束时写入 JSON；提供基线时超过阈值的项立即失败
+    """
+
+    def __init__(self, baseline: dict):
+        self.baseline = baseline
+        self.results: dict[str, dict[str, dict]] = {}
+
+    def measure(self, name: str, scale: str, func, repeat: int = 1) -> dict:
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with count_queries() as stats:
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            queries = stats.count
+        result = {
+            "seconds": round(statistics.median(timings), 6),
+            "min_seconds": round(min(timings), 6),
+            "repeat": repeat,
+            "queries": queries,
+        }
+        self.results.setdefault(name, {})[scale] = result
+        self._check_regression(name, scale, result)
+        return result
+
+    def _check_regression(self, name: str, scale: str, result: dict) -> None:
+        baseline = self.baseline.get(name, {}).get(scale)
+        if not baseline:
+            return
+        limit = baseline["seconds"] * (1 + REGRESSION_THRESHOLD)
+        if result["seconds"] > limit:
+            pytest.fail(
+                f"{name}[{scale}] 耗时 {result['seconds']:.3f}s，超过基线 {baseline['seconds']:.3f}s 的 "
+                f"{REGRESSION_THRESHOLD:.0%} 阈值"
+            )
+
+    def write(self, path: Path) -> None:
+        path.write_text(json.dumps({
+            "threshold": REGRESSION_THRESHOLD,
+            "results": self.results,
+        }, indent=2, ensure_ascii=False))
+
+
+@pytest.fixture(scope="session")
+def benchmark() -> Generator[BenchmarkRecorder, None, None]:
+    baseline = {}
+    if BASELINE_PATH:
+        baseline = json.loads(Path(BASELINE_PATH).read_text()).get("results", {})
+    recorder = BenchmarkRecorder(baseline)
+    yield recorder
+    if recorder.results:
+        recorder.write(RESULTS_PATH)
+
+
+@pytest.fixture(scope="module", params=SCALE_NAMES)
+def dataset(request, db: Session) -> Generator[SyntheticDataset, None, None]:
+    dataset = SyntheticDataset(SCALES[request.param])
+    yield dataset
+    # 清理本次生成的数据，汇总表和快照随项目级联删除
+    project_ids = select(ProjectNameMapping.id).where(ProjectNameMapping.eureka_name.startswith(dataset.prefix))
+    db.execute(delete(GatherInterface).where(GatherInterface.project_name_mapping_id.in_(project_ids)))
+    db.execute(delete(UploadInterface).where(UploadInterface.name.startswith(dataset.prefix)))
+    db.execute(delete(TransactionLog).where(TransactionLog.name.startswith(dataset.prefix)))
+    db.execute(delete(ProjectNameMapping).where(ProjectNameMapping.eureka_name.startswith(dataset.prefix)))
+    db.commit()
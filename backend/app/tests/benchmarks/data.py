@@ -0,0 +1,90 @@
+import random
+import uuid
+from dataclasses import dataclass
+
+from app.models import DataURIItems, ReportRUI, URIItem
+
+# 基准测试的合成数据：N 个项目 × 每个项目 M 个采集接口 × 每个项目 K 次上报
+
+METHODS = ("GET", "POST", "PUT", "DELETE")
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    projects: int
+    interfaces: int
+    uploads: int
+    # 每个接口在 Prometheus 中对应的序列数（不同实例 / 状态码）
+    series_per_interface: int = 3
+
+
+SCALES = {
+    "small": Scale("small", projects=5, interfaces=200, uploads=3),
+    "medium": Scale("medium", projects=20, interfaces=1000, uploads=5),
+    "large": Scale("large", projects=50, interfaces=4000, uploads=10),
+}
+
+
+class SyntheticDataset:
+    """
+    一组互不冲突的合成数据，项目名带随机前缀，测试结束后按前缀清理
+    """
+
+    def __init__(self, scale: Scale, seed: int = 0):
+        self.scale = scale
+        self.prefix = f"bench-{uuid.uuid4().hex[:8]}"
+        self._rng = random.Random(seed)
+        self.applications = [f"{self.prefix}-{p}" for p in range(scale.projects)]
+        # {application: [(template_url, method)]}，每三个接口中有一个带路径参数
+        self.interfaces = {
+            application: [
+                (
+                    f"/api/svc{p}/res{i}/{{id}}" if i % 3 == 0 else f"/api/svc{p}/res{i}",
+                    METHODS[i % len(METHODS)],
+                )
+                for i in range(scale.interfaces)
+            ]
+            for p, application in enumerate(self.applications)
+        }
+
+    def prometheus_results(self) -> list[dict]:
+        """
+        Prometheus /api/v1/query 返回的 data.result
+        """
+        return [
+            {
+                "metric": {
+                    "__name__": "http_server_requests_seconds_count",
+                    "application": application.upper(),
+                    "uri": url,
+                    "method": method,
+                    "status": str(200 + series),
+                    "instance": f"{application}-{series}:8080",
+                },
+                "value": [1730000000.0, str(self._rng.randint(1, 10_000))],
+            }
+            for application, interfaces in self.interfaces.items()
+            for url, method in interfaces
+            for series in range(self.scale.series_per_interface)
+        ]
+
+    def reports(self) -> list[ReportRUI]:
+        """
+        每个项目 K 次上报，每次覆盖一半接口，路径参数替换成具体值
+        """
+        reports = []
+        for _ in range(self.scale.uploads):
+            data = []
+            for application, interfaces in self.interfaces.items():
+                sample = self._rng.sample(interfaces, len(interfaces) // 2)
+                data.append(DataURIItems(
+                    name=application,
+                    base_url="http://localhost",
+                    url_list=[
+                        URIItem(url=url.replace("{id}", str(self._rng.randint(1, 100_000))), method=method)
+                        for url, method in sample
+                    ],
+                ))
+            reports.append(ReportRUI(data=data))
+        return reports
@@ -0,0 +1,54 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakePrometheus:
+    """
+    本地 Prometheus 替身，/api/v1/query 返回预先序列化好的结果，测量的是客户端的传输和解析开销
+
+    with FakePrometheus(results) as server:
+        await client.start(base_url=server.url)
+    """
+
+    def __init__(self, results: list[dict]):
+        self.body = json.dumps({
+            "status": "success",
+            "data": {"resultType": "vector", "result": results},
+        }).encode()
+        self.requests = 0
+        body = self.body
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if not self.path.startswith("/api/v1/query"):
+                    self.send_error(404)
+                    return
+                fake.requests += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
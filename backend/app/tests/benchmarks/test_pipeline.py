@@ -0,0 +1,153 @@
+import asyncio
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select, update
+
+from app.core.config import settings
+from app.models import GatherInterface, ProjectNameMapping, UploadInterface
+from app.service import gather_interface
+from app.service.gather_interface import (
+    SessionLocal,
+    query_prometheus,
+    update_coverage,
+    upload_uris,
+)
+from app.service.prometheus import PrometheusClient
+from app.tests.benchmarks.conftest import BenchmarkRecorder
+from app.tests.benchmarks.data import SyntheticDataset
+from app.tests.benchmarks.fake_prometheus import FakePrometheus
+
+# 流水线各步骤：采集 -> 上报 -> 全量重算覆盖率 -> 分页列表，每个规模使用一份独立的数据。
+# 后面的步骤通过 collected / uploaded fixture 准备前置数据，单独运行某一项（-k）时也能得到相同的数据
+
+
+def _project_ids(dataset: SyntheticDataset):
+    return select(ProjectNameMapping.id).where(ProjectNameMapping.eureka_name.startswith(dataset.prefix))
+
+
+def _collect(monkeypatch, url: str) -> int:
+    async def run() -> int:
+        client = PrometheusClient()
+        await client.start(base_url=url)
+        monkeypatch.setattr(gather_interface, "prometheus", client)
+        try:
+            return await query_prometheus()
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def _gathered_count(db: Session, dataset: SyntheticDataset) -> int:
+    return db.execute(
+        select(func.count()).select_from(GatherInterface)
+        .where(GatherInterface.project_name_mapping_id.in_(_project_ids(dataset)))
+    ).scalar()
+
+
+def _uploaded_count(db: Session, dataset: SyntheticDataset) -> int:
+    return db.execute(
+        select(func.count()).select_from(UploadInterface).where(UploadInterface.name.startswith(dataset.prefix))
+    ).scalar()
+
+
+@pytest.fixture(scope="module")
+def collected(dataset: SyntheticDataset, db: Session) -> SyntheticDataset:
+    """
+    已采集的数据集，上报名称与采集名称一致，后续上报才能关联到项目；
+    test_query_prometheus 已执行时直接复用它采集的数据
+    """
+    if not _gathered_count(db, dataset):
+        with pytest.MonkeyPatch.context() as monkeypatch, FakePrometheus(dataset.prometheus_results()) as server:
+            _collect(monkeypatch, server.url)
+    db.execute(
+        update(ProjectNameMapping)
+        .where(ProjectNameMapping.eureka_name.startswith(dataset.prefix))
+        .values(upload_name=ProjectNameMapping.eureka_name)
+    )
+    db.commit()
+    return dataset
+
+
+@pytest.fixture(scope="module")
+def uploaded(collected: SyntheticDataset, db: Session) -> SyntheticDataset:
+    """
+    已上报的数据集，test_upload_uris 已执行时直接复用它上报的数据
+    """
+    if not _uploaded_count(db, collected):
+        with SessionLocal() as session:
+            for report in collected.reports():
+                upload_uris(report, session)
+    return collected
+
+
+def test_query_prometheus(benchmark: BenchmarkRecorder, dataset: SyntheticDataset, db: Session,
+                          monkeypatch) -> None:
+    scale = dataset.scale
+    with FakePrometheus(dataset.prometheus_results()) as server:
+        benchmark.measure("query_prometheus_cold", scale.name, lambda: _collect(monkeypatch, server.url))
+        # 再次采集时所有接口都已存在，衡量去重和冲突跳过的开销
+        benchmark.measure("query_prometheus_warm", scale.name, lambda: _collect(monkeypatch, server.url), repeat=3)
+
+    assert _gathered_count(db, dataset) == scale.projects * scale.interfaces
+
+
+def test_upload_uris(benchmark: BenchmarkRecorder, collected: SyntheticDataset) -> None:
+    dataset = collected
+    reports = dataset.reports()
+
+    def upload_all():
+        with SessionLocal() as session:
+            for report in reports:
+                upload_uris(report, session)
+
+    benchmark.measure("upload_uris", dataset.scale.name, upload_all)
+
+
+def test_update_coverage(benchmark: BenchmarkRecorder, uploaded: SyntheticDataset, db: Session) -> None:
+    dataset = uploaded
+
+    def recompute():
+        with SessionLocal() as session:
+            update_coverage(session)
+
+    def reset():
+        db.execute(
+            update(GatherInterface)
+            .where(GatherInterface.project_name_mapping_id.in_(_project_ids(dataset)))
+            .values(is_active=False)
+        )
+        db.commit()
+
+    reset()
+    result = benchmark.measure("update_coverage_full", dataset.scale.name, recompute)
+    covered = db.execute(
+        select(func.count()).select_from(GatherInterface)
+        .where(GatherInterface.project_name_mapping_id.in_(_project_ids(dataset)))
+        .where(GatherInterface.is_active.is_(True))
+    ).scalar()
+    assert covered > 0
+    assert result["queries"] <= 5
+
+
+def test_paginated_list_routes(benchmark: BenchmarkRecorder, uploaded: SyntheticDataset, client: TestClient,
+                               superuser_token_headers: dict[str, str]) -> None:
+    dataset = uploaded
+    size = 50
+    total = client.get(f"{settings.API_V1_STR}/projects/", params={"size": 1}).json()["total"]
+    last_page = max(math.ceil(total / size), 1)
+    routes = {
+        "list_projects_first_page": (f"{settings.API_V1_STR}/projects/", {"page": 1, "size": size}),
+        "list_projects_last_page": (f"{settings.API_V1_STR}/projects/", {"page": last_page, "size": size}),
+        "list_ignores": (f"{settings.API_V1_STR}/ignore/ignores", {"page": 1, "size": size}),
+        "list_users": (f"{settings.API_V1_STR}/users/", {}),
+        "list_roles": (f"{settings.API_V1_STR}/roles/", {}),
+    }
+    for name, (path, params) in routes.items():
+        def request(path=path, params=params):
+            response = client.get(path, params=params, headers=superuser_token_headers)
+            assert response.status_code == 200
+
+        benchmark.measure(name, dataset.scale.name, request, repeat=5)
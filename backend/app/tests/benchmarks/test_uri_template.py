@@ -0,0 +1,23 @@
+import random
+
+from app.service.uri_template import UriTemplateTrie
+from app.tests.benchmarks.conftest import BenchmarkRecorder
+
+# 模板前缀树的构建和匹配耗时，匹配只与路径段数有关，与模板数量无关
+
+TEMPLATE_COUNT = 100_000
+MATCH_COUNT = 10_000
+
+
+def test_uri_template_trie(benchmark: BenchmarkRecorder) -> None:
+    rng = random.Random(0)
+    templates = [
+        f"/api/service{i % 100}/resource{i}/{{id}}/sub{rng.randint(0, 9)}" for i in range(TEMPLATE_COUNT)
+    ]
+    benchmark.measure("uri_template_build", "100k", lambda: UriTemplateTrie(templates))
+
+    trie = UriTemplateTrie(templates)
+    samples = rng.sample(templates, MATCH_COUNT)
+    paths = [template.replace("{id}", str(rng.randint(1, 10_000))) for template in samples]
+    benchmark.measure("uri_template_match_10k", "100k", lambda: [trie.match(path) for path in paths], repeat=3)
+    assert [trie.match(path) for path in paths] == samples
@@ -1,4 +1,5 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from contextlib import AbstractContextManager, contextmanager
 
 import pytest
 from fastapi.testclient import TestClient
@@ -6,6 +7,8 @@ from sqlmodel import Session, delete
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.core.http_cache import response_cache
+from app.core.query_counter import QueryStats, count_queries
 from app.main import app
 from app.models import Item, User
 from app.tests.utils.user import authentication_token_from_email
@@ -24,6 +27,12 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache() -> None:
+    # 测试通过 db 直接写入的数据不会递增表版本号，每个测试从空的响应缓存开始
+    response_cache.clear()
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -40,3 +49,21 @@ def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]
     return authentication_token_from_email(
         client=client, email=settings.EMAIL_TEST_USER, db=db
     )
+
+
+@pytest.fixture
+def assert_max_queries() -> Callable[[int], AbstractContextManager[QueryStats]]:
+    """
+    with assert_max_queries(10): client.get(...)，代码块内执行的 SQL 超过上限时失败
+    """
+
+    @contextmanager
+    def _assert_max_queries(max_count: int) -> Generator[QueryStats, None, None]:
+        with count_queries() as stats:
+            yield stats
+        assert stats.count <= max_count, (
+            f"执行了 {stats.count} 条 SQL，超过上限 {max_count}：\n"
+            + "\n".join(f"{count} x {statement}" for statement, count in stats.statements.most_common(10))
+        )
+
+    return _assert_max_queries
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.api.deps import get_read_db
+from app.core.config import settings
+from app.core.db import async_engine, async_read_engine
+from app.core.replica import REPLICA_LAG_SQL, ReplicaMonitor
+
+
+class FakeMonitor(ReplicaMonitor):
+    def __init__(self, lags, max_lag: float = 5.0, interval: float = 0.0):
+        super().__init__(None, max_lag, interval)
+        self.lags = list(lags)
+        self.checks = 0
+
+    async def measure_lag(self):
+        self.checks += 1
+        lag = self.lags.pop(0)
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+
+def _usable(monitor: ReplicaMonitor) -> bool:
+    return asyncio.run(monitor.is_usable())
+
+
+def test_falls_back_to_primary_when_lagging() -> None:
+    monitor = FakeMonitor([0.5, 30.0, None, 1.0])
+    assert _usable(monitor) is True
+    assert _usable(monitor) is False
+    # 处于恢复模式但还没有回放过事务时无法得到延迟
+    assert _usable(monitor) is False
+    assert _usable(monitor) is True
+
+
+def test_falls_back_to_primary_when_unreachable() -> None:
+    monitor = FakeMonitor([ConnectionError("replica down"), 0.0])
+    assert _usable(monitor) is False
+    assert _usable(monitor) is True
+
+
+def test_lag_is_checked_once_per_interval() -> None:
+    monitor = FakeMonitor([0.0, 60.0], interval=3600)
+    assert _usable(monitor) is True
+    assert _usable(monitor) is True
+    assert monitor.checks == 1
+
+
+def test_lag_is_zero_outside_recovery(db: Session) -> None:
+    # 主库不在恢复模式
+    assert db.execute(REPLICA_LAG_SQL).scalar() == 0
+
+
+@pytest.mark.skipif(async_read_engine is None, reason="未配置 POSTGRES_REPLICA_SERVER")
+def test_read_session_uses_replica() -> None:
+    # 本地可以用同一实例上的第二个数据库模拟副本：POSTGRES_REPLICA_SERVER=localhost POSTGRES_REPLICA_DB=app_replica
+    async def current_database():
+        sessions = get_read_db()
+        try:
+            session = await anext(sessions)
+            return (await session.execute(text("SELECT current_database()"))).scalar()
+        finally:
+            await sessions.aclose()
+            await async_engine.dispose()
+            await async_read_engine.dispose()
+
+    assert asyncio.run(current_database()) == (settings.POSTGRES_REPLICA_DB or settings.POSTGRES_DB)
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete, select
+
+from app.core.config import settings
+from app.models import JobRun, JobRunStatus
+from app.scheduler.job_run import RUNNING_STALE_SECONDS, run_job
+from app.scheduler.leader import leader_elector
+
+JOB_ID = "test_job_run"
+
+
+def count_job() -> int:
+    return 42
+
+
+async def failing_job() -> None:
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def clean_job_runs(db: Session):
+    db.execute(delete(JobRun).where(JobRun.job_id == JOB_ID))
+    db.commit()
+    yield
+    db.execute(delete(JobRun).where(JobRun.job_id == JOB_ID))
+    db.commit()
+
+
+def _runs(db: Session) -> list[JobRun]:
+    db.expire_all()
+    return db.execute(select(JobRun).where(JobRun.job_id == JOB_ID)).scalars().all()
+
+
+def test_run_job_records_success(db: Session) -> None:
+    result = asyncio.run(run_job(JOB_ID, f"{__name__}:count_job"))
+
+    assert result == 42
+    [job_run] = _runs(db)
+    assert job_run.status == JobRunStatus.SUCCESS
+    assert job_run.rows_processed == 42
+    assert job_run.finished_at is not None
+    assert job_run.duration_ms >= 0
+    assert job_run.error is None
+
+
+def test_run_job_records_failure(db: Session) -> None:
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_job(JOB_ID, f"{__name__}:failing_job"))
+
+    [job_run] = _runs(db)
+    assert job_run.status == JobRunStatus.FAILED
+    assert "boom" in job_run.error
+
+
+def test_run_job_skips_non_leader(db: Session) -> None:
+    if not settings.SCHEDULER_LEADER_ELECTION or leader_elector.is_leader:
+        pytest.skip("当前实例是 leader")
+
+    assert asyncio.run(run_job(JOB_ID, f"{__name__}:count_job", leader_only=True)) is None
+    assert _runs(db) == []
+
+
+def test_run_job_skips_when_run_in_flight(db: Session) -> None:
+    in_flight = JobRun(job_id=JOB_ID, worker="other", progress={})
+    db.add(in_flight)
+    db.commit()
+
+    # 手动触发的执行尚未结束，定时调度不再重复执行
+    assert asyncio.run(run_job(JOB_ID, f"{__name__}:count_job")) is None
+    [job_run] = _runs(db)
+    assert job_run.id == in_flight.id
+    assert job_run.status == JobRunStatus.RUNNING
+
+
+def test_run_job_abandons_stale_run(db: Session) -> None:
+    # 执行实例崩溃后留下的记录：仍是执行中，但早已没有心跳
+    stale = JobRun(job_id=JOB_ID, worker="crashed", progress={},
+                   started_at=datetime.utcnow() - timedelta(seconds=RUNNING_STALE_SECONDS + 60))
+    db.add(stale)
+    db.commit()
+
+    assert asyncio.run(run_job(JOB_ID, f"{__name__}:count_job")) == 42
+    runs = {job_run.id: job_run for job_run in _runs(db)}
+    assert len(runs) == 2
+    assert runs[stale.id].status == JobRunStatus.FAILED
+    assert runs[stale.id].error.startswith("abandoned")
+    [new_run] = [job_run for run_id, job_run in runs.items() if run_id != stale.id]
+    assert new_run.status == JobRunStatus.SUCCESS
+
+
+def test_read_job_runs_and_stats(client: TestClient) -> None:
+    asyncio.run(run_job(JOB_ID, f"{__name__}:count_job"))
+    asyncio.run(run_job(JOB_ID, f"{__name__}:count_job"))
+
+    response = client.get(f"{settings.API_V1_STR}/scheduler/runs", params={"job_id": JOB_ID})
+    assert response.status_code == 200
+    runs = response.json()
+    assert len(runs) == 2
+    assert all(run["rows_processed"] == 42 for run in runs)
+
+    response = client.get(f"{settings.API_V1_STR}/scheduler/runs/stats")
+    assert response.status_code == 200
+    [stats] = [item for item in response.json() if item["job_id"] == JOB_ID]
+    assert stats["runs"] == 2
+    assert stats["failures"] == 0
+    assert stats["p50_ms"] <= stats["p95_ms"] <= stats["max_ms"]
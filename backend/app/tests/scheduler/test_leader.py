@@ -0,0 +1,61 @@
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.scheduler.leader import LeaderElector
+
+
+def test_advisory_lock_elects_single_leader_and_fails_over() -> None:
+    lock_key = settings.SCHEDULER_LEADER_LOCK_KEY + 1
+    first = LeaderElector(lock_key, heartbeat_seconds=60)
+    second = LeaderElector(lock_key, heartbeat_seconds=60)
+    try:
+        first.heartbeat()
+        second.heartbeat()
+        assert first.is_leader
+        assert not second.is_leader
+
+        # leader 续约后仍然是 leader
+        first.heartbeat()
+        second.heartbeat()
+        assert first.is_leader
+        assert not second.is_leader
+
+        # leader 退出后由其他实例接管
+        first.stop()
+        assert not first.is_leader
+        second.heartbeat()
+        assert second.is_leader
+    finally:
+        first.stop()
+        second.stop()
+
+
+def test_listeners_are_notified_on_leader_change() -> None:
+    lock_key = settings.SCHEDULER_LEADER_LOCK_KEY + 2
+    elector = LeaderElector(lock_key, heartbeat_seconds=60)
+    changes = []
+    elector.add_listener(changes.append)
+    try:
+        elector.heartbeat()
+        elector.heartbeat()
+        elector.stop()
+        assert changes == [True, False]
+    finally:
+        elector.stop()
+
+
+def test_leader_heartbeat_does_not_leave_transaction_open(db: Session) -> None:
+    lock_key = settings.SCHEDULER_LEADER_LOCK_KEY + 3
+    elector = LeaderElector(lock_key, heartbeat_seconds=60)
+    try:
+        elector.heartbeat()
+        elector.heartbeat()
+        assert elector.is_leader
+        backend_pid = elector._connection.connection.dbapi_connection.info.backend_pid
+        state = db.execute(
+            text("SELECT state FROM pg_stat_activity WHERE pid = :pid"), {"pid": backend_pid}
+        ).scalar()
+        assert state == "idle"
+    finally:
+        elector.stop()
@@ -0,0 +1,48 @@
+import pytest
+
+from app.scheduler.job_run import run_job_sync
+from app.scheduler.scheduler import (
+    EXECUTOR_PROCESS_POOL,
+    EXECUTOR_THREAD_POOL,
+    scheduler,
+)
+
+
+def sync_job() -> int:
+    return 1
+
+
+async def async_job() -> int:
+    return 1
+
+
+def test_add_job_with_executor_and_overlap_options() -> None:
+    job = scheduler.add_job(sync_job, 'interval', job_id="test_sync_job", executor=EXECUTOR_THREAD_POOL,
+                            max_instances=2, coalesce=False, misfire_grace_time=30, jitter=5, minutes=5)
+    try:
+        assert job.func is run_job_sync
+        assert job.executor == EXECUTOR_THREAD_POOL
+        assert job.max_instances == 2
+        assert job.coalesce is False
+        assert job.misfire_grace_time == 30
+        assert job.trigger.jitter == 5
+    finally:
+        scheduler.remove_job("test_sync_job")
+
+
+def test_process_pool_job_skips_leader_check_in_child() -> None:
+    job = scheduler.add_job(sync_job, 'interval', job_id="test_process_job", leader_only=True,
+                            executor=EXECUTOR_PROCESS_POOL, minutes=5)
+    try:
+        assert list(job.args) == ["test_process_job", f"{__name__}:sync_job", False]
+    finally:
+        scheduler.remove_job("test_process_job")
+
+
+def test_add_job_rejects_invalid_options() -> None:
+    with pytest.raises(ValueError):
+        scheduler.add_job(async_job, 'interval', executor=EXECUTOR_THREAD_POOL, minutes=5)
+    with pytest.raises(ValueError):
+        scheduler.add_job(sync_job, 'interval', executor="unknown", minutes=5)
+    with pytest.raises(ValueError):
+        scheduler.add_job(sync_job, 'date', jitter=5)
@@ -0,0 +1,60 @@
+from sqlmodel import Session, func, select
+
+from app.models import (
+    GatherInterface,
+    IgnoreInterface,
+    IgnoreMatchType,
+    ProjectNameMapping,
+    TransactionLog,
+)
+from app.service.gather_interface import save_gather_interfaces
+from app.tests.utils.utils import random_lower_string
+
+
+def _series(application: str, uri: str, method: str = "GET", status: str = "200") -> dict:
+    return {"metric": {"application": application, "uri": uri, "method": method, "status": status}}
+
+
+def test_save_gather_interfaces_inserts_only_new_rows(db: Session) -> None:
+    application = random_lower_string()
+    results = [
+        _series(application, "/api/user"),
+        _series(application, "/api/user", status="500"),  # 同一接口的另一条序列
+        _series(application, "/api/user", method="POST"),
+        _series(application, "/actuator/health"),  # 非 /api 开头的接口不采集
+    ]
+
+    save_gather_interfaces(results)
+    save_gather_interfaces(results)
+
+    mapping = db.exec(
+        select(ProjectNameMapping).where(ProjectNameMapping.eureka_name == application)
+    ).one()
+    total = db.exec(
+        select(func.count())
+        .select_from(GatherInterface)
+        .where(GatherInterface.project_name_mapping_id == mapping.id)
+    ).one()
+    assert total == 2
+
+    logs = db.exec(select(TransactionLog).where(TransactionLog.name == application)).all()
+    assert [log.count for log in logs] == [2]
+
+
+def test_save_gather_interfaces_skips_ignored_uris(db: Session) -> None:
+    application = random_lower_string()
+    prefix = f"/api/{random_lower_string()}/"
+    db.add(IgnoreInterface(uri=prefix, description="test", match_type=IgnoreMatchType.PREFIX))
+    db.commit()
+
+    save_gather_interfaces([
+        _series(application, "/api/user"),
+        _series(application, f"{prefix}health"),
+    ])
+
+    urls = db.exec(
+        select(GatherInterface.url)
+        .join(ProjectNameMapping)
+        .where(ProjectNameMapping.eureka_name == application)
+    ).all()
+    assert urls == ["/api/user"]
@@ -0,0 +1,92 @@
+import asyncio
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.notify import ChangeListener
+from app.service.gather_interface import get_or_create_project_id
+from app.service.project_cache import (
+    EUREKA_NAME,
+    NOTIFY_CHANNEL,
+    ProjectIdCache,
+    _on_notify,
+    project_cache,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = ProjectIdCache(max_size=2, ttl=60)
+    ids = [uuid.uuid4() for _ in range(3)]
+    cache.set(EUREKA_NAME, "a", ids[0])
+    cache.set(EUREKA_NAME, "b", ids[1])
+    assert cache.get(EUREKA_NAME, "a") == ids[0]
+    cache.set(EUREKA_NAME, "c", ids[2])
+    assert cache.get(EUREKA_NAME, "b") is None
+    assert cache.get(EUREKA_NAME, "a") == ids[0]
+    assert len(cache) == 2
+
+
+def test_cache_entries_expire() -> None:
+    cache = ProjectIdCache(max_size=10, ttl=0.01)
+    cache.set(EUREKA_NAME, "a", uuid.uuid4())
+    time.sleep(0.02)
+    assert cache.get(EUREKA_NAME, "a") is None
+
+
+def test_invalidate_by_project_id() -> None:
+    cache = ProjectIdCache(max_size=10, ttl=60)
+    project_id, other_id = uuid.uuid4(), uuid.uuid4()
+    cache.set(EUREKA_NAME, "a", project_id)
+    cache.set("upload_name", "a-upload", project_id)
+    cache.set(EUREKA_NAME, "b", other_id)
+    cache.invalidate(project_id)
+    assert len(cache) == 1
+    assert cache.get(EUREKA_NAME, "b") == other_id
+
+
+def test_patch_project_invalidates_cached_id(client: TestClient, db: Session) -> None:
+    application = random_lower_string()
+    project_id = get_or_create_project_id(db, application)
+    assert project_cache.get(EUREKA_NAME, application) == project_id
+
+    response = client.patch(f"{settings.API_V1_STR}/projects/{project_id}",
+                            json={"eureka_name": random_lower_string()})
+    assert response.status_code == 200
+    assert project_cache.get(EUREKA_NAME, application) is None
+    # 原名称已不属于该项目，再次采集时创建新项目
+    assert get_or_create_project_id(db, application) != project_id
+
+
+def test_listener_invalidates_on_notify_from_other_worker(db: Session) -> None:
+    project_id = uuid.uuid4()
+
+    async def wait_until_evicted() -> bool:
+        for _ in range(100):
+            if project_cache.get(EUREKA_NAME, "listener") is None:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def run() -> bool:
+        # 独立的监听实例，不影响 TestClient 启动的全局监听
+        listener = ChangeListener()
+        listener.subscribe(NOTIFY_CHANNEL, _on_notify)
+        listener.start()
+        try:
+            # 订阅成功时会清空缓存
+            project_cache.set(EUREKA_NAME, "listener", project_id)
+            assert await wait_until_evicted()
+            project_cache.set(EUREKA_NAME, "listener", project_id)
+            # 模拟其他 worker 修改项目后发出的通知，不经过本进程的失效调用
+            db.execute(select(func.pg_notify(NOTIFY_CHANNEL, str(project_id))))
+            db.commit()
+            return await wait_until_evicted()
+        finally:
+            await listener.stop()
+
+    assert asyncio.run(run())
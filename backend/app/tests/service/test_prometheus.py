@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.service.prometheus import PrometheusClient
+
+
+def _run_query(handler) -> list[dict]:
+    async def run() -> list[dict]:
+        client = PrometheusClient()
+        await client.start(transport=httpx.MockTransport(handler))
+        try:
+            return await client.query("http_server_requests_seconds_count")
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def test_query_returns_result_list() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/api/v1/query"
+        assert request.url.params["query"] == "http_server_requests_seconds_count"
+        return httpx.Response(
+            200, json={"data": {"result": [{"metric": {"uri": "/api/user"}}]}}
+        )
+
+    results = _run_query(handler)
+    assert results == [{"metric": {"uri": "/api/user"}}]
+
+
+def test_query_retries_server_errors(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "PROMETHEUS_RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) < settings.PROMETHEUS_RETRY_ATTEMPTS:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"data": {"result": []}})
+
+    assert _run_query(handler) == []
+    assert len(calls) == settings.PROMETHEUS_RETRY_ATTEMPTS
+
+
+def test_query_does_not_retry_client_errors(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "PROMETHEUS_RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _run_query(handler)
+    assert len(calls) == 1
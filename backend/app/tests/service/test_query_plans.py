@@ -0,0 +1,70 @@
+import uuid
+
+import pytest
+from sqlalchemy import text, tuple_
+from sqlmodel import Session, select
+
+from app.models import (
+    GatherInterface,
+    IgnoreInterface,
+    IgnoreMatchType,
+    ProjectNameMapping,
+    UploadInterface,
+)
+
+# 热点查询的执行计划不能退化为顺序扫描。测试库数据量很小，规划器本来就倾向于顺序扫描，
+# 因此关闭 enable_seqscan：有可用索引时会改走索引，没有索引时仍然只能顺序扫描
+
+
+def _plan(db: Session, statement) -> str:
+    sql = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    try:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        return "\n".join(db.execute(text(f"EXPLAIN {sql}")).scalars().all())
+    finally:
+        db.rollback()
+
+
+HOT_QUERIES = {
+    # get_or_create_project_id
+    "project_by_eureka_name": select(ProjectNameMapping).where(ProjectNameMapping.eureka_name == "demo"),
+    # load_template_tries
+    "templates_by_upload_name": (
+        select(ProjectNameMapping.upload_name, GatherInterface.url)
+        .join(GatherInterface, GatherInterface.project_name_mapping_id == ProjectNameMapping.id)
+        .where(ProjectNameMapping.upload_name.in_(["demo", "other"]))
+    ),
+    # 采集入库的冲突判断
+    "gather_by_project_url_method": select(GatherInterface.id).where(
+        GatherInterface.project_name_mapping_id == uuid.UUID(int=0),
+        GatherInterface.url == "/api/demo",
+        GatherInterface.method == "GET",
+    ),
+    # 上报入库的冲突判断
+    "upload_by_name_url_method": select(UploadInterface.id).where(
+        UploadInterface.name == "demo",
+        UploadInterface.url == "/api/demo",
+        UploadInterface.method == "GET",
+    ),
+    # update_coverage 增量模式：本批次上报记录 -> 项目 -> 采集接口
+    "coverage_join_by_upload_keys": (
+        select(GatherInterface.id)
+        .where(GatherInterface.project_name_mapping_id == ProjectNameMapping.id)
+        .where(ProjectNameMapping.upload_name == UploadInterface.name)
+        .where(GatherInterface.url == UploadInterface.template_url)
+        .where(GatherInterface.method == UploadInterface.method)
+        .where(tuple_(UploadInterface.name, UploadInterface.url, UploadInterface.method)
+               .in_([("demo", "/api/demo/1", "GET")]))
+    ),
+    # 添加 / 修改过滤规则时的重复判断
+    "ignore_rule": select(IgnoreInterface.id).where(
+        IgnoreInterface.match_type == IgnoreMatchType.EXACT,
+        IgnoreInterface.uri == "/api/demo",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(db: Session, name: str) -> None:
+    plan = _plan(db, HOT_QUERIES[name])
+    assert "Seq Scan" not in plan, plan
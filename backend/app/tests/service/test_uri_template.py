@@ -0,0 +1,80 @@
+import random
+
+from sqlmodel import Session
+
+from app.core.http_cache import notify_table_changed
+from app.models import GatherInterface, ProjectNameMapping
+from app.service.uri_template import (
+    UriTemplateTrie,
+    is_template,
+    load_template_tries,
+    split_path,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+def test_split_path() -> None:
+    assert split_path("/api/user/42?x=1") == ["api", "user", "42"]
+    assert split_path("/api/user/") == ["api", "user"]
+
+
+def test_is_template() -> None:
+    assert is_template("/api/user/{id}")
+    assert is_template("/api/static/**")
+    assert not is_template("/api/user/me")
+
+
+def test_trie_matches_templates() -> None:
+    trie = UriTemplateTrie([
+        "/api/user/{id}",
+        "/api/user/me",
+        "/api/user/{id}/order/{orderId:\\d+}",
+        "/api/static/**",
+        "/api/order",
+    ])
+    assert trie.size == 5
+
+    assert trie.match("/api/user/42") == "/api/user/{id}"
+    assert trie.match("/api/user/me") == "/api/user/me"  # 固定段优先
+    assert trie.match("/api/user/42/order/7") == "/api/user/{id}/order/{orderId:\\d+}"
+    assert trie.match("/api/static/js/app.js") == "/api/static/**"
+    assert trie.match("/api/order") == "/api/order"
+    assert trie.match("/api/order/1") is None
+    assert trie.match("/api/user") is None
+    assert trie.match("/api/user//order/7") is None  # 参数段不能为空
+
+
+def test_trie_backtracks_from_literal_to_param() -> None:
+    trie = UriTemplateTrie(["/api/user/me/profile", "/api/user/{id}/orders"])
+    assert trie.match("/api/user/me/orders") == "/api/user/{id}/orders"
+
+
+def test_trie_matches_many_templates() -> None:
+    rng = random.Random(0)
+    templates = [
+        f"/api/service{i % 100}/resource{i}/{{id}}/sub{rng.randint(0, 9)}" for i in range(10_000)
+    ]
+    trie = UriTemplateTrie(templates)
+    assert trie.size == len(templates)
+
+    samples = rng.sample(templates, 1_000)
+    paths = [template.replace("{id}", str(rng.randint(1, 10_000))) for template in samples]
+    assert [trie.match(path) for path in paths] == samples
+
+
+def test_load_template_tries_is_cached_until_gather_rows_change(db: Session, assert_max_queries) -> None:
+    name = random_lower_string()
+    mapping = ProjectNameMapping(upload_name=name, eureka_name=random_lower_string(), name=name, description="")
+    db.add(mapping)
+    db.commit()
+    db.add(GatherInterface(url="/api/user/{id}", method="GET", project_name_mapping_id=mapping.id))
+    db.commit()
+
+    trie = load_template_tries(db, {name})[name]
+    with assert_max_queries(0):
+        assert load_template_tries(db, {name})[name] is trie
+
+    db.add(GatherInterface(url="/api/order/{id}", method="GET", project_name_mapping_id=mapping.id))
+    notify_table_changed(db, GatherInterface.__tablename__)
+    db.commit()
+    assert load_template_tries(db, {name})[name].match("/api/order/7") == "/api/order/{id}"